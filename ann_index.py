@@ -0,0 +1,230 @@
+import json
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+
+class IVFIndex:
+    """
+    Índice aproximado IVF (inverted file) para vetores normalizados
+
+    Os vetores são agrupados por k-means esférico em `nlist` listas. Na busca,
+    só as `nprobe` listas com centróides mais próximos da consulta são
+    varridas, trocando um pouco de recall por muito menos produtos escalares.
+
+    A lista de cada linha fica num arquivo int32 mapeado em memória
+    (`ivf_lists.i32`, -1 = sem lista), atualizado no lugar a cada upsert, o que
+    permite adicionar vetores sem reconstruir o índice.
+    """
+
+    def __init__(self, path: Path, dimension: int, nprobe: int = 16):
+        """
+        Args:
+            path: Pasta do índice (a mesma dos vetores)
+            dimension: Dimensão dos vetores
+            nprobe: Listas visitadas por consulta (mais = maior recall, menor QPS)
+        """
+        self.path = Path(path)
+        self.dimension = dimension
+        self.nprobe = nprobe
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_count = 0
+        self._lists: Optional[np.ndarray] = None
+        self._order: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+
+    # ----------------------------------------------------------- arquivos
+
+    @property
+    def _centroids_path(self) -> Path:
+        return self.path / "ivf_centroids.npy"
+
+    @property
+    def _lists_path(self) -> Path:
+        return self.path / "ivf_lists.i32"
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.path / "ivf_meta.json"
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def nlist(self) -> int:
+        return 0 if self.centroids is None else len(self.centroids)
+
+    def load(self, capacity: int) -> bool:
+        """Carregar o índice do disco, se existir"""
+        if not (self._centroids_path.exists() and self._lists_path.exists() and self._meta_path.exists()):
+            return False
+        self.centroids = np.load(self._centroids_path)
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            self.trained_count = json.load(f)["trained_count"]
+        self._map_lists()
+        self.resize(capacity)
+        return True
+
+    def _map_lists(self):
+        size = self._lists_path.stat().st_size // 4
+        self._lists = np.memmap(self._lists_path, dtype=np.int32, mode="r+", shape=(size,))
+        self._order = None
+
+    def resize(self, capacity: int):
+        """Acompanhar o crescimento do arquivo de vetores"""
+        if self._lists is None or len(self._lists) >= capacity:
+            return
+        old_size = len(self._lists)
+        self._lists.flush()
+        self._lists = None
+        with open(self._lists_path, "r+b") as f:
+            f.truncate(capacity * 4)
+        self._map_lists()
+        self._lists[old_size:] = -1
+
+    def drop(self):
+        """Apagar o índice do disco"""
+        self.centroids = None
+        self._lists = None
+        self._order = None
+        for file in (self._centroids_path, self._lists_path, self._meta_path):
+            if file.exists():
+                file.unlink()
+
+    # ----------------------------------------------------------- treino
+
+    @staticmethod
+    def _nearest(vectors: np.ndarray, centroids: np.ndarray, block: int = 65536) -> np.ndarray:
+        """Centróide mais próximo (maior cosseno) de cada vetor, em blocos"""
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), block):
+            scores = np.asarray(vectors[start:start + block], dtype=np.float32) @ centroids.T
+            labels[start:start + block] = scores.argmax(axis=1)
+        return labels
+
+    def train(self, matrix: np.ndarray, alive_rows: np.ndarray, capacity: int,
+              nlist: Optional[int] = None, iterations: int = 10, max_train_size: int = 200_000,
+              seed: int = 0):
+        """
+        Treinar os centróides e atribuir todas as linhas ocupadas
+
+        Args:
+            matrix: Matriz de vetores normalizados (pode ser memmap)
+            alive_rows: Linhas ocupadas
+            capacity: Número de linhas do arquivo de vetores
+            nlist: Número de listas (padrão: 4·√n)
+            iterations: Iterações do k-means
+            max_train_size: Máximo de vetores amostrados para o treino
+            seed: Semente da amostragem
+        """
+        count = len(alive_rows)
+        if count == 0:
+            return
+        nlist = nlist or int(np.clip(4 * np.sqrt(count), 1, 65536))
+        nlist = min(nlist, count)
+
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(alive_rows, size=min(count, max(max_train_size, nlist)), replace=False))
+        sample = np.asarray(matrix[sample_rows], dtype=np.float32)
+
+        # k-means esférico: centróides renormalizados a cada iteração
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = self._nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()), replace=False)]
+            sums /= np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+            centroids = sums
+
+        self.centroids = centroids.astype(np.float32)
+        self.trained_count = count
+        np.save(self._centroids_path, self.centroids)
+        with open(self._meta_path, "w", encoding="utf-8") as f:
+            json.dump({"trained_count": count, "nlist": nlist}, f)
+
+        with open(self._lists_path, "wb") as f:
+            f.truncate(capacity * 4)
+        self._map_lists()
+        self._lists[:] = -1
+        self.add(alive_rows, matrix[alive_rows])
+
+    # ----------------------------------------------------------- atualização
+
+    def add(self, rows, vectors: np.ndarray):
+        """Atribuir linhas novas ou alteradas à lista mais próxima"""
+        if not self.is_trained or len(rows) == 0:
+            return
+        self._lists[np.asarray(rows)] = self._nearest(vectors, self.centroids)
+        self._lists.flush()
+        self._order = None
+
+    def remove(self, rows):
+        """Tirar linhas removidas das listas"""
+        if not self.is_trained or len(rows) == 0:
+            return
+        self._lists[np.asarray(rows)] = -1
+        self._lists.flush()
+        self._order = None
+
+    def unassigned(self, alive_rows: np.ndarray) -> np.ndarray:
+        """Linhas ocupadas ainda sem lista"""
+        return alive_rows[self._lists[alive_rows] < 0]
+
+    # ----------------------------------------------------------- busca
+
+    def _build_postings(self):
+        """Ordenar as linhas por lista (formato CSR) para a busca"""
+        lists = np.asarray(self._lists)
+        order = np.argsort(lists, kind="stable").astype(np.int64)
+        assigned = lists[order] >= 0
+        order = order[assigned]
+        counts = np.bincount(lists[order], minlength=self.nlist)
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+        self._order = order
+
+    def probe(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """
+        Linhas das `nprobe` listas mais próximas da consulta, em ordem crescente
+
+        Só lê o estado do índice (listas e centróides): a pontuação das linhas
+        pode rodar depois, fora do lock do banco vetorial.
+        """
+        if self._order is None:
+            self._build_postings()
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        candidates = np.concatenate([self._order[self._offsets[i]:self._offsets[i + 1]] for i in probes])
+        candidates.sort()  # Leitura sequencial do memmap
+        return candidates
+
+    def search(self, score_rows: Callable[[np.ndarray], np.ndarray], query: np.ndarray, top_k: int,
+               nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Buscar os vizinhos aproximados de uma consulta normalizada
+
+        Args:
+            score_rows: Função que dá o score de um conjunto de linhas
+                (float32 exato ou códigos quantizados)
+            query: Consulta normalizada (para escolher as listas)
+            top_k: Quantidade de resultados
+            nprobe: Listas visitadas (padrão: `self.nprobe`)
+
+        Returns:
+            (linhas, scores) em ordem decrescente de score
+        """
+        candidates = self.probe(query, nprobe)
+        if len(candidates) == 0:
+            return candidates, np.empty(0, dtype=np.float32)
+
+        scores = score_rows(candidates)
+        k = min(top_k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return candidates[top], scores[top]
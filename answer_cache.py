@@ -0,0 +1,175 @@
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class AnswerCache:
+    """
+    Cache de respostas para perguntas repetidas ou quase iguais
+
+    A busca é feita em duas etapas: primeiro pelo texto normalizado da
+    pergunta (sem custo de API) e, se não achar, pela similaridade de
+    cosseno entre o embedding da pergunta e o das perguntas já respondidas.
+    As entradas expiram após `ttl_seconds`, as menos usadas são descartadas
+    acima de `max_entries` e tudo é invalidado quando o manifesto do índice
+    muda (documentos reindexados).
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 24 * 3600,
+                 similarity_threshold: float = 0.95, manifest_path: Optional[str] = None):
+        """
+        Args:
+            max_entries: Número máximo de respostas guardadas (LRU)
+            ttl_seconds: Validade de cada resposta
+            similarity_threshold: Cosseno mínimo para reaproveitar a resposta de outra pergunta
+            manifest_path: Manifesto do índice; se mudar, o cache é esvaziado
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.manifest_path = manifest_path
+
+        self.lookups = 0
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.saved_seconds = 0.0
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None  # Embeddings das entradas (reconstruída sob demanda)
+        self._matrix_keys: List[str] = []
+        self._manifest_signature = self._read_manifest_signature()
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        """Normalizar a pergunta (caixa, acentos, pontuação e espaços)"""
+        text = unicodedata.normalize("NFKD", question.lower())
+        text = "".join(char for char in text if not unicodedata.combining(char))
+        text = re.sub(r"[^\w\s]", " ", text)
+        return " ".join(text.split())
+
+    def _read_manifest_signature(self) -> Optional[Tuple[int, int]]:
+        if not self.manifest_path:
+            return None
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _validate(self):
+        """Esvaziar o cache se o manifesto mudou e descartar entradas expiradas"""
+        signature = self._read_manifest_signature()
+        if signature != self._manifest_signature:
+            self._manifest_signature = signature
+            self._entries.clear()
+            self._matrix = None
+            return
+
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if now - entry["created_at"] > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _similar(self, embedding: np.ndarray) -> Optional[str]:
+        """Chave da entrada mais parecida acima do limiar"""
+        if not self._entries:
+            return None
+        if self._matrix is None:
+            self._matrix_keys = list(self._entries)
+            self._matrix = np.stack([self._entries[key]["embedding"] for key in self._matrix_keys])
+        scores = self._matrix @ embedding
+        best = int(scores.argmax())
+        if scores[best] < self.similarity_threshold:
+            return None
+        return self._matrix_keys[best]
+
+    def lookup(self, question: str,
+               embed: Callable[[str], Optional[List[float]]]) -> Tuple[Optional[Dict], Optional[List[float]]]:
+        """
+        Procurar uma resposta para a pergunta
+
+        Args:
+            question: Pergunta do usuário
+            embed: Função de embedding, chamada só se não houver acerto exato
+                (pode devolver None, e então só a busca exata vale)
+
+        Returns:
+            (entrada com "answer" e "sources" ou None, embedding da pergunta
+            — vazio em acertos exatos — para reaproveitar na busca)
+        """
+        start = time.perf_counter()
+        key = self.normalize(question)
+        with self._lock:
+            self.lookups += 1
+            self._validate()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                self.saved_seconds += max(0.0, entry["latency"] - (time.perf_counter() - start))
+                return entry, []
+
+        embedding = embed(question)
+        if embedding is None:
+            return None, None
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector /= max(float(np.linalg.norm(vector)), 1e-12)
+        with self._lock:
+            self._validate()
+            similar = self._similar(vector)
+            if similar is None:
+                return None, embedding
+            entry = self._entries[similar]
+            self._entries.move_to_end(similar)
+            self.semantic_hits += 1
+            self.saved_seconds += max(0.0, entry["latency"] - (time.perf_counter() - start))
+            return entry, embedding
+
+    def put(self, question: str, embedding: List[float], answer: str, sources: List[Dict], latency: float):
+        """
+        Guardar a resposta de uma pergunta
+
+        Args:
+            question: Pergunta do usuário
+            embedding: Embedding da pergunta
+            answer: Resposta gerada
+            sources: Trechos usados na resposta
+            latency: Tempo gasto para responder (base do tempo economizado)
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector /= max(float(np.linalg.norm(vector)), 1e-12)
+        key = self.normalize(question)
+        with self._lock:
+            self._validate()
+            self._entries[key] = {
+                "answer": answer,
+                "sources": sources,
+                "embedding": vector,
+                "latency": latency,
+                "created_at": time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def hit_rate(self) -> float:
+        """Fração das consultas respondidas pelo cache"""
+        return (self.exact_hits + self.semantic_hits) / self.lookups if self.lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
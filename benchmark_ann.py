@@ -0,0 +1,118 @@
+"""
+Benchmark recall@k × QPS do índice aproximado IVF contra a busca exata
+
+Usa os chunks gerados a partir da pasta `output/`. Os vetores vêm do cache
+de embeddings (ou da API, se OPENAI_API_KEY estiver configurada); sem eles,
+são gerados pseudo-embeddings determinísticos só para medir o índice.
+Réplicas com ruído aumentam o corpus para simular índices maiores.
+
+Uso:
+    python benchmark_ann.py [--folder output] [--replicas 50] [--k 10]
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from rag_system import DocumentProcessor
+from vector_store import LocalVectorStore
+
+
+def pseudo_embedding(text: str, dimension: int) -> np.ndarray:
+    """Vetor determinístico por texto (apenas para benchmark sem API)"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+
+
+def load_chunk_vectors(folder: str) -> np.ndarray:
+    """Chunks de `folder` com seus embeddings (cache → API → pseudo-embeddings)"""
+    api_key = os.getenv("OPENAI_API_KEY")
+    processor = DocumentProcessor(api_key or "sem-chave", vector_backend="local")
+    chunks = processor.create_chunks(processor.load_documents(folder))
+    texts = [chunk.page_content for chunk in chunks]
+
+    vectors = processor.embedding_cache.get_many(processor.embedding_model, texts)
+    missing = [i for i, values in enumerate(vectors) if values is None]
+    if missing and api_key:
+        position = {chunk.metadata["chunk_id"]: i for i, chunk in enumerate(chunks)}
+        batch = processor.create_embeddings([chunks[i] for i in missing])
+        for chunk_id, values in zip(batch.ids, batch.vectors):
+            vectors[position[chunk_id]] = values
+        missing = [i for i, values in enumerate(vectors) if values is None]
+    if missing:
+        print(f"⚠️ {len(missing)} chunks sem embedding: usando pseudo-embeddings")
+        return np.stack([pseudo_embedding(text, 1536) for text in texts])
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def replicate(vectors: np.ndarray, replicas: int, noise: float, seed: int = 0) -> np.ndarray:
+    """Aumentar o corpus com cópias ruidosas dos vetores reais"""
+    rng = np.random.default_rng(seed)
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    copies = [normalized]
+    for _ in range(replicas - 1):
+        jitter = rng.standard_normal(normalized.shape).astype(np.float32) * noise / np.sqrt(vectors.shape[1])
+        copies.append(normalized + jitter)
+    return np.concatenate(copies)
+
+
+def measure(store: LocalVectorStore, queries: np.ndarray, k: int, **kwargs) -> Tuple[List[set], float]:
+    """Executar as consultas e devolver (IDs por consulta, QPS)"""
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append({match["id"] for match in store.query(query, top_k=k, **kwargs)})
+    return results, len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do índice IVF (recall@k × QPS)")
+    parser.add_argument("--folder", default="output")
+    parser.add_argument("--replicas", type=int, default=50)
+    parser.add_argument("--noise", type=float, default=0.3)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", default="1,2,4,8,16,32,64")
+    args = parser.parse_args()
+
+    base = load_chunk_vectors(args.folder)
+    corpus = replicate(base, args.replicas, args.noise)
+    rng = np.random.default_rng(1)
+    queries = replicate(base[rng.choice(len(base), size=args.queries)], 2, args.noise, seed=1)[args.queries:]
+    print(f"🧪 Corpus: {len(corpus)} vetores × {corpus.shape[1]} dims | {len(queries)} consultas | k={args.k}")
+
+    folder = tempfile.mkdtemp(prefix="neurochat-ann-")
+    try:
+        store = LocalVectorStore(os.path.join(folder, "bench"), dimension=corpus.shape[1],
+                                 ann_min_vectors=0)
+        store.setup()
+        batch_size = 2000
+        for i in range(0, len(corpus), batch_size):
+            store.upsert([{"id": str(j), "values": corpus[j]} for j in range(i, min(i + batch_size, len(corpus)))])
+
+        start = time.perf_counter()
+        store.optimize(nlist=args.nlist, retrain=True)
+        print(f"  ⏱️ Construção do índice: {time.perf_counter() - start:.2f}s")
+
+        exact, exact_qps = measure(store, queries, args.k, exact=True)
+        print(f"\n  {'modo':>12} | {'recall@' + str(args.k):>9} | {'QPS':>9} | {'speedup':>7}")
+        print(f"  {'exata':>12} | {1.0:9.3f} | {exact_qps:9.1f} | {1.0:6.1f}x")
+
+        for nprobe in [int(value) for value in args.nprobe.split(",")]:
+            if nprobe > store.ann.nlist:
+                break
+            approx, qps = measure(store, queries, args.k, nprobe=nprobe)
+            recall = np.mean([len(a & e) / len(e) for a, e in zip(approx, exact)])
+            print(f"  {'nprobe=' + str(nprobe):>12} | {recall:9.3f} | {qps:9.1f} | {qps / exact_qps:6.1f}x")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark do chunking: TextChunker × RecursiveCharacterTextSplitter (LangChain)
+
+Divide os TXT de `output/` com os parâmetros da ingestão (1000/200,
+separadores "\\n\\n", "\\n", ". ", " ") e mede, para cada arquivo:
+
+- tempo mediano e MB/s do LangChain, do TextChunker gerando intervalos e
+  do TextChunker gerando strings
+- equivalência: os chunks do TextChunker (em caracteres) devem ser
+  idênticos aos do LangChain
+- com tiktoken instalado, o chunking em tokens (tamanho médio e máximo)
+
+Uso:
+    python benchmark_chunking.py [--pattern "output/habitos-atomicos-*.txt"] [--repeat 20]
+"""
+import argparse
+import glob
+import statistics
+import time
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from chunker import DEFAULT_SEPARATORS, TextChunker
+
+
+def median_time(function, repeat: int):
+    """Tempo mediano de `repeat` execuções e o resultado da última"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def first_difference(expected, actual) -> int:
+    for i, (a, b) in enumerate(zip(expected, actual)):
+        if a != b:
+            return i
+    return min(len(expected), len(actual))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do chunking")
+    parser.add_argument("--pattern", default="output/habitos-atomicos-*.txt")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(args.pattern))
+    if not files:
+        print(f"❌ Nenhum arquivo encontrado em {args.pattern}")
+        return
+
+    langchain = RecursiveCharacterTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap,
+                                               length_function=len, separators=list(DEFAULT_SEPARATORS))
+    chunker = TextChunker(args.chunk_size, args.chunk_overlap)
+    try:
+        token_chunker = TextChunker(args.chunk_size // 4, args.chunk_overlap // 4, length_unit="tokens")
+    except ImportError:
+        token_chunker = None
+
+    all_equal = True
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        megabytes = len(text.encode("utf-8")) / 1e6
+        print(f"\n📄 {path} ({megabytes:.2f} MB, {len(text):,} caracteres)")
+
+        langchain_time, expected = median_time(lambda: langchain.split_text(text), args.repeat)
+        ranges_time, ranges = median_time(lambda: chunker.split(text), args.repeat)
+        strings_time, actual = median_time(lambda: chunker.split_text(text), args.repeat)
+
+        print(f"  {'divisor':>24} | {'ms':>7} | {'MB/s':>7} | {'speedup':>7}")
+        for label, elapsed in (("LangChain", langchain_time), ("TextChunker (intervalos)", ranges_time),
+                               ("TextChunker (strings)", strings_time)):
+            print(f"  {label:>24} | {elapsed * 1000:7.2f} | {megabytes / elapsed:7.1f} | "
+                  f"{langchain_time / elapsed:6.2f}x")
+
+        if expected == actual and len(ranges) == len(expected):
+            print(f"  ✅ Equivalentes: {len(expected)} chunks idênticos")
+        else:
+            all_equal = False
+            i = first_difference(expected, actual)
+            print(f"  ❌ Diferentes: LangChain {len(expected)} chunks, TextChunker {len(actual)} "
+                  f"(primeira diferença no chunk {i})")
+
+        if token_chunker is not None:
+            token_time, token_ranges = median_time(lambda: token_chunker.split(text), max(1, args.repeat // 4))
+            sizes = [token_chunker._length(text, start, end) for start, end in token_ranges]
+            print(f"  🔢 Em tokens ({token_chunker.chunk_size}/{token_chunker.chunk_overlap}): "
+                  f"{len(token_ranges)} chunks, média {statistics.mean(sizes):.0f} e máximo {max(sizes)} tokens "
+                  f"({token_time * 1000:.1f} ms)")
+    if token_chunker is None:
+        print("\nℹ️ Instale tiktoken para medir também o chunking em tokens")
+    print(f"\n{'✅' if all_equal else '❌'} Equivalência: {'ok' if all_equal else 'falhou'}")
+
+
+if __name__ == "__main__":
+    main()
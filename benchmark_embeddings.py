@@ -0,0 +1,190 @@
+"""
+Benchmark do motor de embeddings contra um servidor local falso
+
+Sobe um servidor HTTP compatível com `/v1/embeddings` da OpenAI, com latência
+simulada e limite de requisições por segundo (respostas 429), e mede
+chunks/s do `ConcurrentEmbedder` em diferentes níveis de concorrência.
+
+Uso:
+    python benchmark_embeddings.py [--latency 0.15] [--server-rps 40]
+"""
+import argparse
+import base64
+import hashlib
+import json
+import threading
+import time
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List
+
+from openai import OpenAI
+
+from embedding_engine import ConcurrentEmbedder
+
+
+class _BenchmarkHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # O padrão (5) recusa conexões com alta concorrência
+
+
+class FakeEmbeddingsServer:
+    """Servidor local que imita o endpoint de embeddings da OpenAI"""
+
+    def __init__(self, dimension: int = 1536, latency: float = 0.15,
+                 per_input_latency: float = 0.001, server_rps: float = 0.0):
+        """
+        Args:
+            dimension: Dimensão dos vetores devolvidos
+            latency: Latência fixa por requisição (segundos)
+            per_input_latency: Latência adicional por texto do lote
+            server_rps: Requisições por segundo aceitas (0 = sem limite)
+        """
+        self.dimension = dimension
+        self.latency = latency
+        self.per_input_latency = per_input_latency
+        self.server_rps = server_rps
+        self.requests = 0
+        self.rejected = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._lock = threading.Lock()
+        self._server = _BenchmarkHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeEmbeddingsServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _admit(self) -> bool:
+        """Janela fixa de 1s para simular o limite de taxa da API"""
+        with self._lock:
+            self.requests += 1
+            if not self.server_rps:
+                return True
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            if self._window_count > self.server_rps:
+                self.rejected += 1
+                return False
+            return True
+
+    def _vector(self, text: str) -> List[float]:
+        seed = hashlib.sha256(text.encode("utf-8")).digest()
+        return [(seed[i % len(seed)] - 128) / 128 for i in range(self.dimension)]
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload: dict, headers: dict = None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if not fake._admit():
+                    self._send(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                               {"retry-after": "0.5"})
+                    return
+
+                inputs = request["input"]
+                inputs = [inputs] if isinstance(inputs, str) else inputs
+                time.sleep(fake.latency + fake.per_input_latency * len(inputs))
+
+                data = []
+                for i, text in enumerate(inputs):
+                    vector = fake._vector(text)
+                    if request.get("encoding_format") == "base64":
+                        vector = base64.b64encode(array("f", vector).tobytes()).decode("ascii")
+                    data.append({"object": "embedding", "index": i, "embedding": vector})
+                tokens = sum(len(text) // 4 + 1 for text in inputs)
+                self._send(200, {
+                    "object": "list",
+                    "data": data,
+                    "model": request["model"],
+                    "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+                })
+
+        return Handler
+
+
+def load_benchmark_texts(folder: str, total: int, size: int = 1000) -> List[str]:
+    """Fatiar os TXT da pasta em textos do tamanho de um chunk"""
+    texts = []
+    for txt_file in sorted(Path(folder).glob("*.txt")):
+        content = txt_file.read_text(encoding="utf-8")
+        texts.extend(content[i:i + size] for i in range(0, len(content), size))
+    if not texts:
+        texts = [f"texto de exemplo {i}" * 50 for i in range(total)]
+    return (texts * (total // len(texts) + 1))[:total]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de embeddings concorrentes")
+    parser.add_argument("--folder", default="output")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--server-rps", type=float, default=40.0)
+    parser.add_argument("--concurrency", default="1,2,4,8,16")
+    args = parser.parse_args()
+
+    texts = load_benchmark_texts(args.folder, args.chunks)
+    print(f"🧪 Benchmark: {len(texts)} chunks | lote {args.batch_size} | "
+          f"latência {args.latency}s | servidor {args.server_rps or '∞'} req/s")
+
+    # Linha de base: comportamento antigo (lotes de 10 em série + pausa de 0.5s)
+    server = FakeEmbeddingsServer(latency=args.latency, server_rps=args.server_rps).start()
+    client = OpenAI(api_key="fake", base_url=server.base_url, max_retries=0)
+    sample = texts[:200]
+    start = time.perf_counter()
+    for i in range(0, len(sample), 10):
+        client.embeddings.create(model="text-embedding-3-small", input=sample[i:i + 10])
+        time.sleep(0.5)
+    baseline = len(sample) / (time.perf_counter() - start)
+    server.stop()
+    print(f"  📏 Sequencial (antigo, {len(sample)} chunks): {baseline:8.1f} chunks/s")
+
+    for in_flight in [int(value) for value in args.concurrency.split(",")]:
+        server = FakeEmbeddingsServer(latency=args.latency, server_rps=args.server_rps).start()
+        client = OpenAI(api_key="fake", base_url=server.base_url, max_retries=0)
+        embedder = ConcurrentEmbedder(client, "text-embedding-3-small",
+                                      batch_size=args.batch_size, max_in_flight=in_flight,
+                                      requests_per_minute=100_000, tokens_per_minute=100_000_000,
+                                      verbose=False)
+
+        start = time.perf_counter()
+        vectors = embedder.embed(texts, on_batch=lambda *_: None)
+        elapsed = time.perf_counter() - start
+        server.stop()
+
+        ok = sum(values is not None for values in vectors)
+        print(f"  ⚡ {in_flight:3d} em paralelo: {ok / elapsed:8.1f} chunks/s "
+              f"({server.requests} req, {server.rejected} x 429)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Relatório memória × recall@k da quantização dos vetores locais
+
+Compara a busca exata em float32 com int8 e PQ (com e sem re-rank em
+float32 dos melhores candidatos), usando os mesmos vetores do
+`benchmark_ann.py` (cache → API → pseudo-embeddings). A redução é a dos
+bytes varridos por consulta; o disco guarda os códigos além dos float32
+(mantidos para o re-rank), como mostra a coluna "disco/vetor".
+
+Uso:
+    python benchmark_quantization.py [--folder output] [--replicas 20] [--k 10]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from benchmark_ann import load_chunk_vectors, measure, replicate
+from vector_store import LocalVectorStore
+
+
+def build_store(folder: str, corpus: np.ndarray, **kwargs) -> LocalVectorStore:
+    """Criar um índice local com o corpus inteiro e treinar a quantização"""
+    store = LocalVectorStore(folder, dimension=corpus.shape[1], ann_min_vectors=len(corpus) + 1, **kwargs)
+    store.setup()
+    batch_size = 2000
+    for i in range(0, len(corpus), batch_size):
+        store.upsert([{"id": str(j), "values": corpus[j]} for j in range(i, min(i + batch_size, len(corpus)))])
+    store.optimize()
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatório da quantização (memória × recall@k)")
+    parser.add_argument("--folder", default="output")
+    parser.add_argument("--replicas", type=int, default=20)
+    parser.add_argument("--noise", type=float, default=0.3)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank", type=int, default=4, help="Candidatos re-rankeados por resultado")
+    args = parser.parse_args()
+
+    base = load_chunk_vectors(args.folder)
+    corpus = replicate(base, args.replicas, args.noise)
+    rng = np.random.default_rng(1)
+    queries = replicate(base[rng.choice(len(base), size=args.queries)], 2, args.noise, seed=1)[args.queries:]
+    print(f"🧪 Corpus: {len(corpus)} vetores × {corpus.shape[1]} dims | {len(queries)} consultas | k={args.k}")
+
+    folder = tempfile.mkdtemp(prefix="neurochat-quant-")
+    try:
+        baseline = build_store(os.path.join(folder, "float32"), corpus)
+        exact, exact_qps = measure(baseline, queries, args.k, exact=True)
+        float_bytes = corpus.shape[1] * 4
+
+        print(f"\n  {'modo':>16} | {'bytes varridos':>14} | {'redução':>7} | {'disco/vetor':>11} | "
+              f"{'recall@' + str(args.k):>9} | {'QPS':>8}")
+        print(f"  {'float32':>16} | {float_bytes:14d} | {1.0:6.1f}x | {float_bytes:11d} | "
+              f"{1.0:9.3f} | {exact_qps:8.1f}")
+
+        for kind in ("int8", "pq"):
+            for rerank in (0, args.rerank):
+                store = build_store(os.path.join(folder, f"{kind}-{rerank}"), corpus,
+                                    quantization=kind, rerank_factor=rerank)
+                approx, qps = measure(store, queries, args.k)
+                recall = np.mean([len(a & e) / len(e) for a, e in zip(approx, exact)])
+                code_bytes = store.quantized.bytes_per_vector
+                label = kind if not rerank else f"{kind}+rerank×{rerank}"
+                print(f"  {label:>16} | {code_bytes:14d} | {float_bytes / code_bytes:6.1f}x | "
+                      f"{float_bytes + code_bytes:11d} | {recall:9.3f} | {qps:8.1f}")
+                store._close()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
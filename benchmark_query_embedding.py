@@ -0,0 +1,81 @@
+"""
+Benchmark dos embeddings de perguntas com sessões simultâneas
+
+Simula N sessões do chatbot fazendo perguntas ao mesmo tempo contra o
+servidor falso de embeddings e compara uma requisição por pergunta com o
+`QueryEmbedder` (micro-lotes + cache LRU): requisições à API e latência.
+
+Uso:
+    python benchmark_query_embedding.py [--sessions 1,4,16,32] [--latency 0.15]
+"""
+import argparse
+import threading
+import time
+from typing import Callable, List
+
+import numpy as np
+from openai import OpenAI
+
+from benchmark_embeddings import FakeEmbeddingsServer
+from query_embedder import QueryEmbedder
+
+
+def run_sessions(sessions: int, questions: int, embed: Callable[[str], List[float]],
+                 repeat_ratio: float, seed: int = 0) -> List[float]:
+    """Cada sessão faz `questions` perguntas em sequência; devolve as latências"""
+    latencies = []
+    lock = threading.Lock()
+
+    def session(index: int):
+        rng = np.random.default_rng(seed + index)
+        for i in range(questions):
+            # Parte das perguntas repete perguntas populares de outras sessões
+            if rng.random() < repeat_ratio:
+                question = f"pergunta popular {rng.integers(10)}"
+            else:
+                question = f"pergunta {index}-{i}"
+            start = time.perf_counter()
+            embed(question)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de embeddings de perguntas")
+    parser.add_argument("--sessions", default="1,4,16,32")
+    parser.add_argument("--questions", type=int, default=20, help="Perguntas por sessão")
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    parser.add_argument("--repeat-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"🧪 {args.questions} perguntas/sessão | latência {args.latency}s | "
+          f"janela {args.wait_ms}ms | {args.repeat_ratio:.0%} repetidas")
+    print(f"\n  {'sessões':>7} | {'modo':>10} | {'req API':>7} | {'perg/req':>8} | {'p50 ms':>7} | {'p95 ms':>7}")
+
+    for sessions in [int(value) for value in args.sessions.split(",")]:
+        for mode in ("direto", "micro-lote"):
+            server = FakeEmbeddingsServer(latency=args.latency).start()
+            client = OpenAI(api_key="fake", base_url=server.base_url, max_retries=0)
+            if mode == "direto":
+                embed = lambda text: client.embeddings.create(
+                    model="text-embedding-3-small", input=[text]).data[0].embedding
+            else:
+                embed = QueryEmbedder(client, max_wait_ms=args.wait_ms).embed
+
+            latencies = run_sessions(sessions, args.questions, embed, args.repeat_ratio)
+            server.stop()
+            p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+            print(f"  {sessions:7d} | {mode:>10} | {server.requests:7d} | "
+                  f"{len(latencies) / server.requests:8.1f} | {p50:7.1f} | {p95:7.1f}")
+
+
+if __name__ == "__main__":
+    main()
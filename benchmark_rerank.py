@@ -0,0 +1,168 @@
+"""
+Benchmark da precisão do contexto com e sem re-ranking
+
+Usa perguntas escritas à mão sobre o livro de `output/`, com palavras
+diferentes das do texto (`benchmark_rerank_perguntas.jsonl`: "pergunta" e
+"trecho", uma passagem literal que responde a ela). São relevantes os
+chunks que contêm o trecho. Perguntas recortadas dos próprios chunks não
+servem: o re-ranker lexical acharia a origem delas por construção.
+
+Mede, para o top-k atual e para o re-ranking sobre os `--candidates`
+primeiros, ambos com k fixo:
+
+- P@k: trechos relevantes entre os k primeiros, dividido por k
+- MRR: inverso da posição do primeiro trecho relevante
+- acerto: perguntas com pelo menos um trecho relevante no contexto
+- tamanho do prompt (trechos e caracteres) e latência da busca
+
+O corte relativo do re-ranker (`--min-relative-score`) muda a quantidade de
+trechos enviados, então aparece numa linha à parte, rotulada como corte, e
+com a precisão por trecho enviado (não comparável com a P@k).
+
+Sem OPENAI_API_KEY os vetores são pseudo-embeddings: os números medem só a
+parte lexical da busca.
+
+Uso:
+    python benchmark_rerank.py [--folder output] [--questions benchmark_rerank_perguntas.jsonl]
+                               [--k 5] [--min-relative-score 0.6]
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmark_ann import load_chunk_vectors, pseudo_embedding
+from lexical_index import BM25Index
+from rag_system import DocumentProcessor
+from reranker import create_reranker
+from retriever import RAGRetriever
+from vector_store import LocalVectorStore
+
+
+def normalize_spaces(text: str) -> str:
+    return " ".join(text.split())
+
+
+def load_questions(path: str, normalized_texts):
+    """Perguntas rotuladas (pergunta, trecho); as que nenhum chunk contém ficam de fora"""
+    queries, unlabelled = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            passage = normalize_spaces(item["trecho"])
+            if any(passage in text for text in normalized_texts.values()):
+                queries.append((item["pergunta"], passage))
+            else:
+                unlabelled.append(item["pergunta"])
+    return queries, unlabelled
+
+
+def evaluate(retriever: RAGRetriever, queries, normalized_texts, embed, k: int):
+    precision_at_k, per_chunk, reciprocal_ranks, hits, sizes, chars, latencies = [], [], [], [], [], [], []
+    for query, passage in queries:
+        embedding = embed(query)
+        start = time.perf_counter()
+        matches = retriever.search(query, embedding, top_k=k)
+        latencies.append(time.perf_counter() - start)
+        relevant = [passage in normalized_texts[match["id"]] for match in matches]
+        precision_at_k.append(sum(relevant) / k)
+        per_chunk.append(np.mean(relevant) if relevant else 0.0)
+        reciprocal_ranks.append(1 / (relevant.index(True) + 1) if any(relevant) else 0.0)
+        hits.append(any(relevant))
+        sizes.append(len(matches))
+        chars.append(sum(len(match["metadata"].get("text", "")) for match in matches))
+    return {
+        "precision_at_k": float(np.mean(precision_at_k)),
+        "precision_per_chunk": float(np.mean(per_chunk)),
+        "mrr": float(np.mean(reciprocal_ranks)),
+        "hit_rate": float(np.mean(hits)),
+        "chunks": float(np.mean(sizes)),
+        "chars": float(np.mean(chars)),
+        "latency_ms": float(np.median(latencies) * 1000),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de precisão do contexto (re-ranking)")
+    parser.add_argument("--folder", default="output")
+    parser.add_argument("--questions", default="benchmark_rerank_perguntas.jsonl",
+                        help="JSONL com perguntas e o trecho literal que as responde")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--time-budget-ms", type=float, default=200)
+    parser.add_argument("--reranker", default="lexical", help="lexical ou cross-encoder")
+    parser.add_argument("--min-relative-score", type=float, default=0.0,
+                        help="Mede também o corte relativo do re-ranker (0 = não medir)")
+    args = parser.parse_args()
+
+    processor = DocumentProcessor(os.getenv("OPENAI_API_KEY") or "sem-chave", vector_backend="local")
+    chunks = processor.create_chunks(processor.load_documents(args.folder))
+    vectors = load_chunk_vectors(args.folder)
+    ids = [chunk.metadata["chunk_id"] for chunk in chunks]
+    texts = [chunk.page_content for chunk in chunks]
+    normalized_texts = {chunk_id: normalize_spaces(text) for chunk_id, text in zip(ids, texts)}
+
+    # Sem chave da API os vetores são pseudo-embeddings: a comparação mede a parte lexical
+    if os.getenv("OPENAI_API_KEY"):
+        embed = lambda text: processor.openai_client.embeddings.create(
+            model=processor.embedding_model, input=[text]).data[0].embedding
+    else:
+        embed = lambda text: pseudo_embedding(text, vectors.shape[1])
+
+    folder = tempfile.mkdtemp(prefix="neurochat-rerank-")
+    try:
+        store = LocalVectorStore(os.path.join(folder, "vectors"), dimension=vectors.shape[1])
+        store.setup()
+        store.upsert([{"id": chunk_id, "values": vector, "metadata": {"text": text[:1000]}}
+                      for chunk_id, vector, text in zip(ids, vectors, texts)])
+        lexical = BM25Index(os.path.join(folder, "lexical.npz"))
+        lexical.set_file("corpus", "-", ids, texts)
+        lexical.commit()
+
+        queries, unlabelled = load_questions(args.questions, normalized_texts)
+        if unlabelled:
+            print(f"⚠️ {len(unlabelled)} perguntas sem chunk com o trecho rotulado (ignoradas)")
+        if not queries:
+            print(f"❌ Nenhuma pergunta rotulada encontrada nos chunks de {args.folder}")
+            return
+        print(f"🧪 {len(chunks)} chunks | {len(queries)} perguntas | k={args.k} | "
+              f"{args.candidates} candidatos | orçamento {args.time_budget_ms:.0f}ms")
+
+        def reranked(min_relative: float) -> RAGRetriever:
+            reranker = create_reranker(args.reranker, lexical_index=lexical,
+                                       time_budget=args.time_budget_ms / 1000,
+                                       min_relative_score=min_relative)
+            return RAGRetriever(None, store, lexical_index=lexical, reranker=reranker,
+                                rerank_candidates=args.candidates)
+
+        # Mesmo k nas duas linhas: a diferença vem só da ordem dos trechos
+        modes = {
+            f"top-{args.k} atual": RAGRetriever(None, store, lexical_index=lexical),
+            f"re-rank {args.reranker}": reranked(0.0),
+        }
+        print(f"\n  {'modo':>24} | {'P@' + str(args.k):>6} | {'MRR':>6} | {'acerto':>6} | {'chars':>6} | {'ms':>6}")
+        for label, retriever in modes.items():
+            result = evaluate(retriever, queries, normalized_texts, embed, args.k)
+            print(f"  {label:>24} | {result['precision_at_k']:6.3f} | {result['mrr']:6.3f} | "
+                  f"{result['hit_rate']:6.3f} | {result['chars']:6.0f} | {result['latency_ms']:6.1f}")
+
+        if args.min_relative_score:
+            # O corte envia menos trechos: a precisão por trecho enviado não se compara com a P@k
+            result = evaluate(reranked(args.min_relative_score), queries, normalized_texts, embed, args.k)
+            print(f"\n  ✂️ Corte relativo ≥{args.min_relative_score:.0%} do melhor score (após o re-rank):")
+            print(f"     P@{args.k} {result['precision_at_k']:.3f} | precisão por trecho enviado "
+                  f"{result['precision_per_chunk']:.3f} | acerto {result['hit_rate']:.3f} | "
+                  f"{result['chunks']:.1f} trechos | {result['chars']:.0f} chars")
+        store._close()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
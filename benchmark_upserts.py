@@ -0,0 +1,192 @@
+"""
+Benchmark dos upserts contra um servidor local que imita um índice do Pinecone
+
+Sobe um servidor HTTP com `/vectors/upsert` e `/describe_index_stats`, com
+latência por requisição e por KB, limite de 2 MB por requisição (respostas
+400) e indexação assíncrona (os vetores só aparecem nas estatísticas depois
+de `--visibility-delay`). Mede vetores/s, do primeiro upsert até o índice
+refletir o total esperado:
+
+- comportamento antigo: lotes de 100 em série, pausa de 1s entre eles e 5s
+  antes das estatísticas
+- ConcurrentUpserter com lotes pelo tamanho do payload, em diferentes
+  níveis de concorrência, esperando o total com consultas às estatísticas
+
+Uso:
+    python benchmark_upserts.py [--vectors 2000] [--latency 0.08] [--concurrency 1,2,4,8,16]
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from pinecone import Pinecone
+
+from benchmark_embeddings import load_benchmark_texts
+from embedding_batch import EmbeddingBatch
+from retry_utils import retry_with_split
+from upsert_engine import ConcurrentUpserter
+from vector_store import PineconeVectorStore
+
+
+class _BenchmarkHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class FakeIndexServer:
+    """Servidor local que imita o plano de dados de um índice do Pinecone"""
+
+    MAX_REQUEST_BYTES = 2 * 1024 * 1024
+
+    def __init__(self, dimension: int = 1536, latency: float = 0.08, latency_per_kb: float = 0.0001,
+                 visibility_delay: float = 1.0):
+        """
+        Args:
+            dimension: Dimensão do índice
+            latency: Latência fixa por requisição (segundos)
+            latency_per_kb: Latência adicional por KB do payload
+            visibility_delay: Segundos até um vetor aparecer nas estatísticas
+        """
+        self.dimension = dimension
+        self.latency = latency
+        self.latency_per_kb = latency_per_kb
+        self.visibility_delay = visibility_delay
+        self.requests = 0
+        self.rejected = 0
+        self.max_request_bytes = 0
+        self._visible_at = {}  # ID → instante em que passa a contar nas estatísticas
+        self._lock = threading.Lock()
+        self._server = _BenchmarkHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def host(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeIndexServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _visible_count(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for visible_at in self._visible_at.values() if visible_at <= now)
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload: dict):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                size = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(size)
+                if self.path.endswith("/describe_index_stats"):
+                    count = fake._visible_count()
+                    self._send(200, {"namespaces": {"": {"vectorCount": count}}, "dimension": fake.dimension,
+                                     "indexFullness": 0.0, "totalVectorCount": count})
+                    return
+
+                with fake._lock:
+                    fake.requests += 1
+                    fake.max_request_bytes = max(fake.max_request_bytes, size)
+                if size > fake.MAX_REQUEST_BYTES:
+                    with fake._lock:
+                        fake.rejected += 1
+                    self._send(400, {"code": 3, "message": f"Request size {size} exceeds the maximum"})
+                    return
+
+                vectors = json.loads(body)["vectors"]
+                time.sleep(fake.latency + fake.latency_per_kb * size / 1024)
+                visible_at = time.monotonic() + fake.visibility_delay
+                with fake._lock:
+                    for vector in vectors:
+                        fake._visible_at.setdefault(vector["id"], visible_at)
+                self._send(200, {"upsertedCount": len(vectors)})
+
+            do_GET = do_POST
+
+        return Handler
+
+
+def make_batch(texts, dimension: int = 1536, seed: int = 0) -> EmbeddingBatch:
+    """Lote de embeddings sintéticos com os textos e metadados de uma ingestão real"""
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((len(texts), dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    metadatas = [{"source": "output/benchmark.txt", "filename": "benchmark.txt", "chunk_index": i,
+                  "total_chunks": len(texts)} for i in range(len(texts))]
+    return EmbeddingBatch.from_rows([f"benchmark.txt_{i}" for i in range(len(texts))], vectors,
+                                    texts, metadatas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de upserts paralelos")
+    parser.add_argument("--folder", default="output")
+    parser.add_argument("--vectors", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.08)
+    parser.add_argument("--visibility-delay", type=float, default=1.0)
+    parser.add_argument("--batch-mb", type=float, default=2.0)
+    parser.add_argument("--concurrency", default="1,2,4,8,16")
+    parser.add_argument("--skip-baseline", action="store_true")
+    args = parser.parse_args()
+
+    batch = make_batch(load_benchmark_texts(args.folder, args.vectors))
+    print(f"🧪 Benchmark: {len(batch)} vetores | latência {args.latency}s | "
+          f"indexação assíncrona {args.visibility_delay}s")
+    pc = Pinecone(api_key="fake")
+
+    # Linha de base: comportamento antigo (lotes de 100 em série + pausas fixas)
+    if not args.skip_baseline:
+        server = FakeIndexServer(latency=args.latency, visibility_delay=args.visibility_delay).start()
+        store = PineconeVectorStore(pc, "benchmark", host=server.host, pool_threads=1)
+        sample = batch[:min(len(batch), 300)]
+        start = time.perf_counter()
+        for i in range(0, len(sample), 100):
+            retry_with_split(sample[i:i + 100], store.upsert)  # Como antes: divide o lote se falhar
+            time.sleep(1)
+        time.sleep(5)
+        count = store.stats()["total_vector_count"]
+        baseline = len(sample) / (time.perf_counter() - start)
+        server.stop()
+        print(f"  📏 Sequencial (antigo, {len(sample)} vetores): {baseline:8.1f} vetores/s "
+              f"({count} visíveis ao fim | {server.requests} req, {server.rejected} x 400)")
+
+    for in_flight in [int(value) for value in args.concurrency.split(",")]:
+        server = FakeIndexServer(latency=args.latency, visibility_delay=args.visibility_delay).start()
+        store = PineconeVectorStore(pc, "benchmark", host=server.host, pool_threads=in_flight)
+        upserter = ConcurrentUpserter(max_in_flight=in_flight, max_batch_bytes=int(args.batch_mb * 1_000_000),
+                                      verbose=False)
+
+        start = time.perf_counter()
+        sent_ids = upserter.upsert(store, batch)
+        upserted = time.perf_counter() - start
+        stats = store.wait_for_count(len(sent_ids))
+        elapsed = time.perf_counter() - start
+        server.stop()
+
+        print(f"  ⚡ {in_flight:3d} em paralelo: {len(sent_ids) / elapsed:8.1f} vetores/s "
+              f"(upsert {upserted:.2f}s + espera {elapsed - upserted:.2f}s | {server.requests} req, "
+              f"maior {server.max_request_bytes / 1024:.0f} KB, {server.rejected} x 400, "
+              f"{stats['total_vector_count']} visíveis)")
+
+
+if __name__ == "__main__":
+    main()
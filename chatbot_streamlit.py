@@ -1,6 +1,8 @@
 import streamlit as st
 import os
-from typing import List, Dict
+import re
+from pathlib import Path
+from typing import Callable, Iterator, List, Dict, Optional
 import time
 import random
 
@@ -27,6 +29,8 @@ class DemoGeminiRAGChatbot:
     def __init__(self):
         """Inicializar chatbot em modo demo"""
         self.demo_mode = True
+        self.model_name = "Gemini 2.5 Flash-Lite (Demo)"
+        self.answer_cache = None
         self.total_vectors = random.randint(15000, 25000)
         self.dimensions = 768
         
@@ -36,9 +40,6 @@ class DemoGeminiRAGChatbot:
     def ask_question(self, question: str) -> str:
         """Simular resposta para demo"""
         try:
-            # Simular processamento
-            time.sleep(random.uniform(1.2, 2.5))
-            
             # Escolher resposta aleatória baseada na pergunta
             if any(word in question.lower() for word in ['autor', 'quem', 'criador']):
                 return "📝 **Em um sistema real**, eu analisaria os metadados dos documentos para identificar autores, datas de criação e outras informações relevantes. Esta é uma demonstração da interface - configure suas chaves API para funcionalidade completa!"
@@ -54,12 +55,184 @@ class DemoGeminiRAGChatbot:
                 
         except Exception as e:
             return "🎭 **Modo Demonstração Ativo** - Esta é uma vitrine visual do NeuroChat AI. Configure as chaves API reais para funcionalidade completa!"
+    
+    def ask_question_stream(self, question: str,
+                            on_sources: Optional[Callable[[List[Dict]], None]] = None,
+                            filenames: Optional[List[str]] = None) -> Iterator[str]:
+        """Simular streaming da resposta demo, palavra a palavra"""
+        if on_sources is not None:
+            on_sources([])
+        yield from re.findall(r"\S+\s*", self.ask_question(question))
+
+
+class RAGChatbot:
+    """Chatbot RAG real: busca nos documentos indexados e gera a resposta"""
+    
+    def __init__(self, retriever):
+        """
+        Inicializar chatbot sobre o retriever compartilhado do processo
+        
+        Args:
+            retriever: RAGRetriever criado por `load_retriever()`
+        """
+        self.demo_mode = False
+        self.retriever = retriever
+        self.model_name = retriever.chat_model
+        self.answer_cache = retriever.answer_cache
+        
+        stats = retriever.store.stats()
+        self.total_vectors = stats["total_vector_count"]
+        self.dimensions = stats["dimension"]
+        
+        st.success(f"✅ Conectado: {self.total_vectors:,} chunks indexados")
+    
+    def ask_question(self, question: str, filenames: Optional[List[str]] = None) -> str:
+        """Responder com base nos documentos indexados (todos, ou só `filenames`)"""
+        try:
+            return self.retriever.answer(question, filenames=filenames)["answer"]
+        except Exception as e:
+            return f"❌ **Erro ao processar a pergunta:** {e}"
+    
+    def ask_question_stream(self, question: str,
+                            on_sources: Optional[Callable[[List[Dict]], None]] = None,
+                            filenames: Optional[List[str]] = None) -> Iterator[str]:
+        """
+        Responder em streaming, token a token
+        
+        Args:
+            question: Pergunta do usuário
+            on_sources: Chamado com os trechos recuperados antes da geração começar
+            filenames: Buscar só nestes documentos (None = todos)
+        """
+        try:
+            yield from self.retriever.answer_stream(question, on_sources=on_sources, filenames=filenames)
+        except Exception as e:
+            yield f"❌ **Erro ao processar a pergunta:** {e}"
+
+
+@st.cache_resource(show_spinner=False)
+def load_retriever():
+    """
+    Criar clientes e índice uma única vez por processo
+    
+    O resultado é compartilhado por todas as sessões do Streamlit, que
+    reaproveitam as mesmas conexões (já aquecidas) com a OpenAI e o banco
+    vetorial. Sem as chaves necessárias, devolve None (modo demonstração).
+    """
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    pinecone_api_key = os.getenv("PINECONE_API_KEY")
+    vector_backend = os.getenv("VECTOR_BACKEND", "pinecone")
+    cache_dir = os.getenv("RAG_CACHE_DIR", ".neurochat")
+    index_name = os.getenv("PINECONE_INDEX_NAME") or os.getenv("INDEX_NAME", "documentos-rag")
+    
+    if not openai_api_key or (vector_backend == "pinecone" and not pinecone_api_key):
+        return None
+    
+    from openai import OpenAI
+    from answer_cache import AnswerCache
+    from chunk_store import ChunkStore
+    from dedup import NearDuplicateIndex
+    from lexical_index import BM25Index
+    from query_embedder import QueryEmbedder
+    from reranker import create_reranker
+    from retriever import RAGRetriever
+    from vector_store import create_vector_store
+    
+    pc = None
+    if vector_backend == "pinecone":
+        from pinecone import Pinecone
+        pc = Pinecone(api_key=pinecone_api_key)
+    
+    store = create_vector_store(
+        vector_backend, index_name, pc=pc,
+        local_store_dir=os.getenv("LOCAL_VECTOR_DIR", str(Path(cache_dir) / "vectors")),
+        quantization=os.getenv("VECTOR_QUANTIZATION") or None,
+        pinecone_host=os.getenv("PINECONE_HOST") or None
+    )
+    if not store.exists():
+        return None
+    
+    # Cache de respostas compartilhado pelas sessões (invalidado pelo manifesto)
+    answer_cache = None
+    if os.getenv("ANSWER_CACHE_ENABLED", "1") != "0":
+        answer_cache = AnswerCache(
+            max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000")),
+            ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL", "86400")),
+            similarity_threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+            manifest_path=str(Path(cache_dir) / f"manifest_{index_name}.json")
+        )
+    
+    # Embeddings de perguntas: cache LRU + micro-lotes entre sessões
+    openai_client = OpenAI(api_key=openai_api_key)
+    query_embedder = QueryEmbedder(
+        openai_client,
+        max_entries=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "10000")),
+        max_wait_ms=float(os.getenv("QUERY_BATCH_WAIT_MS", "5"))
+    )
+    
+    # Índice lexical (BM25) gerado na ingestão: busca híbrida e fallback sem API
+    lexical_path = Path(cache_dir) / f"lexical_{index_name}.npz"
+    lexical_index = None
+    if os.getenv("HYBRID_SEARCH", "1") != "0" and lexical_path.exists():
+        lexical_index = BM25Index(str(lexical_path))
+    
+    # Quase duplicados removidos na ingestão: cada trecho cita também as suas cópias
+    dedup_path = Path(cache_dir) / f"dedup_{index_name}.npz"
+    duplicate_index = NearDuplicateIndex(str(dedup_path)) if dedup_path.exists() else None
+    
+    # Textos completos dos chunks (os vetores levam só ID e campos filtráveis)
+    chunks_path = Path(cache_dir) / f"chunks_{index_name}.sqlite"
+    chunk_store = ChunkStore(str(chunks_path)) if chunks_path.exists() else None
+    
+    # Re-ranking local dos candidatos (opcional): menos trechos, mais relevantes
+    reranker = None
+    if os.getenv("RERANKER"):
+        reranker = create_reranker(
+            os.getenv("RERANKER"), lexical_index=lexical_index,
+            time_budget=float(os.getenv("RERANK_TIME_BUDGET_MS", "200")) / 1000,
+            min_relative_score=float(os.getenv("RERANK_MIN_RELATIVE_SCORE", "0"))
+        )
+    
+    return RAGRetriever(
+        openai_client, store,
+        chat_model=os.getenv("CHAT_MODEL", "gpt-4o-mini"),
+        top_k=int(os.getenv("RAG_TOP_K", "5")),
+        answer_cache=answer_cache,
+        query_embedder=query_embedder,
+        lexical_index=lexical_index,
+        embedding_timeout=float(os.getenv("QUERY_EMBEDDING_TIMEOUT", "0")) or None,
+        reranker=reranker,
+        rerank_candidates=int(os.getenv("RERANK_CANDIDATES", "50")),
+        duplicate_index=duplicate_index,
+        chunk_store=chunk_store
+    )
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def list_indexed_documents() -> List[str]:
+    """Documentos indexados, lidos do manifesto da ingestão (para escopar as perguntas)"""
+    from index_manifest import IndexManifest
+    
+    cache_dir = os.getenv("RAG_CACHE_DIR", ".neurochat")
+    index_name = os.getenv("PINECONE_INDEX_NAME") or os.getenv("INDEX_NAME", "documentos-rag")
+    manifest_path = Path(cache_dir) / f"manifest_{index_name}.json"
+    if not manifest_path.exists():
+        return []
+    return sorted(IndexManifest(str(manifest_path)).files)
+
+
+def create_chatbot():
+    """Chatbot real se houver índice configurado; senão, o modo demonstração"""
+    retriever = load_retriever()
+    if retriever is None:
+        return DemoGeminiRAGChatbot()
+    return RAGChatbot(retriever)
 
 # =================== DESIGN FUTURÍSTICO ÉPICO ===================
 
 # Configurar página com tema escuro
 st.set_page_config(
-    page_title="NeuroChat AI - Demo",
+    page_title="NeuroChat AI",
     page_icon="🧠",
     layout="wide",
     initial_sidebar_state="collapsed"
@@ -304,17 +477,57 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def render_response_card(placeholder, answer: str, footer: str):
+    """Desenhar (ou redesenhar) o card da resposta"""
+    placeholder.markdown(f"""
+    <div class="response-card">
+        <div class="tech-text" style="color: #00ff7f; font-size: 1.4rem; line-height: 1.6;">
+            {answer}
+        </div>
+        <div style="text-align: right; margin-top: 15px; color: #78dbff; font-size: 0.9rem;">
+            {footer}
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+
+def render_sources(placeholder, sources: List[Dict]):
+    """Mostrar os trechos recuperados assim que a busca termina"""
+    if not sources:
+        return
+    from retriever import format_citation
+    items = "".join(
+        f"<li>📄 {format_citation({'filename': source['id'], **source['metadata']})} "
+        f"<span style='opacity: 0.7;'>(score {source['score']:.3f})</span></li>"
+        for source in sources
+    )
+    placeholder.markdown(f"""
+    <div class="metric-container" style="margin-bottom: 15px;">
+        <div class="tech-text" style="color: #78dbff;">🔗 FONTES RECUPERADAS</div>
+        <ul style="color: #78dbff; margin: 10px 0 0 0;">{items}</ul>
+    </div>
+    """, unsafe_allow_html=True)
+
+
+# Inicializar chatbot (real ou demo)
+if 'chatbot' not in st.session_state:
+    with st.spinner("🔄 Inicializando sistema neural..."):
+        st.session_state.chatbot = create_chatbot()
+
+demo_mode = st.session_state.chatbot.demo_mode
+
 # BANNER DE DEMO
-st.markdown("""
-<div class="demo-banner">
-    <h3 style="color: #ffc107; margin: 0; font-family: 'Orbitron', monospace;">
-        🎭 MODO DEMONSTRAÇÃO ATIVO
-    </h3>
-    <p style="color: #ffca28; margin: 5px 0 0 0; font-family: 'Rajdhani', sans-serif;">
-        Esta é uma vitrine visual - Configure suas chaves API para funcionalidade completa
-    </p>
-</div>
-""", unsafe_allow_html=True)
+if demo_mode:
+    st.markdown("""
+    <div class="demo-banner">
+        <h3 style="color: #ffc107; margin: 0; font-family: 'Orbitron', monospace;">
+            🎭 MODO DEMONSTRAÇÃO ATIVO
+        </h3>
+        <p style="color: #ffca28; margin: 5px 0 0 0; font-family: 'Rajdhani', sans-serif;">
+            Esta é uma vitrine visual - Configure suas chaves API para funcionalidade completa
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
 
 # HEADER ÉPICO COM ANIMAÇÕES
 st.markdown("""
@@ -331,11 +544,6 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Inicializar chatbot em modo demo
-if 'chatbot' not in st.session_state:
-    with st.spinner("🔄 Inicializando sistema neural..."):
-        st.session_state.chatbot = DemoGeminiRAGChatbot()
-
 # LAYOUT PRINCIPAL EM COLUNAS
 col1, col2, col3 = st.columns([1, 3, 1])
 
@@ -358,9 +566,19 @@ with col2:
             placeholder="Ex: Quais são os recursos disponíveis no sistema?",
             value="Como funciona este sistema de IA?",
             height=120,
-            help="💡 Digite sua pergunta e veja uma demonstração da interface"
+            help="💡 Digite sua pergunta sobre os documentos indexados"
         )
         
+        # ESCOPO DA BUSCA: só os documentos escolhidos (vazio = todos)
+        documents = [] if demo_mode else list_indexed_documents()
+        selected_documents = []
+        if documents:
+            selected_documents = st.multiselect(
+                "📚 Buscar apenas nos documentos:",
+                documents,
+                help="💡 Deixe vazio para buscar em todos os documentos indexados"
+            )
+        
         # BOTÃO DE ENVIO ÉPICO
         col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
         with col_btn2:
@@ -369,58 +587,46 @@ with col2:
     # PROCESSAMENTO COM EFEITOS VISUAIS
     if submitted and user_question.strip():
         
-        # LOADING FUTURÍSTICO
-        with st.container():
-            st.markdown("""
-            <div style="text-align: center; margin: 30px 0;">
-                <div class="tech-text">🧠 SISTEMA NEURAL PROCESSANDO...</div>
-                <div style="margin: 20px 0;">
-                    <span class="pulse-dot"></span>
-                    <span class="pulse-dot"></span>
-                    <span class="pulse-dot"></span>
-                </div>
+        # LOADING FUTURÍSTICO (some no primeiro token)
+        loading_placeholder = st.empty()
+        loading_placeholder.markdown("""
+        <div style="text-align: center; margin: 30px 0;">
+            <div class="tech-text">🧠 SISTEMA NEURAL PROCESSANDO...</div>
+            <div style="margin: 20px 0;">
+                <span class="pulse-dot"></span>
+                <span class="pulse-dot"></span>
+                <span class="pulse-dot"></span>
             </div>
-            """, unsafe_allow_html=True)
-            
-            # Barra de progresso futurística
-            progress_bar = st.progress(0)
-            status_placeholder = st.empty()
-            
-            # Simular progresso com status tech
-            statuses = [
-                "🔍 Escaneando base de dados neural...",
-                "🧮 Calculando embeddings quânticos...",
-                "🔗 Conectando ao índice vetorial...",
-                "🤖 IA processando contexto...",
-                "✨ Sintetizando resposta..."
-            ]
-            
-            for i, status in enumerate(statuses):
-                status_placeholder.markdown(f"<div class='tech-text' style='text-align: center;'>{status}</div>", unsafe_allow_html=True)
-                progress_bar.progress((i + 1) * 20)
-                time.sleep(0.8)
-            
-            # EXECUTAR PERGUNTA
-            start_time = time.time()
-            answer = st.session_state.chatbot.ask_question(user_question)
-            processing_time = time.time() - start_time
-            
-            progress_bar.progress(100)
-            status_placeholder.empty()
+        </div>
+        """, unsafe_allow_html=True)
         
         # RESPOSTA COM DESIGN ÉPICO
         st.markdown("### 🎯 **RESPOSTA DO SISTEMA:**")
+        sources_placeholder = st.empty()
+        answer_placeholder = st.empty()
         
-        st.markdown(f"""
-        <div class="response-card">
-            <div class="tech-text" style="color: #00ff7f; font-size: 1.4rem; line-height: 1.6;">
-                {answer}
-            </div>
-            <div style="text-align: right; margin-top: 15px; color: #78dbff; font-size: 0.9rem;">
-                ⚡ Processado em {processing_time:.2f}s (Demo Mode)
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        # EXECUTAR PERGUNTA EM STREAMING (o tempo medido é só o trabalho real)
+        start_time = time.time()
+        first_token_time = None
+        answer = ""
+        for token in st.session_state.chatbot.ask_question_stream(
+            user_question, on_sources=lambda sources: render_sources(sources_placeholder, sources),
+            filenames=selected_documents or None
+        ):
+            if first_token_time is None:
+                first_token_time = time.time() - start_time
+                loading_placeholder.empty()
+            answer += token
+            render_response_card(answer_placeholder, answer + " ▌", "✍️ Gerando resposta...")
+        processing_time = time.time() - start_time
+        first_token_time = first_token_time if first_token_time is not None else processing_time
+        loading_placeholder.empty()
+        
+        render_response_card(
+            answer_placeholder, answer,
+            f"⚡ Primeiro token em {first_token_time:.2f}s • Processado em {processing_time:.2f}s"
+            f"{' (Demo Mode)' if demo_mode else ''}"
+        )
         
         # Salvar no histórico
         if 'history' not in st.session_state:
@@ -429,7 +635,8 @@ with col2:
         st.session_state.history.append({
             "q": user_question,
             "a": answer,
-            "t": processing_time
+            "t": processing_time,
+            "ttft": first_token_time
         })
 
 # SIDEBAR COM ESTATÍSTICAS FUTURÍSTICAS
@@ -444,16 +651,16 @@ with st.sidebar:
     
     # Informação do modelo
     st.markdown("### 🧠 **MODELO DE IA**")
-    st.markdown("**Gemini 2.5 Flash-Lite (Demo)**")
+    st.markdown(f"**{st.session_state.chatbot.model_name}**")
     
-    # Estatísticas simuladas
+    # Estatísticas do índice
     st.markdown(f"""
     <div class="metric-container">
         <h3 style="color: #00ffff; margin-bottom: 15px;">🧠 DADOS NEURAIS</h3>
         <div style="color: #78dbff; font-size: 1.5rem; font-weight: bold;">
             {st.session_state.chatbot.total_vectors:,}
         </div>
-        <div style="color: #78dbff; font-size: 0.9rem;">Vetores Simulados</div>
+        <div style="color: #78dbff; font-size: 0.9rem;">{"Vetores Simulados" if demo_mode else "Vetores Indexados"}</div>
     </div>
     """, unsafe_allow_html=True)
     
@@ -467,12 +674,30 @@ with st.sidebar:
     </div>
     """, unsafe_allow_html=True)
     
-    # Status Demo
-    st.markdown("""
+    # Cache de respostas (compartilhado entre as sessões)
+    answer_cache = st.session_state.chatbot.answer_cache
+    if answer_cache is not None:
+        st.markdown(f"""
+        <div class="metric-container" style="margin-top: 15px;">
+            <h3 style="color: #00ff7f; margin-bottom: 15px;">♻️ CACHE DE RESPOSTAS</h3>
+            <div style="color: #00ff7f; font-size: 1.5rem; font-weight: bold;">
+                {answer_cache.hit_rate():.0%}
+            </div>
+            <div style="color: #00ff7f; font-size: 0.9rem;">
+                Taxa de acerto ({answer_cache.exact_hits} exatos • {answer_cache.semantic_hits} semânticos)
+            </div>
+            <div style="color: #00ff7f; font-size: 0.9rem; margin-top: 8px;">
+                ⚡ {answer_cache.saved_seconds:.1f}s economizados
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    # Status
+    st.markdown(f"""
     <div class="demo-banner" style="margin-top: 20px;">
         <h4 style="color: #ffc107; margin: 0;">🎭 STATUS</h4>
         <p style="color: #ffca28; margin: 5px 0 0 0; font-size: 0.9rem;">
-            Modo Demonstração
+            {"Modo Demonstração" if demo_mode else "Conectado ao índice"}
         </p>
     </div>
     """, unsafe_allow_html=True)
@@ -498,22 +723,25 @@ if 'history' in st.session_state and st.session_state.history:
         with st.expander(f"🔍 Consulta {len(st.session_state.history) - i}: {item['q'][:40]}..."):
             st.markdown(f"**🎯 Pergunta:** {item['q']}")
             st.markdown(f"**🤖 Resposta:** {item['a']}")
-            st.markdown(f"**⚡ Tempo:** {item['t']:.2f}s")
+            st.markdown(f"**⚡ Tempo:** {item['t']:.2f}s (primeiro token em {item.get('ttft', item['t']):.2f}s)")
 
 # RODAPÉ TECH
 st.markdown("---")
-st.markdown("""
+demo_notice = """
+    <div style="margin-top: 15px; font-size: 0.9rem; color: #ffc107;">
+        🎭 Esta é uma demonstração visual - Configure chaves API para funcionalidade completa
+    </div>
+""" if demo_mode else ""
+st.markdown(f"""
 <div style="text-align: center; margin-top: 40px; color: #78dbff; opacity: 0.7;">
     <div class="tech-text">
-        🚀 Powered by Honacleon Junior • Google Gemini 2.5 Flash-Lite • Pinecone Vector DB • Streamlit
+        🚀 Powered by Honacleon Junior • {st.session_state.chatbot.model_name} • Streamlit
     </div>
     <div style="margin-top: 10px;">
         <span class="pulse-dot"></span>
         <span class="pulse-dot"></span>
         <span class="pulse-dot"></span>
     </div>
-    <div style="margin-top: 15px; font-size: 0.9rem; color: #ffc107;">
-        🎭 Esta é uma demonstração visual - Configure chaves API para funcionalidade completa
-    </div>
+    {demo_notice}
 </div>
 """, unsafe_allow_html=True)
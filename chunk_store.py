@@ -0,0 +1,142 @@
+import json
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from embedding_batch import EmbeddingBatch
+
+# Campos que continuam no vetor: pequenos e usados em filtros e citações
+FILTERABLE_FIELDS = ("filename", "chunk_index", "page_start", "page_end")
+
+
+class ChunkStore:
+    """
+    Texto e metadados completos dos chunks, fora do banco vetorial
+
+    Um SQLite local com um registro comprimido (zlib) por chunk. O banco
+    vetorial guarda só o ID e os campos de `FILTERABLE_FIELDS`, o que
+    encolhe os payloads de upsert e as respostas das consultas; depois da
+    busca, os textos dos resultados são lidos daqui numa única consulta.
+    O texto é guardado inteiro (sem o corte em 1000 caracteres).
+
+    Os campos de `FILTERABLE_FIELDS` ficam em colunas próprias, fora do
+    registro comprimido, com índice por `filename` para apagar um arquivo
+    inteiro sem conhecer os IDs dos seus chunks.
+    """
+
+    # Limite seguro de parâmetros por consulta no SQLite
+    _LOOKUP_BATCH = 500
+
+    def __init__(self, path: str, compression_level: int = 6):
+        """
+        Args:
+            path: Caminho do arquivo SQLite
+            compression_level: Nível de compressão do zlib (1 a 9)
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.compression_level = compression_level
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, data BLOB NOT NULL)")
+        self._add_field_columns()
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_filename ON chunks (filename)")
+        self._conn.commit()
+
+    def _add_field_columns(self):
+        """Criar as colunas de `FILTERABLE_FIELDS` em bancos antigos, preenchidas a partir dos registros"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(chunks)")}
+        missing = [field for field in FILTERABLE_FIELDS if field not in columns]
+        if not missing:
+            return
+        for field in missing:
+            self._conn.execute(f"ALTER TABLE chunks ADD COLUMN {field}")
+        # Registros antigos ainda têm os campos dentro do JSON comprimido
+        rows = self._conn.execute("SELECT id, data FROM chunks").fetchall()
+        self._conn.executemany(
+            f"UPDATE chunks SET {', '.join(f'{field} = ?' for field in missing)} WHERE id = ?",
+            [(*(json.loads(zlib.decompress(data))["metadata"].get(field) for field in missing), chunk_id)
+             for chunk_id, data in rows])
+
+    def _encode(self, text: str, metadata: Dict) -> Tuple:
+        """Colunas de `FILTERABLE_FIELDS` e registro comprimido com o resto dos metadados"""
+        rest = {key: value for key, value in metadata.items() if key not in FILTERABLE_FIELDS}
+        payload = json.dumps({"text": text, "metadata": rest}, ensure_ascii=False)
+        data = zlib.compress(payload.encode("utf-8"), self.compression_level)
+        return (*(metadata.get(field) for field in FILTERABLE_FIELDS), data)
+
+    @staticmethod
+    def _decode(row: Tuple) -> Dict:
+        *fields, data = row
+        payload = json.loads(zlib.decompress(data))
+        columns = {field: value for field, value in zip(FILTERABLE_FIELDS, fields) if value is not None}
+        return {**payload["metadata"], **columns, "text": payload["text"]}
+
+    def put_many(self, entries: Iterable[Tuple[str, str, Dict]]):
+        """
+        Gravar chunks (substituindo os que já existem)
+
+        Args:
+            entries: Trincas (ID, texto, metadados sem o texto)
+        """
+        rows = [(chunk_id, *self._encode(text, metadata)) for chunk_id, text, metadata in entries]
+        if not rows:
+            return
+        columns = ", ".join(("id",) + FILTERABLE_FIELDS + ("data",))
+        placeholders = ", ".join("?" * (len(FILTERABLE_FIELDS) + 2))
+        with self._lock:
+            self._conn.executemany(f"INSERT OR REPLACE INTO chunks ({columns}) VALUES ({placeholders})", rows)
+            self._conn.commit()
+
+    def put_batch(self, batch: EmbeddingBatch):
+        """Gravar os textos e metadados de um lote de embeddings"""
+        self.put_many((batch.ids[i], batch.text(i), batch.metadata(i, include_text=False))
+                      for i in range(len(batch)))
+
+    def get_many(self, ids: List[str]) -> Dict[str, Dict]:
+        """
+        Buscar vários chunks de uma vez
+
+        Returns:
+            Mapa ID → metadados com "text" (IDs ausentes ficam de fora)
+        """
+        rows = []
+        with self._lock:
+            for i in range(0, len(ids), self._LOOKUP_BATCH):
+                batch = ids[i:i + self._LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows.extend(self._conn.execute(
+                    f"SELECT id, {', '.join(FILTERABLE_FIELDS)}, data FROM chunks WHERE id IN ({placeholders})",
+                    batch
+                ).fetchall())
+        return {row[0]: self._decode(row[1:]) for row in rows}
+
+    def delete(self, ids: List[str]):
+        """Remover chunks pelo ID"""
+        if not ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(chunk_id,) for chunk_id in ids])
+            self._conn.commit()
+
+    def delete_files(self, filenames: List[str]):
+        """Remover todos os chunks dos arquivos informados"""
+        if not filenames:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM chunks WHERE filename = ?", [(name,) for name in filenames])
+            self._conn.commit()
+
+    def clear(self):
+        """Remover todos os chunks (reconstrução completa do índice)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
@@ -0,0 +1,140 @@
+from collections import deque
+from typing import List, Sequence, Tuple
+
+DEFAULT_SEPARATORS = ("\n\n", "\n", ". ", " ", "")
+
+
+class TextChunker:
+    """
+    Divisor de texto recursivo que devolve intervalos em vez de cópias
+
+    Segue as mesmas regras do `RecursiveCharacterTextSplitter` do LangChain
+    (separador mantido no início do pedaço seguinte, junção com sobreposição
+    e remoção de espaços nas bordas), então, medindo em caracteres, produz
+    exatamente os mesmos chunks. A diferença é que o texto nunca é copiado
+    durante a divisão: cada pedaço é um par (início, fim) no texto original,
+    os separadores são localizados com `str.find` (sem regex) e o tamanho de
+    cada pedaço é calculado uma única vez.
+
+    Com `length_unit="tokens"`, os tamanhos são medidos com o tokenizador do
+    modelo de embedding (tiktoken), e `chunk_size`/`chunk_overlap` passam a
+    ser em tokens.
+    """
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200,
+                 separators: Sequence[str] = DEFAULT_SEPARATORS, length_unit: str = "chars",
+                 encoding_name: str = "cl100k_base"):
+        """
+        Args:
+            chunk_size: Tamanho máximo de cada chunk
+            chunk_overlap: Sobreposição máxima entre chunks consecutivos
+            separators: Separadores em ordem de preferência ("" divide por caractere)
+            length_unit: "chars" ou "tokens"
+            encoding_name: Tokenizador do tiktoken (cl100k_base = text-embedding-3-*)
+        """
+        if chunk_overlap > chunk_size:
+            raise ValueError(f"Sobreposição ({chunk_overlap}) maior que o chunk ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators)
+        self.length_unit = length_unit
+
+        self._encoding = None
+        if length_unit == "chars":
+            self._length = lambda text, start, end: end - start
+        elif length_unit == "tokens":
+            try:
+                import tiktoken
+            except ImportError as e:
+                raise ImportError("Instale tiktoken para medir os chunks em tokens") from e
+            self._encoding = tiktoken.get_encoding(encoding_name)
+            self._length = lambda text, start, end: len(self._encoding.encode_ordinary(text[start:end]))
+        else:
+            raise ValueError(f"Unidade de tamanho desconhecida: {length_unit}")
+
+    def split(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Dividir o texto em chunks
+
+        Returns:
+            Intervalos (início, fim) de cada chunk no texto, em ordem
+        """
+        ranges: List[Tuple[int, int]] = []
+        self._split_range(text, 0, len(text), 0, ranges)
+        return ranges
+
+    def split_text(self, text: str) -> List[str]:
+        """Dividir o texto em chunks (strings, como o `split_text` do LangChain)"""
+        return [text[start:end] for start, end in self.split(text)]
+
+    def _split_range(self, text: str, start: int, end: int, level: int, ranges: List[Tuple[int, int]]):
+        # Primeiro separador (a partir do nível atual) presente no trecho
+        separator = self.separators[-1]
+        next_level = len(self.separators)
+        for i in range(level, len(self.separators)):
+            candidate = self.separators[i]
+            if candidate == "":
+                separator = candidate
+                break
+            if text.find(candidate, start, end) >= 0:
+                separator = candidate
+                next_level = i + 1
+                break
+
+        # Pedaços: o separador fica no início do pedaço seguinte
+        if separator == "":
+            pieces = [(i, i + 1) for i in range(start, end)]
+        else:
+            pieces = []
+            piece_start = start
+            position = text.find(separator, start, end)
+            while position >= 0:
+                if position > piece_start:
+                    pieces.append((piece_start, position))
+                piece_start = position
+                position = text.find(separator, position + len(separator), end)
+            if end > piece_start:
+                pieces.append((piece_start, end))
+
+        # Juntar pedaços pequenos; dividir de novo os grandes com o próximo separador
+        good = []
+        count_chars = self._encoding is None
+        for piece_start, piece_end in pieces:
+            length = piece_end - piece_start if count_chars else self._length(text, piece_start, piece_end)
+            if length < self.chunk_size:
+                good.append((piece_start, piece_end, length))
+                continue
+            if good:
+                self._merge(text, good, ranges)
+                good = []
+            if next_level >= len(self.separators):
+                ranges.append((piece_start, piece_end))
+            else:
+                self._split_range(text, piece_start, piece_end, next_level, ranges)
+        if good:
+            self._merge(text, good, ranges)
+
+    def _merge(self, text: str, pieces: List[Tuple[int, int, int]], ranges: List[Tuple[int, int]]):
+        """Agrupar pedaços consecutivos em chunks de até `chunk_size`, com sobreposição"""
+        current = deque()
+        total = 0
+        for piece in pieces:
+            length = piece[2]
+            if total + length > self.chunk_size and current:
+                self._emit(text, current[0][0], current[-1][1], ranges)
+                while total > self.chunk_overlap or (total + length > self.chunk_size and total > 0):
+                    total -= current.popleft()[2]
+            current.append(piece)
+            total += length
+        if current:
+            self._emit(text, current[0][0], current[-1][1], ranges)
+
+    @staticmethod
+    def _emit(text: str, start: int, end: int, ranges: List[Tuple[int, int]]):
+        # Remover espaços nas bordas (mesmo efeito de str.strip)
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            ranges.append((start, end))
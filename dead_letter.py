@@ -0,0 +1,75 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+
+class DeadLetterQueue:
+    """Arquivo persistente (JSONL) com os chunks que falharam após todas as tentativas"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Caminho do arquivo JSONL
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def add(self, entries: List[Dict], stage: str, error: Exception):
+        """
+        Registrar chunks que falharam
+
+        Args:
+            entries: Dados dos chunks (id, text, metadata e, no upsert, values)
+            stage: Etapa que falhou ("embed" ou "upsert")
+            error: Último erro recebido
+        """
+        if not entries:
+            return
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                record = {**entry, "stage": stage, "error": str(error), "failed_at": time.time()}
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def load(self) -> List[Dict]:
+        """Ler todos os registros (o mais recente vence para cada ID)"""
+        if not Path(self.path).exists():
+            return []
+        records = {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record["id"]] = record
+        return list(records.values())
+
+    def replace(self, entries: List[Dict]):
+        """Regravar o arquivo apenas com os registros informados"""
+        with self._lock:
+            if not entries:
+                if Path(self.path).exists():
+                    os.remove(self.path)
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+
+    def discard(self, ids: List[str]):
+        """Remover da fila os IDs que já foram enviados com sucesso"""
+        ids = set(ids)
+        entries = self.load()
+        remaining = [entry for entry in entries if entry["id"] not in ids]
+        if len(remaining) != len(entries):
+            self.replace(remaining)
+
+    def clear(self):
+        """Esvaziar a fila"""
+        self.replace([])
+
+    def __len__(self) -> int:
+        return len(self.load())
@@ -0,0 +1,227 @@
+import json
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from lexical_index import strip_accents
+
+# Maior primo abaixo de 2^32: as assinaturas cabem em uint32
+_PRIME = np.uint64(4294967291)
+
+
+class MinHasher:
+    """Assinaturas MinHash de textos, a partir de shingles de palavras"""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        """
+        Args:
+            num_perm: Número de funções de hash (tamanho da assinatura)
+            shingle_size: Palavras por shingle
+            seed: Semente das permutações (fixa: assinaturas são persistidas)
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> List[str]:
+        words = re.findall(r"\w+", strip_accents(text.lower()))
+        if len(words) <= self.shingle_size:
+            return [" ".join(words)]
+        return [" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+
+    def signature(self, text: str) -> np.ndarray:
+        """Assinatura MinHash (uint32) do texto"""
+        hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in set(self.shingles(text))),
+                             dtype=np.uint64)
+        # (a·h + b) mod p para todas as permutações de uma vez; a, b, h < 2^32 não estouram 64 bits
+        values = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+        return values.min(axis=1).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """
+    Índice LSH de chunks quase duplicados, persistido em `.npz`
+
+    Guarda a assinatura MinHash de cada chunk canônico (os que têm vetor) e,
+    para cada chunk descartado como quase duplicado, o chunk canônico que o
+    representa e os metadados de citação (arquivo e páginas), para que a
+    resposta possa citar todas as fontes do trecho. A busca usa bandas LSH
+    e confirma os candidatos pela similaridade de Jaccard estimada.
+    """
+
+    CITATION_FIELDS = ("filename", "page_start", "page_end")
+
+    def __init__(self, path: str, threshold: float = 0.9, num_perm: int = 128, bands: int = 16):
+        """
+        Args:
+            path: Caminho do arquivo `.npz`
+            threshold: Similaridade de Jaccard (estimada) a partir da qual o chunk é duplicado
+            num_perm: Tamanho das assinaturas MinHash
+            bands: Bandas do LSH (`num_perm / bands` valores por banda)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm deve ser múltiplo de bands")
+        self.path = Path(path)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self._lock = threading.Lock()
+        self._loaded_mtime = None
+        self._reset()
+        if self.path.exists():
+            self._load()
+
+    def _reset(self):
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.duplicates: Dict[str, Dict] = {}  # ID duplicado → {"canonical", citação}
+        self._members: Dict[str, List[str]] = {}  # ID canônico → IDs duplicados
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self.bands)]
+
+    def _load(self):
+        with np.load(self.path, allow_pickle=False) as data:
+            ids = data["ids"].tolist()
+            matrix = data["signatures"]
+            duplicates = json.loads(str(data["duplicates"]))
+        self._reset()
+        for chunk_id, signature in zip(ids, matrix):
+            self._add_signature(chunk_id, signature)
+        for chunk_id, entry in duplicates.items():
+            self._add_duplicate(chunk_id, entry)
+        self._loaded_mtime = self.path.stat().st_mtime_ns
+
+    def refresh(self):
+        """
+        Recarregar o arquivo se outra execução (a ingestão) o alterou
+
+        Sob o lock: as sessões do chatbot leem o mesmo índice em `citations`
+        enquanto ele é reconstruído.
+        """
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._loaded_mtime:
+            with self._lock:
+                self._load()
+
+    def save(self):
+        """Gravar o índice de forma atômica"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        ids = list(self.signatures)
+        matrix = (np.stack([self.signatures[chunk_id] for chunk_id in ids]) if ids
+                  else np.zeros((0, self.bands * self.rows), dtype=np.uint32))
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp.npz")
+        np.savez(tmp_path, ids=np.array(ids, dtype=str), signatures=matrix,
+                 duplicates=np.array(json.dumps(self.duplicates, ensure_ascii=False)))
+        os.replace(tmp_path, self.path)
+        self._loaded_mtime = self.path.stat().st_mtime_ns
+
+    def clear(self):
+        """Esquecer todos os chunks (reconstrução completa do índice)"""
+        self._reset()
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _add_signature(self, chunk_id: str, signature: np.ndarray):
+        self.signatures[chunk_id] = signature
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(key, []).append(chunk_id)
+
+    def _add_duplicate(self, chunk_id: str, entry: Dict):
+        self.duplicates[chunk_id] = entry
+        self._members.setdefault(entry["canonical"], []).append(chunk_id)
+
+    def find(self, signature: np.ndarray) -> Optional[str]:
+        """Chunk canônico mais parecido acima do limiar (ou None)"""
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+        best, best_similarity = None, self.threshold
+        for chunk_id in candidates:
+            similarity = float(np.mean(self.signatures[chunk_id] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = chunk_id, similarity
+        return best
+
+    def add(self, chunk_id: str, text: str, metadata: Dict) -> Optional[str]:
+        """
+        Registrar um chunk: canônico (precisa de vetor) ou quase duplicado
+
+        O chunk não pode estar registrado: chunks alterados passam antes por `remove`.
+
+        Args:
+            chunk_id: ID do chunk
+            text: Conteúdo do chunk
+            metadata: Metadados do chunk (arquivo e páginas viram a citação)
+
+        Returns:
+            ID do chunk canônico se o chunk for um quase duplicado, senão None
+        """
+        signature = self.hasher.signature(text)
+        canonical = self.find(signature)
+        if canonical is None:
+            self._add_signature(chunk_id, signature)
+            return None
+        citation = {field: metadata[field] for field in self.CITATION_FIELDS if field in metadata}
+        self._add_duplicate(chunk_id, {"canonical": canonical, **citation})
+        return canonical
+
+    def remove(self, ids: List[str]) -> List[str]:
+        """
+        Esquecer chunks (alterados ou apagados)
+
+        Returns:
+            Duplicados que perderam o chunk canônico e precisam ganhar vetor próprio
+        """
+        orphans = []
+        for chunk_id in ids:
+            entry = self.duplicates.pop(chunk_id, None)
+            if entry is not None:
+                members = self._members.get(entry["canonical"], [])
+                if chunk_id in members:
+                    members.remove(chunk_id)
+            signature = self.signatures.pop(chunk_id, None)
+            if signature is not None:
+                for bucket, key in zip(self._buckets, self._band_keys(signature)):
+                    bucket[key].remove(chunk_id)
+                    if not bucket[key]:
+                        del bucket[key]
+                for member in self._members.pop(chunk_id, []):
+                    self.duplicates.pop(member, None)
+                    orphans.append(member)
+        removed = set(ids)
+        return [chunk_id for chunk_id in orphans if chunk_id not in removed]
+
+    def is_duplicate(self, chunk_id: str) -> bool:
+        return chunk_id in self.duplicates
+
+    def citations(self, canonical: str) -> List[Dict]:
+        """Citações (arquivo e páginas) dos duplicados representados por um chunk"""
+        with self._lock:
+            return [{field: value for field, value in self.duplicates[chunk_id].items() if field != "canonical"}
+                    for chunk_id in self._members.get(canonical, [])]
+
+    def canonical_ids(self, filenames: Iterable[str]) -> List[str]:
+        """
+        Chunks canônicos que representam os duplicados destes arquivos
+
+        Trechos descartados como quase duplicados não têm vetor nem entrada
+        no BM25: numa busca restrita a estes arquivos, são os canônicos
+        (às vezes de outro arquivo) que respondem por eles.
+        """
+        wanted = set(filenames)
+        with self._lock:
+            return sorted({entry["canonical"] for entry in self.duplicates.values()
+                           if entry.get("filename") in wanted})
+
+    def __len__(self) -> int:
+        return len(self.signatures)
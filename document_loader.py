@@ -0,0 +1,113 @@
+import fnmatch
+import mmap
+from pathlib import Path
+from typing import Iterator, List, Sequence, Tuple
+
+
+def discover_files(folder_path: str, include: Sequence[str] = ("**/*.txt",),
+                   exclude: Sequence[str] = ()) -> List[Path]:
+    """
+    Encontrar os arquivos de texto da pasta (e subpastas)
+
+    Args:
+        folder_path: Pasta raiz
+        include: Padrões glob relativos à pasta (ex.: "**/*.txt", "livros/*.txt")
+        exclude: Padrões dos caminhos relativos a ignorar (ex.: "rascunhos/*")
+
+    Returns:
+        Arquivos em ordem de caminho
+    """
+    root = Path(folder_path)
+    files = set()
+    for pattern in include:
+        for path in root.glob(pattern):
+            relative = relative_name(path, root)
+            if path.is_file() and not any(fnmatch.fnmatch(relative, skip) for skip in exclude):
+                files.add(path)
+    return sorted(files)
+
+
+def relative_name(path: Path, folder_path) -> str:
+    """Nome do arquivo usado nos IDs: caminho relativo à pasta raiz (só o nome, na raiz)"""
+    return Path(path).relative_to(folder_path).as_posix()
+
+
+class TextFile:
+    """
+    Arquivo UTF-8 lido em janelas, sem carregar o conteúdo inteiro numa string
+
+    Arquivos a partir de `mmap_threshold` bytes são mapeados em memória: o
+    sistema operacional traz as páginas sob demanda e só cada janela
+    decodificada vira string. As janelas terminam numa quebra de parágrafo
+    (ou de linha) sempre que possível, e nunca no meio de um caractere
+    nem entre o `\r` e o `\n` de uma quebra CRLF. Quebras `\r\n` e `\r`
+    viram `\n` ao decodificar, como no `open()` em modo texto: arquivos
+    gravados no Windows geram os mesmos chunks (e hashes).
+    """
+
+    def __init__(self, path: str, mmap_threshold: int = 1024 * 1024):
+        """
+        Args:
+            path: Caminho do arquivo
+            mmap_threshold: Tamanho a partir do qual o arquivo é mapeado em memória
+        """
+        self.path = path
+        self.size = Path(path).stat().st_size
+        self._file = open(path, "rb")
+        if self.size >= mmap_threshold:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._data = self._file.read()
+
+    def __enter__(self) -> "TextFile":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    @staticmethod
+    def _decode(data: bytes) -> str:
+        return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+    def read_text(self) -> str:
+        """Conteúdo inteiro (só para arquivos pequenos ou quem precisa do documento completo)"""
+        return self._decode(self._data[:])
+
+    def _window_end(self, start: int, window_size: int) -> int:
+        end = start + window_size
+        if end >= self.size:
+            return self.size
+        # Preferir fechar a janela numa quebra de parágrafo ou de linha na segunda metade
+        for separator in (b"\n\n", b"\n"):
+            position = self._data.rfind(separator, start + window_size // 2, end)
+            if position >= 0:
+                return position + len(separator)
+        # Sem quebras: recuar até o início de um caractere UTF-8
+        while end > start and self._data[end] & 0xC0 == 0x80:
+            end -= 1
+        # Nem separar o \r do \n de uma quebra CRLF
+        if end - 1 > start and self._data[end - 1:end + 1] == b"\r\n":
+            end -= 1
+        return end
+
+    def windows(self, window_size: int = 4 * 1024 * 1024) -> Iterator[Tuple[int, str]]:
+        """
+        Percorrer o arquivo em janelas de até `window_size` bytes
+
+        Yields:
+            Posição (em caracteres) do início da janela e o texto da janela
+        """
+        start = 0
+        char_offset = 0
+        while start < self.size:
+            end = self._window_end(start, window_size)
+            text = self._decode(self._data[start:end])
+            yield char_offset, text
+            char_offset += len(text)
+            start = end
+
@@ -0,0 +1,268 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+class EmbeddingBatch:
+    """
+    Lote colunar de embeddings prontos para o banco vetorial
+
+    Em vez de uma lista de dicionários (cada vetor como lista de floats do
+    Python, ~50KB por chunk), o lote guarda:
+
+    - `vectors`: matriz float32 contígua (n × dimensão)
+    - `ids`: IDs dos vetores, na ordem das linhas
+    - textos num único buffer UTF-8, com os deslocamentos de cada linha
+    - metadados internados: a parte comum (arquivo, origem, total de chunks)
+      é guardada uma vez por arquivo, e os campos que mudam a cada chunk
+      (`ROW_FIELDS`) ficam em colunas int32 (-1 = ausente)
+
+    Fatias (`batch[i:j]`) compartilham os buffers, sem cópia. Os registros
+    no formato antigo ({"id", "values", "metadata"}) só são montados quando
+    alguém precisa deles (ex.: o cliente do Pinecone ou o dead-letter).
+    Com `fields`, os metadados dos registros ficam restritos a esses campos
+    (ver `select_metadata`).
+    """
+
+    ROW_FIELDS = ("chunk_index", "page_start", "page_end")
+
+    def __init__(self, ids: List[str], vectors: np.ndarray, text_buffer: bytes, text_offsets: np.ndarray,
+                 metadata_pool: List[Dict], metadata_index: np.ndarray, columns: Dict[str, np.ndarray],
+                 fields: Optional[Tuple[str, ...]] = None):
+        self.ids = ids
+        self.vectors = vectors
+        self.text_buffer = text_buffer
+        self.text_offsets = text_offsets
+        self.metadata_pool = metadata_pool
+        self.metadata_index = metadata_index
+        self.columns = columns
+        self.fields = fields
+
+    # ----------------------------------------------------------- construção
+
+    @classmethod
+    def from_rows(cls, ids: List[str], vectors: Union[np.ndarray, Sequence[Sequence[float]]],
+                  texts: List[str], metadatas: List[Dict], dimension: Optional[int] = None) -> "EmbeddingBatch":
+        """
+        Montar o lote a partir de linhas soltas
+
+        Args:
+            ids: IDs dos vetores
+            vectors: Vetores (matriz ou sequência de listas)
+            texts: Texto guardado com cada vetor
+            metadatas: Metadados de cada vetor (sem o texto)
+            dimension: Dimensão dos vetores, para lotes vazios
+        """
+        matrix = np.empty((len(ids), dimension or (len(vectors[0]) if len(ids) else 0)), dtype=np.float32)
+        for i, values in enumerate(vectors):
+            matrix[i] = values
+
+        encoded = [text.encode("utf-8") for text in texts]
+        text_offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=text_offsets[1:])
+
+        pool: List[Dict] = []
+        pool_keys: Dict[str, int] = {}
+        metadata_index = np.empty(len(ids), dtype=np.int32)
+        columns = {field: np.full(len(ids), -1, dtype=np.int32) for field in cls.ROW_FIELDS}
+        for i, (vector_id, metadata) in enumerate(zip(ids, metadatas)):
+            shared = {key: value for key, value in metadata.items()
+                      if key not in cls.ROW_FIELDS and key not in ("chunk_id", "text")}
+            key = json.dumps(shared, sort_keys=True, ensure_ascii=False)
+            if key not in pool_keys:
+                pool_keys[key] = len(pool)
+                pool.append(shared)
+            metadata_index[i] = pool_keys[key]
+            for field in cls.ROW_FIELDS:
+                if metadata.get(field) is not None:
+                    columns[field][i] = int(metadata[field])
+        return cls(list(ids), matrix, b"".join(encoded), text_offsets, pool, metadata_index, columns)
+
+    @classmethod
+    def empty(cls, dimension: int = 0) -> "EmbeddingBatch":
+        return cls.from_rows([], [], [], [], dimension=dimension)
+
+    @classmethod
+    def from_records(cls, records: List[Dict], dimension: Optional[int] = None) -> "EmbeddingBatch":
+        """Converter registros no formato {"id", "values", "metadata"} (com "text" nos metadados)"""
+        return cls.from_rows(
+            [record["id"] for record in records],
+            [record["values"] for record in records],
+            [record["metadata"].get("text", "") for record in records],
+            [record["metadata"] for record in records],
+            dimension=dimension
+        )
+
+    @classmethod
+    def concat(cls, batches: List["EmbeddingBatch"]) -> "EmbeddingBatch":
+        """Juntar vários lotes num só (metadados comuns continuam internados uma vez; todos os campos)"""
+        dimension = batches[0].dimension if batches else 0
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls.empty(dimension)
+        if len(batches) == 1:
+            return batches[0].select_metadata(None)
+
+        pool: List[Dict] = []
+        pool_keys: Dict[str, int] = {}
+        metadata_indexes = []
+        buffers = []
+        offsets = [np.zeros(1, dtype=np.int64)]
+        buffer_size = 0
+        for batch in batches:
+            remap = np.empty(len(batch.metadata_pool), dtype=np.int32)
+            for i, shared in enumerate(batch.metadata_pool):
+                key = json.dumps(shared, sort_keys=True, ensure_ascii=False)
+                if key not in pool_keys:
+                    pool_keys[key] = len(pool)
+                    pool.append(shared)
+                remap[i] = pool_keys[key]
+            metadata_indexes.append(remap[batch.metadata_index])
+
+            start, end = int(batch.text_offsets[0]), int(batch.text_offsets[-1])
+            buffers.append(batch.text_buffer[start:end])
+            offsets.append(batch.text_offsets[1:] - start + buffer_size)
+            buffer_size += end - start
+
+        return cls(
+            [vector_id for batch in batches for vector_id in batch.ids],
+            np.concatenate([batch.vectors for batch in batches]),
+            b"".join(buffers),
+            np.concatenate(offsets),
+            pool,
+            np.concatenate(metadata_indexes),
+            {field: np.concatenate([batch.columns[field] for batch in batches]) for field in cls.ROW_FIELDS}
+        )
+
+    # ----------------------------------------------------------- acesso
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Memória ocupada pelos buffers do lote (aproximada)"""
+        return (self.vectors.nbytes + len(self.text_buffer) + self.text_offsets.nbytes
+                + self.metadata_index.nbytes + sum(column.nbytes for column in self.columns.values())
+                + sum(len(vector_id) for vector_id in self.ids))
+
+    def payload_sizes(self, bytes_per_value: int) -> np.ndarray:
+        """
+        Tamanho estimado de cada vetor no payload de um upsert
+
+        Args:
+            bytes_per_value: Bytes de cada valor do vetor (ex.: ~20 em JSON, 4 em binário)
+        """
+        shared = np.array([len(json.dumps(self._selected(metadata), ensure_ascii=False).encode("utf-8"))
+                           for metadata in self.metadata_pool] or [0], dtype=np.int64)
+        id_sizes = np.fromiter((len(vector_id.encode("utf-8")) for vector_id in self.ids),
+                               dtype=np.int64, count=len(self.ids))
+        text_sizes = np.diff(self.text_offsets) if self._has_field("text") else 0
+        id_copies = 2 if self._has_field("chunk_id") else 1
+        # ~64 bytes de chaves, campos por linha e pontuação
+        return (self.dimension * bytes_per_value + text_sizes + id_copies * id_sizes
+                + shared[self.metadata_index] + 64)
+
+    def text(self, i: int) -> str:
+        return self.text_buffer[self.text_offsets[i]:self.text_offsets[i + 1]].decode("utf-8")
+
+    def _has_field(self, field: str) -> bool:
+        return self.fields is None or field in self.fields
+
+    def _selected(self, metadata: Dict) -> Dict:
+        if self.fields is None:
+            return metadata
+        return {key: value for key, value in metadata.items() if key in self.fields}
+
+    def metadata(self, i: int, include_text: bool = True) -> Dict:
+        """Metadados da linha `i`, no mesmo formato dos registros"""
+        metadata = {**self.metadata_pool[self.metadata_index[i]], "chunk_id": self.ids[i]}
+        for field, column in self.columns.items():
+            if column[i] >= 0:
+                metadata[field] = int(column[i])
+        if include_text and self._has_field("text"):
+            metadata["text"] = self.text(i)
+        return self._selected(metadata)
+
+    def select_metadata(self, fields: Optional[Sequence[str]]) -> "EmbeddingBatch":
+        """
+        O mesmo lote (buffers compartilhados) com os metadados restritos a `fields`
+
+        Args:
+            fields: Campos mantidos nos registros (None = todos, com o texto)
+        """
+        return EmbeddingBatch(self.ids, self.vectors, self.text_buffer, self.text_offsets, self.metadata_pool,
+                              self.metadata_index, self.columns, tuple(fields) if fields is not None else None)
+
+    def record(self, i: int) -> Dict:
+        """Linha `i` no formato {"id", "values", "metadata"}"""
+        return {"id": self.ids[i], "values": self.vectors[i].tolist(), "metadata": self.metadata(i)}
+
+    def records(self) -> List[Dict]:
+        return [self.record(i) for i in range(len(self))]
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self.record(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("Fatias de EmbeddingBatch não aceitam passo")
+            stop = max(start, stop)
+            return EmbeddingBatch(
+                self.ids[start:stop], self.vectors[start:stop], self.text_buffer,
+                self.text_offsets[start:stop + 1], self.metadata_pool, self.metadata_index[start:stop],
+                {field: column[start:stop] for field, column in self.columns.items()}, self.fields
+            )
+        return self.record(index if index >= 0 else len(self) + index)
+
+    # ----------------------------------------------------------- disco
+
+    def save(self, path: str):
+        """
+        Gravar o lote num arquivo `.npz` (escrita atômica)
+
+        Os vetores ficam como float32 e os textos como bytes UTF-8: ler o
+        lote de volta não passa por JSON nem por listas do Python.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        start, end = int(self.text_offsets[0]), int(self.text_offsets[-1])
+        tmp_path = path.with_name(f".{path.name}.tmp.npz")
+        np.savez(
+            tmp_path,
+            ids=np.array(self.ids, dtype=str),
+            vectors=np.ascontiguousarray(self.vectors),
+            text_buffer=np.frombuffer(self.text_buffer[start:end], dtype=np.uint8),
+            text_offsets=self.text_offsets - start,
+            metadata_pool=np.array(json.dumps(self.metadata_pool, ensure_ascii=False)),
+            metadata_index=self.metadata_index,
+            fields=np.array(json.dumps(self.fields)),
+            **{f"column_{field}": column for field, column in self.columns.items()}
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "EmbeddingBatch":
+        """Ler um lote gravado com `save`"""
+        with np.load(path, allow_pickle=False) as data:
+            fields = json.loads(str(data["fields"])) if "fields" in data.files else None
+            return cls(
+                data["ids"].tolist(),
+                data["vectors"],
+                data["text_buffer"].tobytes(),
+                data["text_offsets"],
+                json.loads(str(data["metadata_pool"])),
+                data["metadata_index"],
+                {field: data[f"column_{field}"] for field in cls.ROW_FIELDS},
+                tuple(fields) if fields is not None else None
+            )
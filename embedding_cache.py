@@ -0,0 +1,137 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import List, Optional
+
+
+class EmbeddingCache:
+    """Cache persistente de embeddings endereçado por conteúdo (modelo + texto)"""
+
+    # Limite seguro de parâmetros por consulta no SQLite
+    _LOOKUP_BATCH = 500
+
+    def __init__(self, path: str = ".neurochat/embedding_cache.sqlite", max_entries: int = 500_000):
+        """
+        Inicializar cache
+
+        Args:
+            path: Caminho do arquivo SQLite do cache
+            max_entries: Número máximo de embeddings guardados (LRU)
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """Gerar chave do cache a partir do modelo e do texto"""
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Buscar embeddings no cache
+
+        Args:
+            model: Modelo de embedding
+            texts: Textos a consultar
+
+        Returns:
+            Lista alinhada com `texts`, com None para os textos ausentes
+        """
+        keys = [self.make_key(model, text) for text in texts]
+        found = {}
+
+        with self._lock:
+            for i in range(0, len(keys), self._LOOKUP_BATCH):
+                batch = keys[i:i + self._LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+
+            # Atualizar recência dos itens encontrados (LRU)
+            if found:
+                now = time.time_ns()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            # Contadores sob o mesmo lock: várias threads do embedder consultam o cache
+            hits = sum(key in found for key in keys)
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+        results = []
+        for key in keys:
+            blob = found.get(key)
+            results.append(None if blob is None else array("f", blob).tolist())
+        return results
+
+    def put_many(self, model: str, texts: List[str], embeddings: List[List[float]]):
+        """
+        Guardar embeddings no cache
+
+        Args:
+            model: Modelo de embedding
+            texts: Textos de origem
+            embeddings: Embeddings correspondentes
+        """
+        now = time.time_ns()
+        rows = [
+            (self.make_key(model, text), array("f", values).tobytes(), now)
+            for text, values in zip(texts, embeddings)
+        ]
+
+        with self._lock:
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            self._size += max(cursor.rowcount, 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Remover as entradas menos usadas recentemente acima do limite"""
+        excess = self._size - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (excess,)
+        )
+        self._size -= excess
+
+    def __len__(self) -> int:
+        return self._size
+
+    def hit_rate(self) -> float:
+        """Taxa de acertos desde a criação do cache"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def close(self):
+        """Fechar conexão com o arquivo do cache"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,218 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional, Tuple
+
+import openai
+
+from retry_utils import is_retryable_error, retry_with_split
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa barata de tokens (~4 caracteres por token)"""
+    return len(text) // 4 + 1
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Verificar se o erro é um 429 (rate limit) da API"""
+    return isinstance(error, openai.RateLimitError) or getattr(error, "status_code", None) == 429
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Ler o cabeçalho Retry-After de um erro da API, se existir"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Limitador de taxa adaptativo por requisições e tokens por minuto"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, burst_seconds: float = 10.0):
+        """
+        Inicializar limitador
+
+        Args:
+            requests_per_minute: Limite de requisições por minuto
+            tokens_per_minute: Limite de tokens por minuto
+            burst_seconds: Quantos segundos de cota podem ser gastos de uma vez
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.burst_seconds = burst_seconds
+
+        # Fator aplicado às taxas: cai pela metade a cada 429 e se recupera aos poucos
+        self.rate_factor = 1.0
+        self.min_rate_factor = 0.05
+
+        self._request_capacity = max(requests_per_minute / 60 * burst_seconds, 1.0)
+        self._token_capacity = max(tokens_per_minute / 60 * burst_seconds, 1.0)
+        self._requests = self._request_capacity
+        self._tokens = self._token_capacity
+        self._paused_until = 0.0
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._requests = min(self._request_capacity,
+                             self._requests + elapsed * self.requests_per_minute / 60 * self.rate_factor)
+        self._tokens = min(self._token_capacity,
+                           self._tokens + elapsed * self.tokens_per_minute / 60 * self.rate_factor)
+
+    def acquire(self, tokens: int):
+        """
+        Bloquear até haver cota para uma requisição com `tokens` tokens
+
+        Args:
+            tokens: Tokens estimados da requisição
+        """
+        # Uma requisição maior que o balde precisa passar mesmo assim
+        tokens = min(tokens, self._token_capacity)
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+
+                if wait <= 0:
+                    if self._requests >= 1 and self._tokens >= tokens:
+                        self._requests -= 1
+                        self._tokens -= tokens
+                        return
+
+                    request_rate = self.requests_per_minute / 60 * self.rate_factor
+                    token_rate = self.tokens_per_minute / 60 * self.rate_factor
+                    wait = max((1 - self._requests) / request_rate,
+                               (tokens - self._tokens) / token_rate,
+                               0.001)
+            time.sleep(wait)
+
+    def penalize(self, pause_seconds: float):
+        """Registrar um 429: pausar todas as requisições e reduzir a taxa"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + pause_seconds)
+            self.rate_factor = max(self.min_rate_factor, self.rate_factor * 0.5)
+
+    def reward(self):
+        """Registrar um sucesso: recuperar a taxa gradualmente"""
+        with self._lock:
+            self.rate_factor = min(1.0, self.rate_factor + 0.05)
+
+
+class ConcurrentEmbedder:
+    """Motor de embeddings com requisições concorrentes e limitação de taxa"""
+
+    def __init__(self, client, model: str, batch_size: int = 100, max_in_flight: int = 4,
+                 requests_per_minute: int = 3000, tokens_per_minute: int = 1_000_000,
+                 max_rate_limit_retries: int = 8, max_attempts: int = 3, base_delay: float = 1.0,
+                 verbose: bool = True):
+        """
+        Inicializar motor
+
+        Args:
+            client: Cliente OpenAI
+            model: Modelo de embedding
+            batch_size: Textos por requisição
+            max_in_flight: Requisições simultâneas
+            requests_per_minute: Cota de requisições por minuto
+            tokens_per_minute: Cota de tokens por minuto
+            max_rate_limit_retries: Tentativas após respostas 429
+            max_attempts: Tentativas por lote para outros erros transitórios
+            base_delay: Atraso base do backoff exponencial (segundos)
+            verbose: Imprimir o progresso de cada lote
+        """
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.verbose = verbose
+        self.limiter = TokenBucket(requests_per_minute, tokens_per_minute)
+        self.rate_limited = 0
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Enviar um lote respeitando o limitador e recuando em respostas 429"""
+        tokens = sum(estimate_tokens(text) for text in texts)
+
+        for attempt in range(self.max_rate_limit_retries + 1):
+            self.limiter.acquire(tokens)
+            try:
+                response = self.client.embeddings.create(model=self.model, input=texts)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_rate_limit_retries:
+                    raise
+                self.rate_limited += 1
+                self.limiter.penalize(retry_after_seconds(e) or min(2 ** attempt, 30))
+                continue
+
+            self.limiter.reward()
+            # A API pode devolver os itens fora de ordem: usar o campo index
+            ordered = sorted(response.data, key=lambda item: item.index)
+            return [item.embedding for item in ordered]
+
+    def _embed_positions(self, texts: List[str], positions: List[int]
+                         ) -> Tuple[List[Tuple[List[int], List[List[float]]]], List[Tuple[int, Exception]]]:
+        """Enviar um lote com novas tentativas, dividindo-o se continuar falhando"""
+        return retry_with_split(
+            positions,
+            lambda batch: self._embed_batch([texts[i] for i in batch]),
+            max_attempts=self.max_attempts,
+            base_delay=self.base_delay,
+            # `_embed_batch` já repete os 429 com o limitador: um 429 que chega aqui está esgotado
+            retryable=lambda error: is_retryable_error(error) and not is_rate_limit_error(error)
+        )
+
+    def embed(self, texts: List[str],
+              on_batch: Optional[Callable[[List[int], List[List[float]]], None]] = None,
+              on_failure: Optional[Callable[[List[int], Exception], None]] = None
+              ) -> List[Optional[List[float]]]:
+        """
+        Criar embeddings em paralelo mantendo a ordem de entrada
+
+        Args:
+            texts: Textos a processar
+            on_batch: Chamado com (posições, embeddings) a cada lote concluído
+            on_failure: Chamado com (posições, último erro) para os textos que
+                falharam após todas as tentativas
+
+        Returns:
+            Embeddings alinhados com `texts` (None para textos que falharam)
+        """
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        batches = [list(range(i, min(i + self.batch_size, len(texts))))
+                   for i in range(0, len(texts), self.batch_size)]
+        if not batches:
+            return results
+
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            futures = [executor.submit(self._embed_positions, texts, positions) for positions in batches]
+            for future in as_completed(futures):
+                successes, failures = future.result()
+                done += 1
+
+                for positions, vectors in successes:
+                    for i, values in zip(positions, vectors):
+                        results[i] = values
+                    if on_batch is not None:
+                        on_batch(positions, vectors)
+
+                if failures:
+                    print(f"❌ Lote {done}/{len(batches)}: {len(failures)} textos falharam "
+                          f"após {self.max_attempts} tentativas: {failures[-1][1]}")
+                    if on_failure is not None:
+                        on_failure([i for i, _ in failures], failures[-1][1])
+                elif self.verbose:
+                    print(f"  🔄 Lote {done}/{len(batches)} concluído")
+
+        return results
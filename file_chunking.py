@@ -0,0 +1,209 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+from chunker import TextChunker
+from document_loader import TextFile
+from index_manifest import IndexManifest
+from page_index import PageIndex
+
+
+def file_metadata(txt_file: Path, filename: str) -> Dict:
+    """Metadados de documento de um arquivo de texto"""
+    return {
+        "source": str(txt_file),
+        "filename": filename,
+        "file_size": txt_file.stat().st_size
+    }
+
+
+def _window_chunks(text: str, window_start: int, spans: Sequence[Tuple[int, int]], metadata: Dict,
+                   page_index: Optional[PageIndex], first_index: int, total: int) -> List[Document]:
+    """Montar os chunks de uma janela, numerados a partir de `first_index`"""
+    chunks = []
+    for i, (start, end) in enumerate(spans, first_index):
+        chunk = Document(page_content=text[start:end], metadata=dict(metadata))
+
+        # Páginas de cada chunk, quando o TXT veio da conversão com índice de páginas
+        if page_index:
+            first_page, last_page = page_index.page_span(window_start + start, window_start + end)
+            chunk.metadata.update({"page_start": first_page, "page_end": last_page})
+
+        # ID único de cada chunk
+        chunk.metadata.update({
+            "chunk_id": f"{metadata['filename']}_{i}",
+            "chunk_index": i,
+            "total_chunks": total
+        })
+        chunks.append(chunk)
+    return chunks
+
+
+def split_windows(chunker: TextChunker, windows: Iterable[Tuple[int, str]], metadata: Dict) -> List[Document]:
+    """
+    Dividir as janelas de texto de um arquivo em chunks com IDs únicos
+
+    Os IDs (`<filename>_<i>`) e o `total_chunks` dependem só do arquivo,
+    então o resultado é o mesmo em qualquer processo.
+    """
+    windows = [(window_start, text, chunker.split(text)) for window_start, text in windows]
+    total = sum(len(spans) for _, _, spans in windows)
+    page_index = PageIndex.load(metadata["source"])
+    chunks = []
+    for window_start, text, spans in windows:
+        chunks.extend(_window_chunks(text, window_start, spans, metadata, page_index, len(chunks), total))
+    return chunks
+
+
+def split_file(chunker: TextChunker, txt_file: Path, filename: str, window_size: int) -> List[Document]:
+    """Dividir um arquivo em chunks, lendo-o em janelas mapeadas em memória"""
+    with TextFile(str(txt_file)) as text_file:
+        return split_windows(chunker, text_file.windows(window_size), file_metadata(txt_file, filename))
+
+
+class FileChunks:
+    """
+    Chunks de um arquivo, entregues uma janela por vez
+
+    `total` e `hashes` (um por chunk, para o diff com o manifesto) ficam
+    disponíveis antes de qualquer chunk ser montado; `windows()` monta os
+    Documents janela a janela. Vindo de `scan_file`, só uma janela de
+    chunks fica em memória por vez, mesmo em livros enormes.
+    """
+
+    def __init__(self, filename: str, hashes: List[str], windows: Callable[[], Iterator[List[Document]]]):
+        """
+        Args:
+            filename: Nome do arquivo
+            hashes: Hash de cada chunk, em ordem
+            windows: Função que percorre os chunks, uma lista por janela
+        """
+        self.filename = filename
+        self.hashes = hashes
+        self._windows = windows
+
+    @classmethod
+    def from_documents(cls, filename: str, chunks: List[Document]) -> "FileChunks":
+        """Chunks já prontos (ex.: vindos de um worker do pool), como uma única janela"""
+        return cls(filename, [IndexManifest.chunk_hash(chunk.page_content) for chunk in chunks],
+                   lambda: iter([chunks]))
+
+    @property
+    def total(self) -> int:
+        return len(self.hashes)
+
+    def __len__(self) -> int:
+        return self.total
+
+    def windows(self) -> Iterator[List[Document]]:
+        return self._windows()
+
+    def __iter__(self) -> Iterator[Document]:
+        for window in self.windows():
+            yield from window
+
+
+def scan_file(chunker: TextChunker, txt_file: Path, filename: str, window_size: int) -> FileChunks:
+    """
+    Dividir um arquivo em chunks sem manter todos em memória
+
+    Uma primeira passada pelas janelas guarda só os intervalos e os hashes
+    dos chunks (o `total_chunks` precisa do arquivo inteiro); os Documents
+    são montados numa segunda passada, janela a janela.
+    """
+    metadata = file_metadata(txt_file, filename)
+    spans: List[np.ndarray] = []
+    hashes: List[str] = []
+    with TextFile(str(txt_file)) as text_file:
+        for _, text in text_file.windows(window_size):
+            window_spans = np.asarray(chunker.split(text), dtype=np.int64).reshape(-1, 2)
+            spans.append(window_spans)
+            hashes.extend(IndexManifest.chunk_hash(text[start:end]) for start, end in window_spans.tolist())
+
+    def windows() -> Iterator[List[Document]]:
+        page_index = PageIndex.load(metadata["source"])
+        first_index = 0
+        with TextFile(str(txt_file)) as text_file:
+            for (window_start, text), window_spans in zip(text_file.windows(window_size), spans):
+                chunks = _window_chunks(text, window_start, window_spans.tolist(), metadata, page_index,
+                                        first_index, len(hashes))
+                first_index += len(chunks)
+                yield chunks
+
+    return FileChunks(filename, hashes, windows)
+
+
+# Chunker do processo atual (um por worker)
+_worker_chunker: Optional[TextChunker] = None
+
+
+def _init_worker(chunker_options: Dict):
+    global _worker_chunker
+    _worker_chunker = TextChunker(**chunker_options)
+
+
+def _split_file_task(txt_file: Path, filename: str, window_size: int) -> Tuple[str, List[Document]]:
+    return filename, split_file(_worker_chunker, txt_file, filename, window_size)
+
+
+def _split_document_task(doc: Document) -> List[Document]:
+    return split_windows(_worker_chunker, [(0, doc.page_content)], doc.metadata)
+
+
+class ChunkingPool:
+    """
+    Chunking de vários arquivos em paralelo, num pool de processos
+
+    Cada worker monta o seu próprio TextChunker e recebe um arquivo por vez.
+    Os resultados voltam na ordem dos arquivos, e só `workers × 2` arquivos
+    ficam em andamento, para que um consumidor mais lento (embedding e
+    upsert) limite a memória em vez de acumular chunks prontos.
+    """
+
+    def __init__(self, workers: int, chunker_options: Dict):
+        """
+        Args:
+            workers: Processos do pool
+            chunker_options: Parâmetros do TextChunker de cada worker
+        """
+        self.workers = workers
+        self.chunker_options = chunker_options
+
+    def _ordered(self, task: Callable, items: Iterable[Tuple]) -> Iterator:
+        # Sem fork direto: o processo principal já tem threads (pipeline, embeddings) e fork
+        # copiaria locks travados. O forkserver carrega este módulo uma vez e cria os workers dele
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload([__name__])
+        else:
+            context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(self.chunker_options,)) as pool:
+            pending = deque()
+            for item in items:
+                pending.append(pool.submit(task, *item))
+                if len(pending) >= self.workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def split_files(self, files: Iterable[Tuple[str, Path]],
+                    window_size: int) -> Iterator[Tuple[str, List[Document]]]:
+        """
+        Args:
+            files: Pares (nome do arquivo, caminho)
+            window_size: Bytes lidos por vez de cada arquivo
+
+        Yields:
+            Nome do arquivo e seus chunks, na ordem de `files`
+        """
+        return self._ordered(_split_file_task, ((path, filename, window_size) for filename, path in files))
+
+    def split_documents(self, documents: Iterable[Document]) -> Iterator[List[Document]]:
+        """Chunks de cada documento já carregado, na ordem dos documentos"""
+        return self._ordered(_split_document_task, ((doc,) for doc in documents))
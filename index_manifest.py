@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+class IndexManifest:
+    """Manifesto dos arquivos e chunks já indexados, usado na reindexação incremental"""
+
+    VERSION = 1
+
+    def __init__(self, path: str):
+        """
+        Carregar manifesto do disco (ou iniciar vazio)
+
+        Args:
+            path: Caminho do arquivo JSON do manifesto
+        """
+        self.path = path
+        self.files: Dict[str, Dict] = {}
+
+        if Path(path).exists():
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.files = data.get("files", {})
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        """Calcular hash SHA-256 de um arquivo em blocos"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def chunk_hash(text: str) -> str:
+        """Calcular hash do conteúdo de um chunk"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def chunk_id(filename: str, index: int) -> str:
+        """ID do vetor de um chunk (mesmo formato de `create_chunks`)"""
+        return f"{filename}_{index}"
+
+    def diff_files(self, current: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """
+        Comparar arquivos atuais com o manifesto
+
+        Args:
+            current: Mapa nome do arquivo → hash atual
+
+        Returns:
+            (arquivos novos ou alterados, arquivos removidos)
+        """
+        changed = [name for name, digest in current.items()
+                   if self.files.get(name, {}).get("hash") != digest]
+        removed = [name for name in self.files if name not in current]
+        return changed, removed
+
+    def diff_chunks(self, filename: str, chunk_hashes: List[str]) -> Tuple[List[int], List[str]]:
+        """
+        Comparar chunks de um arquivo com o manifesto
+
+        Args:
+            filename: Nome do arquivo
+            chunk_hashes: Hashes dos chunks atuais, em ordem
+
+        Returns:
+            (índices de chunks novos ou alterados, IDs de vetores que deixaram de existir)
+        """
+        previous = self.files.get(filename, {}).get("chunks", [])
+        changed = [i for i, digest in enumerate(chunk_hashes)
+                   if i >= len(previous) or previous[i] != digest]
+        stale = [self.chunk_id(filename, i) for i in range(len(chunk_hashes), len(previous))]
+        return changed, stale
+
+    def stale_ids(self, filename: str) -> List[str]:
+        """IDs de todos os vetores registrados para um arquivo"""
+        total = len(self.files.get(filename, {}).get("chunks", []))
+        return [self.chunk_id(filename, i) for i in range(total)]
+
+    def update_file(self, filename: str, file_hash: Optional[str], chunk_hashes: List[Optional[str]]):
+        """
+        Registrar o estado indexado de um arquivo
+
+        Args:
+            filename: Nome do arquivo
+            file_hash: Hash do arquivo (None força nova comparação na próxima execução)
+            chunk_hashes: Hashes dos chunks enviados (None para chunks que falharam)
+        """
+        self.files[filename] = {"hash": file_hash, "chunks": chunk_hashes}
+
+    def set_chunk_hash(self, filename: str, index: int, chunk_hash: str):
+        """Registrar um único chunk enviado depois (ex.: reprocessamento do dead-letter)"""
+        chunks = self.files.get(filename, {}).get("chunks")
+        if chunks is not None and index < len(chunks):
+            chunks[index] = chunk_hash
+
+    def remove_file(self, filename: str):
+        """Remover arquivo do manifesto"""
+        self.files.pop(filename, None)
+
+    def clear(self):
+        """Esquecer todos os arquivos (reconstrução completa do índice)"""
+        self.files = {}
+
+    def save(self):
+        """Gravar manifesto de forma atômica"""
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
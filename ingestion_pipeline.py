@@ -0,0 +1,67 @@
+import queue
+import threading
+from typing import Any, Callable, Iterable, List, Optional
+
+# Marca o fim do fluxo em cada fila
+_DONE = object()
+
+
+def run_pipeline(source: Iterable, stages: List[Callable[[Any], Any]], queue_size: int = 4):
+    """
+    Executar estágios encadeados em threads ligadas por filas limitadas
+
+    O `source` é consumido na thread atual; cada estágio roda em sua própria
+    thread, recebe um item do estágio anterior e devolve o item do próximo
+    (None descarta o item). Filas com `queue_size` itens aplicam
+    backpressure: se um estágio ficar lento, os anteriores esperam em vez de
+    acumular tudo em memória.
+
+    Se um estágio falhar, ele passa a descartar as entradas até o fim do fluxo
+    (evitando travar os demais) e o primeiro erro é relançado ao final.
+
+    Args:
+        source: Iterável com os itens de entrada
+        stages: Funções de cada estágio, na ordem
+        queue_size: Capacidade de cada fila entre estágios
+    """
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    errors: List[BaseException] = []
+
+    def worker(stage: Callable[[Any], Any], inbox: queue.Queue, outbox: Optional[queue.Queue]):
+        failed = False
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                break
+            if failed or errors:
+                continue
+            try:
+                result = stage(item)
+            except BaseException as e:
+                errors.append(e)
+                failed = True
+                continue
+            if outbox is not None and result is not None:
+                outbox.put(result)
+        if outbox is not None:
+            outbox.put(_DONE)
+
+    threads = []
+    for i, stage in enumerate(stages):
+        outbox = queues[i + 1] if i + 1 < len(stages) else None
+        thread = threading.Thread(target=worker, args=(stage, queues[i], outbox), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    try:
+        for item in source:
+            if errors:
+                break
+            queues[0].put(item)
+    finally:
+        queues[0].put(_DONE)
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
@@ -0,0 +1,359 @@
+import os
+import re
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Palavras muito frequentes em português, ignoradas no índice lexical
+STOPWORDS = frozenset("""
+a ao aos aquela aquelas aquele aqueles aquilo as ate com como da das de dela delas dele deles
+depois do dos e ela elas ele eles em entre era eram essa essas esse esses esta estas este estes
+eu foi foram ha isso isto ja la lhe lhes mais mas me mesmo meu meus minha minhas muito na nas
+nao nem no nos nossa nossas nosso nossos num numa o os ou para pela pelas pelo pelos por qual
+quando que quem se seja sem ser seu seus so sua suas tambem te tem tinha to tu tua tuas um uma
+umas uns voce voces vos sao esta estao foi sobre ter
+""".split())
+
+# Plurais irregulares (após remover acentos), do mais longo para o mais curto
+_PLURAL_SUFFIXES = (("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ois", "ol"),
+                    ("ns", "m"), ("res", "r"), ("s", ""))
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def strip_accents(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def stem(word: str) -> str:
+    """
+    Radical leve para português
+
+    Reduz plurais, advérbios em -mente e a vogal temática final
+    (hábitos/hábito/hábita → habit), sem a agressividade do RSLP completo.
+    Números e palavras curtas ficam como estão.
+    """
+    if len(word) < 4 or word.isdigit():
+        return word
+    for suffix, replacement in _PLURAL_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)] + replacement
+            break
+    if word.endswith("mente") and len(word) > 8:
+        word = word[:-5]
+    if len(word) > 4 and word[-1] in "aeo":
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokens do índice lexical: minúsculas, sem acentos, sem stopwords, com radical"""
+    words = _TOKEN_RE.findall(strip_accents(text.lower()))
+    return [stem(word) for word in words if word not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Índice lexical BM25 dos chunks, persistido em arrays
+
+    As listas invertidas ficam em formato CSR (`offsets` por termo, com
+    documento e frequência em arrays int32/uint16) num único `.npz`, o que
+    mantém o índice compacto e rápido de carregar. Cada chunk guarda o
+    arquivo de origem, permitindo trocar ou remover arquivos inteiros na
+    reindexação incremental: as mudanças são acumuladas com `set_file` e
+    `remove_file` e aplicadas de uma vez em `commit`.
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            path: Caminho do arquivo `.npz` do índice
+            k1: Saturação da frequência do termo
+            b: Normalização pelo tamanho do chunk
+        """
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self._staged: Dict[str, Tuple[str, List[str], np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._removed = set()
+        self._lock = threading.Lock()
+        self._loaded_mtime = None
+        self._reset()
+        if self.path.exists():
+            self._load()
+
+    def _reset(self):
+        self.terms: List[str] = []
+        self.doc_ids: List[str] = []
+        self.files: List[str] = []
+        self.file_hashes: Dict[str, str] = {}
+        self._term_index: Dict[str, int] = {}
+        self._doc_file = np.zeros(0, dtype=np.int32)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._post_docs = np.zeros(0, dtype=np.int32)
+        self._post_tfs = np.zeros(0, dtype=np.uint16)
+        self._doc_len = np.zeros(0, dtype=np.int32)
+        self._doc_position: Optional[Dict[str, int]] = None
+
+    def _load(self):
+        with np.load(self.path) as data:
+            self.terms = data["terms"].tolist()
+            self.doc_ids = data["doc_ids"].tolist()
+            self.files = data["files"].tolist()
+            self.file_hashes = dict(zip(self.files, data["file_hashes"].tolist()))
+            self._doc_file = data["doc_file"]
+            self._offsets = data["offsets"]
+            self._post_docs = data["post_docs"]
+            self._post_tfs = data["post_tfs"]
+            self._doc_len = data["doc_len"]
+        self._doc_position = None
+        self._term_index = {term: i for i, term in enumerate(self.terms)}
+        self._loaded_mtime = self.path.stat().st_mtime_ns
+
+    def refresh(self):
+        """Recarregar o índice se o arquivo foi regravado por outra ingestão"""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._loaded_mtime:
+            with self._lock:
+                self._load()
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    # ----------------------------------------------------------- atualização
+
+    def needs_update(self, filename: str, file_hash: str) -> bool:
+        """Verificar se o arquivo ainda não foi indexado com este conteúdo"""
+        return self.file_hashes.get(filename) != file_hash
+
+    def _term_ids(self, tokens: List[str]) -> np.ndarray:
+        ids = np.empty(len(tokens), dtype=np.int32)
+        for i, token in enumerate(tokens):
+            term_id = self._term_index.get(token)
+            if term_id is None:
+                term_id = len(self.terms)
+                self._term_index[token] = term_id
+                self.terms.append(token)
+            ids[i] = term_id
+        return ids
+
+    def set_file(self, filename: str, file_hash: str, ids: List[str], texts: List[str]):
+        """
+        Substituir os chunks de um arquivo (aplicado no próximo `commit`)
+
+        Só os termos já convertidos em IDs ficam em memória, não o texto.
+        """
+        self.begin_file(filename, file_hash)
+        self.add_chunks(filename, ids, texts)
+
+    def begin_file(self, filename: str, file_hash: str):
+        """Começar a substituir os chunks de um arquivo; eles chegam aos poucos por `add_chunks`"""
+        empty = np.zeros(0, dtype=np.int32)
+        self._staged[filename] = (file_hash, [], empty, empty, empty)
+        self._removed.discard(filename)
+
+    def add_chunks(self, filename: str, ids: List[str], texts: List[str]):
+        """Acrescentar chunks (ex.: de uma janela) ao arquivo aberto com `begin_file`"""
+        file_hash, staged_ids, staged_terms, staged_docs, staged_lengths = self._staged[filename]
+        term_ids, doc_local, lengths = [staged_terms], [staged_docs], [staged_lengths]
+        for i, text in enumerate(texts, len(staged_ids)):
+            tokens = self._term_ids(tokenize(text))
+            term_ids.append(tokens)
+            doc_local.append(np.full(len(tokens), i, dtype=np.int32))
+            lengths.append(np.array([len(tokens)], dtype=np.int32))
+        self._staged[filename] = (file_hash, staged_ids + list(ids), np.concatenate(term_ids),
+                                  np.concatenate(doc_local), np.concatenate(lengths))
+
+    def remove_file(self, filename: str):
+        """Remover os chunks de um arquivo (aplicado no próximo `commit`)"""
+        self._staged.pop(filename, None)
+        self._removed.add(filename)
+
+    def clear(self):
+        """Apagar o índice"""
+        self._reset()
+        self._staged.clear()
+        self._removed.clear()
+        if self.path.exists():
+            self.path.unlink()
+
+    def commit(self):
+        """
+        Reconstruir as listas invertidas com as mudanças acumuladas e salvar
+
+        O vocabulário é compactado junto: os IDs de termo mudam a cada commit.
+        """
+        if not self._staged and not self._removed:
+            return
+
+        # Triplas (termo, documento, frequência) dos chunks que continuam
+        replaced = {self.files.index(name) for name in set(self._staged) | self._removed if name in self.files}
+        keep_docs = ~np.isin(self._doc_file, list(replaced))
+        new_doc_index = np.cumsum(keep_docs) - 1
+        post_terms = np.repeat(np.arange(len(self._offsets) - 1, dtype=np.int32), np.diff(self._offsets))
+        keep_posts = keep_docs[self._post_docs] if len(self._post_docs) else np.zeros(0, dtype=bool)
+
+        terms_parts = [post_terms[keep_posts]]
+        docs_parts = [new_doc_index[self._post_docs[keep_posts]].astype(np.int64)]
+        tfs_parts = [self._post_tfs[keep_posts].astype(np.int64)]
+
+        files = [name for i, name in enumerate(self.files) if i not in replaced]
+        file_hashes = {name: self.file_hashes[name] for name in files}
+        file_index = {name: i for i, name in enumerate(files)}
+        remap = np.array([file_index.get(name, -1) for name in self.files], dtype=np.int32)
+        doc_ids = [doc_id for doc_id, keep in zip(self.doc_ids, keep_docs) if keep]
+        doc_file = [remap[self._doc_file[keep_docs]] if len(remap) else np.zeros(0, dtype=np.int32)]
+        doc_len = [self._doc_len[keep_docs]]
+
+        # Chunks novos: contar frequências por (documento, termo)
+        for filename, (file_hash, ids, term_ids, doc_local, lengths) in self._staged.items():
+            file_index[filename] = len(files)
+            files.append(filename)
+            file_hashes[filename] = file_hash
+            base = len(doc_ids)
+            doc_ids.extend(ids)
+            doc_file.append(np.full(len(ids), file_index[filename], dtype=np.int32))
+            doc_len.append(lengths)
+            if len(term_ids):
+                pairs = (doc_local.astype(np.int64) + base) * len(self.terms) + term_ids
+                unique, counts = np.unique(pairs, return_counts=True)
+                terms_parts.append((unique % len(self.terms)).astype(np.int32))
+                docs_parts.append(unique // len(self.terms))
+                tfs_parts.append(counts)
+
+        post_terms = np.concatenate(terms_parts)
+        post_docs = np.concatenate(docs_parts)
+        post_tfs = np.concatenate(tfs_parts)
+
+        # Termos que só apareciam em chunks removidos saem do vocabulário
+        used = np.bincount(post_terms, minlength=len(self.terms)) > 0
+        post_terms = (np.cumsum(used) - 1)[post_terms].astype(np.int32)
+        terms = [term for term, keep in zip(self.terms, used) if keep]
+        order = np.lexsort((post_docs, post_terms))
+        counts = np.bincount(post_terms, minlength=len(terms))
+
+        # Troca sob o lock: uma busca em andamento não mistura vocabulário e listas
+        with self._lock:
+            self.terms = terms
+            self._term_index = {term: i for i, term in enumerate(terms)}
+            self.files = files
+            self.file_hashes = file_hashes
+            self.doc_ids = doc_ids
+            self._doc_file = np.concatenate(doc_file)
+            self._doc_len = np.concatenate(doc_len).astype(np.int32)
+            self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+            self._post_docs = post_docs[order].astype(np.int32)
+            self._post_tfs = np.minimum(post_tfs[order], np.iinfo(np.uint16).max).astype(np.uint16)
+            self._doc_position = None
+        self._staged.clear()
+        self._removed.clear()
+        self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                terms=np.array(self.terms, dtype=str),
+                doc_ids=np.array(self.doc_ids, dtype=str),
+                files=np.array(self.files, dtype=str),
+                file_hashes=np.array([self.file_hashes[name] for name in self.files], dtype=str),
+                doc_file=self._doc_file,
+                offsets=self._offsets,
+                post_docs=self._post_docs,
+                post_tfs=self._post_tfs,
+                doc_len=self._doc_len,
+            )
+        os.replace(tmp_path, self.path)
+
+    # ----------------------------------------------------------- busca
+
+    def idf(self, tokens: List[str]) -> Dict[str, float]:
+        """IDF de cada token no corpus (tokens ausentes recebem o maior IDF)"""
+        n_docs = len(self.doc_ids)
+        weights = {}
+        with self._lock:
+            for token in tokens:
+                term_id = self._term_index.get(token)
+                df = 0 if term_id is None or term_id >= len(self._offsets) - 1 else \
+                    int(self._offsets[term_id + 1] - self._offsets[term_id])
+                weights[token] = float(np.log(1 + (n_docs - df + 0.5) / (df + 0.5)))
+        return weights
+
+    def search(self, query: str, top_k: int = 10, filenames: Optional[Sequence[str]] = None,
+               ids: Sequence[str] = ()) -> List[Tuple[str, float]]:
+        """
+        Buscar os chunks com maior score BM25 para a consulta
+
+        Args:
+            query: Consulta
+            top_k: Quantidade de resultados
+            filenames: Restringir a busca aos chunks destes arquivos (None = todos)
+            ids: Chunks que também entram na busca restrita, além dos de `filenames`
+
+        Returns:
+            Lista de (ID do chunk, score) em ordem decrescente de score
+        """
+        with self._lock:
+            return self._search(query, top_k, filenames, ids)
+
+    def _allowed_docs(self, filenames: Sequence[str], ids: Sequence[str]) -> np.ndarray:
+        """Máscara dos documentos dentro do escopo (arquivos + IDs avulsos)"""
+        wanted = set(filenames)
+        allowed = np.array([name in wanted for name in self.files], dtype=bool)[self._doc_file]
+        if ids:
+            if self._doc_position is None:
+                self._doc_position = {doc_id: i for i, doc_id in enumerate(self.doc_ids)}
+            positions = [self._doc_position[doc_id] for doc_id in ids if doc_id in self._doc_position]
+            allowed[positions] = True
+        return allowed
+
+    def _search(self, query: str, top_k: int, filenames: Optional[Sequence[str]] = None,
+                ids: Sequence[str] = ()) -> List[Tuple[str, float]]:
+        n_docs = len(self.doc_ids)
+        if n_docs == 0:
+            return []
+        # Termos de chunks ainda não aplicados por `commit` não têm lista
+        n_terms = len(self._offsets) - 1
+        term_ids = {self._term_index[token] for token in tokenize(query)
+                    if self._term_index.get(token, n_terms) < n_terms}
+        if not term_ids:
+            return []
+
+        avg_len = max(float(self._doc_len.mean()), 1.0)
+        norm = self.k1 * (1 - self.b + self.b * self._doc_len / avg_len)
+        allowed = self._allowed_docs(filenames, ids) if filenames is not None else None
+        scores = np.zeros(n_docs, dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            if start == end:
+                continue
+            docs = self._post_docs[start:end]
+            tfs = self._post_tfs[start:end]
+            # O IDF continua sendo o do corpus inteiro; fora do escopo nada é pontuado
+            df = end - start
+            if allowed is not None:
+                in_scope = allowed[docs]
+                docs, tfs = docs[in_scope], tfs[in_scope]
+            tfs = tfs.astype(np.float32)
+            idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm[docs])
+
+        matched = np.flatnonzero(scores)
+        k = min(top_k, len(matched))
+        if k == 0:
+            return []
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(self.doc_ids[i], float(scores[i])) for i in top]
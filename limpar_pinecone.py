@@ -11,6 +11,35 @@ except ImportError:
     import pinecone
     Pinecone = None
 
+def limpar_indice_local(index_name: str):
+    """Limpar completamente um índice do banco vetorial local"""
+    from pathlib import Path
+    from vector_store import LocalVectorStore
+    
+    cache_dir = os.getenv("RAG_CACHE_DIR", ".neurochat")
+    store = LocalVectorStore(str(Path(os.getenv("LOCAL_VECTOR_DIR", f"{cache_dir}/vectors")) / index_name))
+    
+    if not store.exists():
+        print(f"❌ ERRO: Índice local '{index_name}' não encontrado em {store.path}")
+        return
+    
+    total_antes = store.stats()["total_vector_count"]
+    print(f"📊 Vetores antes da limpeza: {total_antes}")
+    
+    if total_antes == 0:
+        print("✅ Índice já está vazio!")
+        return
+    
+    confirmacao = input(f"\n⚠️  ATENÇÃO: Isso vai DELETAR TODOS os {total_antes} vetores do índice local '{index_name}'!\n🤔 Tem certeza? Digite 'SIM' para confirmar: ")
+    
+    if confirmacao.upper() != 'SIM':
+        print("❌ Operação cancelada pelo usuário")
+        return
+    
+    store.delete_all()
+    print(f"\n✅ LIMPEZA CONCLUÍDA!")
+    print(f"🗑️ Removidos: {total_antes}")
+
 def limpar_pinecone():
     """Limpar completamente o índice Pinecone"""
     
@@ -18,6 +47,11 @@ def limpar_pinecone():
     api_key = os.getenv("PINECONE_API_KEY")
     index_name = os.getenv("PINECONE_INDEX_NAME", "firstry")
     
+    # Backend local (sem Pinecone)
+    if os.getenv("VECTOR_BACKEND", "pinecone") == "local":
+        limpar_indice_local(index_name)
+        return
+    
     if not api_key:
         print("❌ ERRO: PINECONE_API_KEY não encontrada no .env")
         return
@@ -0,0 +1,74 @@
+import bisect
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+class PageIndex:
+    """
+    Índice de páginas de um TXT convertido (arquivo `<nome>.pages.json` ao lado do TXT)
+
+    Cada página guarda o intervalo de bytes no TXT (`start`, `end`, para ler
+    só uma página com seek) e a posição do primeiro caractere (`char_start`),
+    usada para descobrir as páginas de um chunk sem reprocessar o PDF.
+    """
+
+    SUFFIX = ".pages.json"
+
+    def __init__(self, pages: List[Dict]):
+        """
+        Args:
+            pages: Registros {"page", "start", "end", "char_start"} em ordem de página
+        """
+        self.pages = pages
+        self._char_starts = [page["char_start"] for page in pages]
+
+    @classmethod
+    def path_for(cls, txt_path: str) -> Path:
+        """Caminho do índice de páginas de um TXT"""
+        txt_path = Path(txt_path)
+        return txt_path.with_name(txt_path.stem + cls.SUFFIX)
+
+    @classmethod
+    def load(cls, txt_path: str) -> Optional["PageIndex"]:
+        """Carregar o índice de um TXT (None se o TXT não tiver índice de páginas)"""
+        path = cls.path_for(txt_path)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f)["pages"])
+
+    def save(self, txt_path: str):
+        """Gravar o índice ao lado do TXT (escrita atômica)"""
+        path = self.path_for(txt_path)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"pages": self.pages}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def remove(cls, txt_path: str):
+        """Apagar o índice de um TXT (quando o TXT é regravado sem páginas)"""
+        path = cls.path_for(txt_path)
+        if path.exists():
+            os.remove(path)
+
+    def page_at(self, char_offset: int) -> int:
+        """Número da página que contém a posição (em caracteres) do TXT"""
+        position = max(bisect.bisect_right(self._char_starts, char_offset) - 1, 0)
+        return self.pages[position]["page"]
+
+    def page_span(self, char_start: int, char_end: int) -> Tuple[int, int]:
+        """Primeira e última página de um trecho [char_start, char_end)"""
+        return self.page_at(char_start), self.page_at(max(char_end - 1, char_start))
+
+    def byte_range(self, page: int) -> Tuple[int, int]:
+        """Intervalo de bytes de uma página no TXT"""
+        for record in self.pages:
+            if record["page"] == page:
+                return record["start"], record["end"]
+        raise KeyError(page)
+
+    def __len__(self) -> int:
+        return len(self.pages)
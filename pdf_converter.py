@@ -1,30 +1,261 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from docling.document_converter import DocumentConverter
+from typing import Dict, List, Optional, Tuple
+
+from index_manifest import IndexManifest
+from page_index import PageIndex
+
+# Conversor do processo atual (um por worker no modo em lote)
+_converter = None
+
+
+def _get_converter():
+    """Criar o DocumentConverter uma única vez por processo"""
+    global _converter
+    if _converter is None:
+        from docling.document_converter import DocumentConverter
+        _converter = DocumentConverter()
+    return _converter
+
+
+def _write_atomic(path: Path, text: str):
+    """Gravar em arquivo temporário e renomear, para nunca deixar TXT pela metade"""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
 
 def convert_pdf_txt_only(pdf_path, output_dir="output"):
     """Converter PDF para TXT apenas"""
     # Converter PDF
-    converter = DocumentConverter()
-    result = converter.convert(pdf_path)
-    
+    result = _get_converter().convert(pdf_path)
+
     # Criar pasta de saída
     Path(output_dir).mkdir(exist_ok=True)
     filename = Path(pdf_path).stem
-    
+
     # Salvar APENAS TXT
     txt_file = f"{output_dir}/{filename}.txt"
-    with open(txt_file, "w", encoding="utf-8") as f:
-        f.write(result.document.export_to_text())
-    
+    _write_atomic(Path(txt_file), result.document.export_to_text())
+    PageIndex.remove(txt_file)
+
     print(f"✅ Convertido: {txt_file}")
     return txt_file
 
-# USO: Altere o caminho abaixo
+
+def _count_pages(pdf_path: str) -> int:
+    """Número de páginas do PDF (pypdfium2 já vem com o docling)"""
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def convert_pdf_streaming(pdf_path, output_dir="output", pages_per_window: int = 20) -> Tuple[str, int]:
+    """
+    Converter PDF para TXT página a página, com índice de páginas
+
+    O PDF é convertido em janelas de `pages_per_window` páginas e o texto de
+    cada página vai para o arquivo assim que fica pronto, de modo que a
+    memória depende do tamanho da janela e não do livro. Ao lado do TXT fica
+    `<nome>.pages.json` com o intervalo de bytes de cada página, que o
+    chunking usa para citar páginas.
+
+    Args:
+        pdf_path: Caminho do PDF
+        output_dir: Pasta de saída
+        pages_per_window: Páginas convertidas por vez
+
+    Returns:
+        Caminho do TXT e número de páginas
+    """
+    converter = _get_converter()
+    total_pages = _count_pages(pdf_path)
+    Path(output_dir).mkdir(exist_ok=True)
+    txt_file = Path(output_dir) / f"{Path(pdf_path).stem}.txt"
+    tmp_path = txt_file.with_name(f".{txt_file.name}.tmp")
+
+    pages = []
+    char_position = 0
+    with open(tmp_path, "wb") as f:
+        for first in range(1, total_pages + 1, pages_per_window):
+            last = min(first + pages_per_window - 1, total_pages)
+            document = converter.convert(pdf_path, page_range=(first, last)).document
+            for page_no in range(first, last + 1):
+                # Páginas separadas por linha em branco (quebra de parágrafo para o chunking)
+                if pages:
+                    f.write(b"\n\n")
+                    char_position += 2
+                text = document.export_to_text(page_no=page_no)
+                start = f.tell()
+                f.write(text.encode("utf-8"))
+                pages.append({"page": page_no, "start": start, "end": f.tell(), "char_start": char_position})
+                char_position += len(text)
+            del document
+    os.replace(tmp_path, txt_file)
+    PageIndex(pages).save(str(txt_file))
+    return str(txt_file), total_pages
+
+
+def _init_worker(threads_per_worker: int):
+    """Limitar as threads de cada worker antes de carregar o docling"""
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[variable] = str(threads_per_worker)
+    _get_converter()
+
+
+def _convert_task(pdf_path: str, output_dir: str, pages_per_window: Optional[int] = None) -> Dict:
+    """Converter um PDF dentro de um worker e medir o tempo"""
+    start = time.perf_counter()
+    if pages_per_window:
+        txt_file, pages = convert_pdf_streaming(pdf_path, output_dir, pages_per_window)
+    else:
+        result = _get_converter().convert(pdf_path)
+        txt_file = Path(output_dir) / f"{Path(pdf_path).stem}.txt"
+        _write_atomic(txt_file, result.document.export_to_text())
+        PageIndex.remove(str(txt_file))
+        pages = len(getattr(result.document, "pages", None) or {})
+    return {
+        "pdf": pdf_path,
+        "txt": str(txt_file),
+        "pages": pages,
+        "seconds": time.perf_counter() - start,
+        "worker": os.getpid(),
+    }
+
+
+class ConversionManifest:
+    """Hashes dos PDFs já convertidos, para pular os que não mudaram"""
+
+    def __init__(self, output_dir: str):
+        self.path = Path(output_dir) / ".conversions.json"
+        self.files: Dict[str, Dict] = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.files = json.load(f)
+
+    def is_current(self, pdf_name: str, pdf_hash: str, streamed: bool = False) -> bool:
+        entry = self.files.get(pdf_name)
+        return (bool(entry) and entry["hash"] == pdf_hash and Path(entry["txt"]).exists()
+                and entry.get("streamed", False) == streamed)
+
+    def record(self, pdf_name: str, pdf_hash: str, result: Dict, streamed: bool = False):
+        self.files[pdf_name] = {"hash": pdf_hash, "txt": result["txt"], "pages": result["pages"],
+                                "streamed": streamed}
+
+    def save(self):
+        _write_atomic(self.path, json.dumps(self.files, ensure_ascii=False, indent=2))
+
+
+def convert_directory(input_dir: str, output_dir: str = "output", workers: Optional[int] = None,
+                      force: bool = False, pages_per_window: Optional[int] = None) -> List[str]:
+    """
+    Converter todos os PDFs de uma pasta em paralelo
+
+    Cada worker do pool de processos mantém o seu próprio DocumentConverter
+    (carregado uma vez, na inicialização). PDFs com o mesmo hash de uma
+    conversão anterior são pulados e cada TXT é gravado de forma atômica.
+
+    Args:
+        input_dir: Pasta com os PDFs
+        output_dir: Pasta dos TXT gerados
+        workers: Processos em paralelo (padrão: núcleos / 2)
+        force: Converter mesmo os PDFs que não mudaram
+        pages_per_window: Converter em modo streaming, com esta janela de páginas (None = PDF inteiro)
+
+    Returns:
+        Caminhos dos TXT gerados nesta execução
+    """
+    Path(output_dir).mkdir(exist_ok=True)
+    manifest = ConversionManifest(output_dir)
+    pdf_files = sorted(Path(input_dir).glob("*.pdf"))
+
+    pending = {}
+    for pdf_file in pdf_files:
+        pdf_hash = IndexManifest.file_hash(str(pdf_file))
+        if force or not manifest.is_current(pdf_file.name, pdf_hash, bool(pages_per_window)):
+            pending[str(pdf_file)] = pdf_hash
+    print(f"📚 {len(pdf_files)} PDFs encontrados | a converter: {len(pending)} "
+          f"| inalterados: {len(pdf_files) - len(pending)}")
+    if not pending:
+        return []
+
+    cpus = os.cpu_count() or 2
+    workers = min(workers or max(1, cpus // 2), len(pending))
+    threads_per_worker = max(1, cpus // workers)
+    print(f"⚙️ {workers} workers × {threads_per_worker} threads")
+
+    start = time.perf_counter()
+    converted = []
+    per_worker: Dict[int, Dict[str, float]] = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(threads_per_worker,)) as pool:
+        futures = {pool.submit(_convert_task, pdf_path, output_dir, pages_per_window): pdf_path for pdf_path in pending}
+        for future in as_completed(futures):
+            pdf_path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ {Path(pdf_path).name}: {e}")
+                continue
+
+            stats = per_worker.setdefault(result["worker"], {"pages": 0, "seconds": 0.0, "files": 0})
+            stats["pages"] += result["pages"]
+            stats["seconds"] += result["seconds"]
+            stats["files"] += 1
+            converted.append(result["txt"])
+
+            # Salvar o manifesto a cada PDF: uma interrupção não perde o progresso
+            manifest.record(Path(pdf_path).name, pending[pdf_path], result, bool(pages_per_window))
+            manifest.save()
+            print(f"✅ {Path(pdf_path).name}: {result['pages']} páginas em {result['seconds']:.1f}s "
+                  f"({result['pages'] / max(result['seconds'], 1e-9):.2f} págs/s)")
+
+    total_time = time.perf_counter() - start
+    total_pages = sum(stats["pages"] for stats in per_worker.values())
+    print(f"\n📊 Desempenho por worker:")
+    for pid, stats in sorted(per_worker.items()):
+        print(f"  • worker {pid}: {stats['files']} PDFs, {stats['pages']} páginas, "
+              f"{stats['pages'] / max(stats['seconds'], 1e-9):.2f} págs/s")
+    print(f"🎉 {len(converted)} PDFs ({total_pages} páginas) em {total_time:.1f}s "
+          f"— {total_pages / max(total_time, 1e-9):.2f} págs/s no total")
+    return converted
+
+
+# USO: python pdf_converter.py livro.pdf [--stream]  |  python pdf_converter.py --dir pdfs/ --workers 4
 if __name__ == "__main__":
-    pdf_path = "habitos-atomicos-by-james-clear-z-liborg.pdf"  # ← ALTERE AQUI para seu livro
+    parser = argparse.ArgumentParser(description="Converter PDFs para TXT com docling")
+    parser.add_argument("pdf", nargs="?", default="habitos-atomicos-by-james-clear-z-liborg.pdf",
+                        help="PDF a converter")  # ← ALTERE AQUI para seu livro
+    parser.add_argument("--dir", help="Converter todos os PDFs desta pasta em paralelo")
+    parser.add_argument("--output", default="output", help="Pasta dos TXT")
+    parser.add_argument("--workers", type=int, default=None, help="Processos em paralelo")
+    parser.add_argument("--force", action="store_true", help="Reconverter PDFs que não mudaram")
+    parser.add_argument("--stream", action="store_true",
+                        help="Gravar página a página, com índice de páginas (memória limitada)")
+    parser.add_argument("--pages-per-window", type=int, default=20, help="Páginas por janela no modo --stream")
+    args = parser.parse_args()
+
     try:
-        txt_file = convert_pdf_txt_only(pdf_path)
-        print(f"🎉 SUCESSO! Arquivo criado:")
-        print(f"📄 TXT: {txt_file}")
+        if args.dir:
+            convert_directory(args.dir, args.output, workers=args.workers, force=args.force,
+                              pages_per_window=args.pages_per_window if args.stream else None)
+        elif args.stream:
+            txt_file, pages = convert_pdf_streaming(args.pdf, args.output, args.pages_per_window)
+            print(f"🎉 SUCESSO! {pages} páginas convertidas:")
+            print(f"📄 TXT: {txt_file}")
+            print(f"📑 Páginas: {PageIndex.path_for(txt_file)}")
+        else:
+            txt_file = convert_pdf_txt_only(args.pdf, args.output)
+            print(f"🎉 SUCESSO! Arquivo criado:")
+            print(f"📄 TXT: {txt_file}")
     except Exception as e:
-        print(f"❌ ERRO: {e}")
\ No newline at end of file
+        print(f"❌ ERRO: {e}")
@@ -0,0 +1,258 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+
+class ScalarQuantizer:
+    """Quantização escalar int8 por dimensão (4x menor que float32)"""
+
+    kind = "int8"
+    code_dtype = np.int8
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self.code_size = dimension
+        self.scale: Optional[np.ndarray] = None
+
+    def train(self, sample: np.ndarray):
+        """Escala de cada dimensão = maior valor absoluto da amostra"""
+        self.scale = np.maximum(np.abs(sample).max(axis=0), 1e-6).astype(np.float32) / 127
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(vectors / self.scale), -127, 127).astype(np.int8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return codes.astype(np.float32) * self.scale
+
+    def scorer(self, query: np.ndarray):
+        """Distância assimétrica: consulta em float32 contra códigos int8"""
+        scaled_query = query * self.scale
+        return lambda codes: codes.astype(np.float32) @ scaled_query
+
+    def state(self) -> dict:
+        return {"scale": self.scale}
+
+    def restore(self, state: dict):
+        if state["scale"].shape != (self.dimension,):
+            raise ValueError(f"Escala salva com dimensão {state['scale'].shape[0]}, esperada {self.dimension}")
+        self.scale = state["scale"]
+
+
+class ProductQuantizer:
+    """
+    Quantização por produto (PQ)
+
+    O vetor é dividido em `m` subespaços e cada pedaço é trocado pelo índice
+    (1 byte) do centróide mais próximo entre `ksub` centróides treinados por
+    k-means. Com m = d/8 cada vetor de 1536 dims ocupa 192 bytes (32x menos).
+    """
+
+    kind = "pq"
+    code_dtype = np.uint8
+
+    def __init__(self, dimension: int, m: Optional[int] = None, ksub: int = 256):
+        self.dimension = dimension
+        self.m = m or max(1, dimension // 8)
+        if dimension % self.m:
+            raise ValueError(f"Dimensão {dimension} não é divisível por m={self.m}")
+        self.dsub = dimension // self.m
+        self.ksub = ksub
+        self.code_size = self.m
+        self.codebooks: Optional[np.ndarray] = None  # (m, ksub, dsub)
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        return vectors.reshape(len(vectors), self.m, self.dsub)
+
+    def train(self, sample: np.ndarray, iterations: int = 15, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        ksub = min(self.ksub, len(sample))
+        parts = self._split(sample.astype(np.float32))
+        codebooks = np.zeros((self.m, self.ksub, self.dsub), dtype=np.float32)
+
+        for j in range(self.m):
+            data = parts[:, j, :]
+            centroids = data[rng.choice(len(data), size=ksub, replace=False)].copy()
+            for _ in range(iterations):
+                distances = (
+                    (data ** 2).sum(axis=1, keepdims=True)
+                    - 2 * data @ centroids.T
+                    + (centroids ** 2).sum(axis=1)
+                )
+                labels = distances.argmin(axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, data)
+                counts = np.bincount(labels, minlength=ksub)
+                filled = counts > 0
+                centroids[filled] = sums[filled] / counts[filled, None]
+            codebooks[j, :ksub] = centroids
+            # Centróides não treinados (amostra pequena) repetem o primeiro
+            codebooks[j, ksub:] = centroids[0]
+        self.codebooks = codebooks
+
+    def encode(self, vectors: np.ndarray, block: int = 16384) -> np.ndarray:
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for start in range(0, len(vectors), block):
+            parts = self._split(np.asarray(vectors[start:start + block], dtype=np.float32))
+            for j in range(self.m):
+                data = parts[:, j, :]
+                distances = -2 * data @ self.codebooks[j].T + (self.codebooks[j] ** 2).sum(axis=1)
+                codes[start:start + block, j] = distances.argmin(axis=1)
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        parts = self.codebooks[np.arange(self.m), codes]  # (n, m, dsub)
+        return parts.reshape(len(codes), self.dimension)
+
+    def scorer(self, query: np.ndarray):
+        """Distância assimétrica (ADC): tabela consulta × centróides, somada por código"""
+        table = np.einsum("jkd,jd->jk", self.codebooks, query.reshape(self.m, self.dsub))
+        flat_table = table.ravel()
+        offsets = (np.arange(self.m) * self.ksub).astype(np.int64)
+        return lambda codes: flat_table[codes.astype(np.int64) + offsets].sum(axis=1)
+
+    def state(self) -> dict:
+        return {"codebooks": self.codebooks, "m": np.array(self.m), "ksub": np.array(self.ksub)}
+
+    def restore(self, state: dict):
+        """Ler os codebooks salvos, que precisam ter o mesmo `m` e `ksub` deste quantizador"""
+        m, ksub = int(state["m"]), int(state["ksub"])
+        if (m, ksub) != (self.m, self.ksub) or state["codebooks"].shape != (m, ksub, self.dsub):
+            raise ValueError(f"PQ salva com m={m}, ksub={ksub}; esperado m={self.m}, ksub={self.ksub}")
+        self.codebooks = state["codebooks"]
+
+
+def make_quantizer(kind: str, dimension: int, pq_subspaces: Optional[int] = None):
+    """Criar quantizador pelo nome ("int8" ou "pq")"""
+    if kind == "int8":
+        return ScalarQuantizer(dimension)
+    if kind == "pq":
+        return ProductQuantizer(dimension, m=pq_subspaces)
+    raise ValueError(f"Quantização desconhecida: {kind}")
+
+
+class QuantizedVectors:
+    """Códigos quantizados de cada linha do índice, num arquivo mapeado em memória"""
+
+    def __init__(self, path: Path, kind: str, dimension: int, pq_subspaces: Optional[int] = None):
+        """
+        Args:
+            path: Pasta do índice (a mesma dos vetores)
+            kind: "int8" ou "pq"
+            dimension: Dimensão dos vetores
+            pq_subspaces: Subespaços da PQ (padrão: dimensão / 8)
+        """
+        self.path = Path(path)
+        self.quantizer = make_quantizer(kind, dimension, pq_subspaces)
+        self.is_trained = False
+        self.trained_count = 0  # Vetores ocupados no último treino (decide o retreino)
+        self._codes: Optional[np.ndarray] = None
+
+    @property
+    def kind(self) -> str:
+        return self.quantizer.kind
+
+    @property
+    def bytes_per_vector(self) -> int:
+        return self.quantizer.code_size * np.dtype(self.quantizer.code_dtype).itemsize
+
+    @property
+    def _codes_path(self) -> Path:
+        return self.path / f"codes_{self.kind}.bin"
+
+    @property
+    def _state_path(self) -> Path:
+        return self.path / f"quantizer_{self.kind}.npz"
+
+    def load(self, capacity: int) -> bool:
+        if not (self._codes_path.exists() and self._state_path.exists()):
+            return False
+        with np.load(self._state_path) as state:
+            try:
+                self.quantizer.restore(dict(state))
+            except ValueError as e:
+                # Parâmetros mudaram (ex.: outro pq_subspaces): os códigos não servem mais
+                print(f"  ⚠️ Quantização salva incompatível ({e}): o próximo optimize() retreina")
+                self.drop()
+                return False
+            # Estados antigos não têm a contagem: o próximo `optimize` retreina
+            self.trained_count = int(state["trained_count"]) if "trained_count" in state.files else 0
+        self._map_codes()
+        self.resize(capacity)
+        self.is_trained = True
+        return True
+
+    def _map_codes(self):
+        rows = self._codes_path.stat().st_size // self.bytes_per_vector
+        self._codes = np.memmap(self._codes_path, dtype=self.quantizer.code_dtype, mode="r+",
+                                shape=(rows, self.quantizer.code_size))
+
+    def resize(self, capacity: int):
+        if self._codes is None or len(self._codes) >= capacity:
+            return
+        self._codes.flush()
+        self._codes = None
+        with open(self._codes_path, "r+b") as f:
+            f.truncate(capacity * self.bytes_per_vector)
+        self._map_codes()
+
+    def drop(self):
+        self.is_trained = False
+        self.trained_count = 0
+        self._codes = None
+        for file in (self._codes_path, self._state_path):
+            if file.exists():
+                file.unlink()
+
+    def train(self, matrix: np.ndarray, alive_rows: np.ndarray, capacity: int,
+              max_train_size: int = 65536, seed: int = 0):
+        """Treinar o quantizador numa amostra e codificar todas as linhas ocupadas"""
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(alive_rows, size=min(len(alive_rows), max_train_size), replace=False))
+        self.quantizer.train(np.asarray(matrix[sample_rows], dtype=np.float32))
+        self.trained_count = len(alive_rows)
+        np.savez(self._state_path, trained_count=np.array(self.trained_count), **self.quantizer.state())
+
+        # Arquivo novo no lugar do antigo: consultas em andamento seguem lendo os códigos anteriores
+        tmp_path = self._codes_path.with_name(f".{self._codes_path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.truncate(capacity * self.bytes_per_vector)
+        os.replace(tmp_path, self._codes_path)
+        self._map_codes()
+        self.is_trained = True
+
+        block = 65536
+        for start in range(0, len(alive_rows), block):
+            rows = alive_rows[start:start + block]
+            self.add(rows, matrix[rows])
+
+    def add(self, rows, vectors: np.ndarray):
+        """Codificar linhas novas ou alteradas"""
+        if not self.is_trained or len(rows) == 0:
+            return
+        self._codes[np.asarray(rows)] = self.quantizer.encode(np.asarray(vectors, dtype=np.float32))
+        self._codes.flush()
+
+    def scorer(self, query: np.ndarray):
+        """
+        Função que dá o score aproximado de um conjunto de linhas
+
+        A função guarda os códigos e o quantizador atuais: pode rodar fora do
+        lock do banco vetorial mesmo que um retreino troque os dois.
+        """
+        score_codes = self.quantizer.scorer(query)
+        codes = self._codes
+        return lambda rows: score_codes(np.asarray(codes[rows]))
+
+    def prefix_scorer(self, query: np.ndarray, used: int, block: int = 65536):
+        """Função que dá os scores aproximados das primeiras `used` linhas, em blocos (ver `scorer`)"""
+        score_codes = self.quantizer.scorer(query)
+        codes = self._codes
+
+        def score_prefix() -> np.ndarray:
+            scores = np.empty(used, dtype=np.float32)
+            for start in range(0, used, block):
+                scores[start:start + block] = score_codes(np.asarray(codes[start:min(start + block, used)]))
+            return scores
+        return score_prefix
@@ -0,0 +1,117 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+
+class QueryEmbedder:
+    """
+    Embeddings de perguntas compartilhados pelo processo
+
+    Perguntas já vistas (em qualquer sessão) saem de um cache LRU em
+    memória. As demais entram numa fila: o primeiro pedido abre uma janela
+    de `max_wait_ms` e tudo o que chegar nela vai numa única chamada a
+    `embeddings.create`, de modo que sessões simultâneas dividem a mesma
+    ida e volta à API. Perguntas idênticas em andamento esperam o mesmo
+    resultado em vez de gerar outra requisição.
+    """
+
+    def __init__(self, client, model: str = "text-embedding-3-small", max_entries: int = 10_000,
+                 max_wait_ms: float = 5.0, max_batch_size: int = 64, max_in_flight: int = 4):
+        """
+        Args:
+            client: Cliente OpenAI
+            model: Modelo de embedding (o mesmo da ingestão)
+            max_entries: Embeddings de perguntas guardados (LRU)
+            max_wait_ms: Janela para juntar pedidos simultâneos num lote
+            max_batch_size: Máximo de perguntas por requisição
+            max_in_flight: Requisições de embedding simultâneas
+        """
+        self.client = client
+        self.model = model
+        self.max_entries = max_entries
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        self.requests = 0
+        self.cache_hits = 0
+        self.api_calls = 0
+        self.embedded_texts = 0
+
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="query-embed")
+        self._collector = None
+
+    def embed(self, text: str, timeout: Optional[float] = None) -> List[float]:
+        """
+        Embedding de uma pergunta (cache → lote em andamento → novo lote)
+
+        Args:
+            text: Pergunta
+            timeout: Espera máxima em segundos (TimeoutError ao estourar)
+        """
+        with self._lock:
+            self.requests += 1
+            vector = self._cache.get(text)
+            if vector is not None:
+                self._cache.move_to_end(text)
+                self.cache_hits += 1
+                return vector
+
+            future = self._pending.get(text)
+            if future is None:
+                future = Future()
+                self._pending[text] = future
+                self._queue.put(text)
+                if self._collector is None:
+                    self._collector = threading.Thread(target=self._collect, daemon=True)
+                    self._collector.start()
+        return future.result(timeout=timeout)
+
+    def _collect(self):
+        """Juntar os pedidos que chegam dentro da janela e despachar o lote"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._executor.submit(self._flush, batch)
+
+    def _flush(self, batch: List[str]):
+        try:
+            response = self.client.embeddings.create(model=self.model, input=batch)
+            vectors = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        except Exception as e:
+            with self._lock:
+                futures = [self._pending.pop(text) for text in batch]
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self.api_calls += 1
+            self.embedded_texts += len(batch)
+            futures = []
+            for text, vector in zip(batch, vectors):
+                self._cache[text] = vector
+                self._cache.move_to_end(text)
+                futures.append(self._pending.pop(text))
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        for future, vector in zip(futures, vectors):
+            future.set_result(vector)
+
+    def hit_rate(self) -> float:
+        """Fração das perguntas atendidas pelo cache"""
+        return self.cache_hits / self.requests if self.requests else 0.0
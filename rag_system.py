@@ -1,7 +1,8 @@
 import os
 import json
+import argparse
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Iterator, Iterable, Sequence, Tuple, Union
 import time
 
 # Carregar variáveis de ambiente
@@ -9,7 +10,6 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Importações para processamento de texto
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
 # Importações para embeddings
@@ -17,66 +17,207 @@ import openai
 from openai import OpenAI
 
 # Importações para Pinecone
-from pinecone import Pinecone, ServerlessSpec
+from pinecone import Pinecone
+
+# Bancos vetoriais (Pinecone ou local)
+from vector_store import VectorStore, LocalVectorStore, create_vector_store
+
+# Cache local de embeddings
+from embedding_cache import EmbeddingCache
+from embedding_engine import ConcurrentEmbedder
+from upsert_engine import ConcurrentUpserter
+from index_manifest import IndexManifest
+from dead_letter import DeadLetterQueue
+from ingestion_pipeline import run_pipeline
+from lexical_index import BM25Index
+from dedup import NearDuplicateIndex
+from embedding_batch import EmbeddingBatch
+from chunk_store import ChunkStore, FILTERABLE_FIELDS
+from run_journal import RunJournal
+from document_loader import TextFile, discover_files, relative_name
+from chunker import TextChunker
+from file_chunking import ChunkingPool, FileChunks, file_metadata, scan_file, split_windows
 
 class DocumentProcessor:
     """Classe para processar documentos e criar sistema RAG"""
     
-    def __init__(self, openai_api_key: str, pinecone_api_key: str):
+    def __init__(self, openai_api_key: str, pinecone_api_key: Optional[str] = None,
+                 cache_dir: str = ".neurochat", cache_max_entries: int = 500_000,
+                 embedding_batch_size: int = 100, max_in_flight: int = 4,
+                 requests_per_minute: int = 3000, tokens_per_minute: int = 1_000_000,
+                 pipeline_queue_size: int = 4, vector_backend: str = "pinecone",
+                 local_store_dir: Optional[str] = None, vector_quantization: Optional[str] = None,
+                 include_patterns: Sequence[str] = ("**/*.txt",), exclude_patterns: Sequence[str] = (),
+                 load_window_size: int = 4 * 1024 * 1024, chunk_size: int = 1000,
+                 chunk_overlap: int = 200, chunk_length_unit: str = "chars", chunk_workers: int = 1,
+                 dedup_threshold: Optional[float] = None, upsert_max_in_flight: int = 4,
+                 upsert_batch_bytes: int = 2_000_000, pinecone_host: Optional[str] = None):
         """
         Inicializar processador
         
         Args:
             openai_api_key: Chave API da OpenAI
-            pinecone_api_key: Chave API do Pinecone
+            pinecone_api_key: Chave API do Pinecone (opcional no backend local)
+            cache_dir: Pasta para arquivos locais (cache de embeddings)
+            cache_max_entries: Limite de embeddings guardados no cache (LRU)
+            embedding_batch_size: Textos por requisição de embedding
+            max_in_flight: Requisições de embedding simultâneas
+            requests_per_minute: Cota de requisições por minuto da OpenAI
+            tokens_per_minute: Cota de tokens por minuto da OpenAI
+            pipeline_queue_size: Lotes em espera entre as etapas da ingestão
+            vector_backend: Banco vetorial: "pinecone" ou "local"
+            local_store_dir: Pasta dos índices locais (padrão: <cache_dir>/vectors)
+            vector_quantization: Quantização do índice local: None, "int8" ou "pq"
+            include_patterns: Padrões glob dos arquivos a indexar (busca recursiva)
+            exclude_patterns: Padrões dos caminhos a ignorar
+            load_window_size: Bytes lidos por vez de cada arquivo no chunking
+            chunk_size: Tamanho máximo de cada chunk
+            chunk_overlap: Sobreposição entre chunks
+            chunk_length_unit: Unidade dos tamanhos: "chars" ou "tokens" (tokenizador do modelo de embedding)
+            chunk_workers: Processos para o chunking (1 = no processo atual)
+            dedup_threshold: Similaridade a partir da qual um chunk é quase duplicado e não
+                ganha vetor próprio (None = sem deduplicação)
+            upsert_max_in_flight: Upserts simultâneos (e conexões com o Pinecone)
+            upsert_batch_bytes: Tamanho máximo (estimado) de cada requisição de upsert
+            pinecone_host: Host do índice no Pinecone (opcional)
         """
         # Configurar OpenAI
         self.openai_client = OpenAI(api_key=openai_api_key)
+        self.embedding_model = "text-embedding-3-small"  # Modelo mais econômico
+        self.embedder = ConcurrentEmbedder(
+            self.openai_client,
+            self.embedding_model,
+            batch_size=embedding_batch_size,
+            max_in_flight=max_in_flight,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute
+        )
+        
+        # Cache de embeddings em disco (chave: hash de modelo + texto)
+        self.cache_dir = cache_dir
+        self.embedding_cache = EmbeddingCache(
+            path=str(Path(cache_dir) / "embedding_cache.sqlite"),
+            max_entries=cache_max_entries
+        )
         
-        # Configurar Pinecone
-        self.pc = Pinecone(api_key=pinecone_api_key)
+        # Configurar banco vetorial
+        if vector_backend not in ("pinecone", "local"):
+            raise ValueError(f"Backend vetorial desconhecido: {vector_backend}")
+        self.vector_backend = vector_backend
+        self.local_store_dir = local_store_dir or str(Path(cache_dir) / "vectors")
+        self.vector_quantization = vector_quantization
+        self.pc = Pinecone(api_key=pinecone_api_key) if pinecone_api_key else None
+        self.pinecone_host = pinecone_host
+        self._vector_stores: Dict[str, VectorStore] = {}
+        self._chunk_stores: Dict[str, ChunkStore] = {}
+        self.upserter = ConcurrentUpserter(max_in_flight=upsert_max_in_flight,
+                                           max_batch_bytes=upsert_batch_bytes)
+        self.pipeline_queue_size = pipeline_queue_size
+        
+        # Arquivos de entrada
+        self.include_patterns = include_patterns
+        self.exclude_patterns = exclude_patterns
+        self.load_window_size = load_window_size
         
         # Configurações do chunking
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,        # Tamanho do chunk
-            chunk_overlap=200,      # Sobreposição entre chunks
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
+        self.chunker_options = dict(
+            chunk_size=chunk_size,          # Tamanho do chunk
+            chunk_overlap=chunk_overlap,    # Sobreposição entre chunks
+            separators=["\n\n", "\n", ". ", " ", ""],
+            length_unit=chunk_length_unit
         )
-        
-    def load_documents(self, folder_path: str) -> List[Document]:
+        self.chunker = TextChunker(**self.chunker_options)
+        self.chunk_workers = chunk_workers
+        self.dedup_threshold = dedup_threshold
+        
+    def list_files(self, folder_path: str) -> Dict[str, Path]:
+        """Arquivos de texto da pasta (recursivo, com filtros), pelo nome usado nos IDs"""
+        return {relative_name(path, folder_path): path
+                for path in discover_files(folder_path, self.include_patterns, self.exclude_patterns)}
+    
+    def iter_documents(self, folder_path: str, filenames: Optional[Iterable[str]] = None) -> Iterator[Document]:
         """
-        Carregar documentos TXT da pasta
+        Carregar documentos TXT da pasta, um de cada vez
         
         Args:
             folder_path: Caminho para pasta com arquivos TXT
+            filenames: Carregar apenas estes arquivos (None = todos)
             
-        Returns:
-            Lista de documentos do LangChain
+        Yields:
+            Documentos do LangChain
         """
-        documents = []
-        txt_files = Path(folder_path).glob("*.txt")
-        
-        for txt_file in txt_files:
-            print(f"📖 Carregando: {txt_file.name}")
+        for filename, txt_file in self.list_files(folder_path).items():
+            if filenames is not None and filename not in filenames:
+                continue
+            
+            print(f"📖 Carregando: {filename}")
             
-            with open(txt_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+            with TextFile(str(txt_file)) as text_file:
+                content = text_file.read_text()
                 
             # Criar documento com metadados
-            doc = Document(
+            yield Document(
                 page_content=content,
-                metadata={
-                    "source": str(txt_file),
-                    "filename": txt_file.name,
-                    "file_size": len(content)
-                }
+                metadata=file_metadata(txt_file, filename)
             )
-            documents.append(doc)
+    
+    def iter_file_chunks(self, folder_path: str,
+                         filenames: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, FileChunks]]:
+        """
+        Dividir os arquivos da pasta em chunks, um arquivo de cada vez
+        
+        Diferente de `iter_documents`, o arquivo nunca vira uma única string:
+        ele é mapeado em memória e entregue ao splitter em janelas de
+        `load_window_size` bytes, terminadas em quebras de parágrafo, e os
+        chunks saem uma janela por vez (`FileChunks.windows`). Com
+        `chunk_workers` > 1, os arquivos são divididos em paralelo num pool
+        de processos, e os resultados continuam saindo na ordem dos arquivos;
+        nesse modo cada worker devolve os chunks do arquivo inteiro.
+        
+        Args:
+            folder_path: Caminho para pasta com arquivos TXT
+            filenames: Processar apenas estes arquivos (None = todos)
             
+        Yields:
+            Nome do arquivo e seus chunks
+        """
+        files = [(filename, txt_file) for filename, txt_file in self.list_files(folder_path).items()
+                 if filenames is None or filename in filenames]
+        if self.chunk_workers > 1 and len(files) > 1:
+            pool = ChunkingPool(min(self.chunk_workers, len(files)), self.chunker_options)
+            for filename, chunks in pool.split_files(files, self.load_window_size):
+                yield filename, FileChunks.from_documents(filename, chunks)
+            return
+        for filename, txt_file in files:
+            yield filename, scan_file(self.chunker, txt_file, filename, self.load_window_size)
+    
+    def load_documents(self, folder_path: str, filenames: Optional[List[str]] = None) -> List[Document]:
+        """
+        Carregar documentos TXT da pasta
+        
+        Args:
+            folder_path: Caminho para pasta com arquivos TXT
+            filenames: Carregar apenas estes arquivos (None = todos)
+            
+        Returns:
+            Lista de documentos do LangChain
+        """
+        documents = list(self.iter_documents(folder_path, filenames))
         print(f"✅ {len(documents)} documentos carregados")
         return documents
     
+    def split_document(self, doc: Document) -> List[Document]:
+        """
+        Dividir um documento em chunks com IDs únicos
+        
+        Args:
+            doc: Documento
+            
+        Returns:
+            Chunks do documento
+        """
+        return split_windows(self.chunker, [(0, doc.page_content)], doc.metadata)
+    
     def create_chunks(self, documents: List[Document]) -> List[Document]:
         """
         Dividir documentos em chunks
@@ -89,263 +230,707 @@ class DocumentProcessor:
         """
         print("🔪 Criando chunks...")
         
+        if self.chunk_workers > 1 and len(documents) > 1:
+            pool = ChunkingPool(min(self.chunk_workers, len(documents)), self.chunker_options)
+            document_chunks = pool.split_documents(documents)
+        else:
+            document_chunks = (self.split_document(doc) for doc in documents)
+        
         all_chunks = []
-        for doc in documents:
-            chunks = self.text_splitter.split_documents([doc])
-            
-            # Adicionar ID único para cada chunk
-            for i, chunk in enumerate(chunks):
-                chunk.metadata.update({
-                    "chunk_id": f"{doc.metadata['filename']}_{i}",
-                    "chunk_index": i,
-                    "total_chunks": len(chunks)
-                })
-                
+        for doc, chunks in zip(documents, document_chunks):
             all_chunks.extend(chunks)
             print(f"  📄 {doc.metadata['filename']}: {len(chunks)} chunks")
             
         print(f"✅ Total de {len(all_chunks)} chunks criados")
         return all_chunks
     
-    def create_embeddings(self, chunks: List[Document]) -> List[Dict]:
+    def dead_letter_queue(self, index_name: str) -> DeadLetterQueue:
+        """Fila de chunks que falharam para um índice"""
+        return DeadLetterQueue(str(Path(self.cache_dir) / f"dead_letter_{index_name}.jsonl"))
+    
+    def chunk_store(self, index_name: str) -> ChunkStore:
+        """Textos e metadados completos dos chunks de um índice (fora do banco vetorial)"""
+        if index_name not in self._chunk_stores:
+            self._chunk_stores[index_name] = ChunkStore(str(Path(self.cache_dir) / f"chunks_{index_name}.sqlite"))
+        return self._chunk_stores[index_name]
+    
+    def lexical_index(self, index_name: str) -> BM25Index:
+        """Índice lexical BM25 dos chunks de um índice (busca híbrida)"""
+        return BM25Index(str(Path(self.cache_dir) / f"lexical_{index_name}.npz"))
+    
+    def duplicate_index(self, index_name: str) -> NearDuplicateIndex:
+        """Índice de chunks quase duplicados de um índice (MinHash/LSH)"""
+        return NearDuplicateIndex(str(Path(self.cache_dir) / f"dedup_{index_name}.npz"),
+                                  threshold=self.dedup_threshold or 0.9)
+    
+    def run_journal(self, index_name: str) -> RunJournal:
+        """Diário da ingestão de um índice (retomada após uma queda)"""
+        return RunJournal(str(Path(self.cache_dir) / "runs" / index_name))
+    
+    def create_embeddings(self, chunks: List[Document],
+                          dead_letters: Optional[DeadLetterQueue] = None) -> EmbeddingBatch:
         """
         Criar embeddings para os chunks
         
         Args:
             chunks: Lista de chunks
+            dead_letters: Fila onde registrar os chunks que falharem
             
         Returns:
-            Lista de embeddings com metadados
+            Lote colunar com os vetores, textos e metadados dos chunks
         """
         print("🧠 Criando embeddings...")
         
-        embeddings_data = []
-        batch_size = 10  # Processar em lotes para evitar rate limits
-        
-        for i in range(0, len(chunks), batch_size):
-            batch = chunks[i:i + batch_size]
-            print(f"  🔄 Processando lote {i//batch_size + 1}/{(len(chunks)-1)//batch_size + 1}")
-            
-            # Criar embeddings para o lote
-            texts = [chunk.page_content for chunk in batch]
-            
-            try:
-                response = self.openai_client.embeddings.create(
-                    model="text-embedding-3-small",  # Modelo mais econômico
-                    input=texts
-                )
-                
-                # Processar resposta
-                for j, chunk in enumerate(batch):
-                    embedding_data = {
-                        "id": chunk.metadata["chunk_id"],
-                        "values": response.data[j].embedding,
-                        "metadata": {
-                            **chunk.metadata,
-                            "text": chunk.page_content[:1000]  # Primeiros 1000 chars para preview
-                        }
-                    }
-                    embeddings_data.append(embedding_data)
-                    
-                # Pequena pausa para evitar rate limits
-                time.sleep(0.5)
-                
-            except Exception as e:
-                print(f"❌ Erro ao criar embeddings: {e}")
-                continue
+        # Consultar o cache antes de chamar a API
+        texts = [chunk.page_content for chunk in chunks]
+        vectors = self.embedding_cache.get_many(self.embedding_model, texts)
+        missing = [i for i, values in enumerate(vectors) if values is None]
+        print(f"  💾 Cache: {len(chunks) - len(missing)} reaproveitados, {len(missing)} novos")
+        
+        # Criar embeddings em paralelo apenas para os textos fora do cache
+        missing_texts = [texts[i] for i in missing]
+        
+        def store_batch(positions: List[int], batch_vectors: List[List[float]]):
+            self.embedding_cache.put_many(
+                self.embedding_model, [missing_texts[i] for i in positions], batch_vectors)
+        
+        def record_failure(positions: List[int], error: Exception):
+            if dead_letters is None:
+                return
+            failed_chunks = [chunks[missing[i]] for i in positions]
+            dead_letters.add([
+                {"id": chunk.metadata["chunk_id"], "text": chunk.page_content, "metadata": chunk.metadata}
+                for chunk in failed_chunks
+            ], stage="embed", error=error)
+        
+        new_vectors = self.embedder.embed(missing_texts, on_batch=store_batch, on_failure=record_failure)
+        for i, values in zip(missing, new_vectors):
+            vectors[i] = values
+        
+        found = [(chunk, values) for chunk, values in zip(chunks, vectors) if values is not None]
+        embeddings_data = EmbeddingBatch.from_rows(
+            [chunk.metadata["chunk_id"] for chunk, _ in found],
+            [values for _, values in found],
+            [chunk.page_content for chunk, _ in found],
+            [chunk.metadata for chunk, _ in found],
+            dimension=1536  # Dimensão do text-embedding-3-small
+        )
+        del vectors, found
                 
         print(f"✅ {len(embeddings_data)} embeddings criados")
         return embeddings_data
     
-    def setup_pinecone_index(self, index_name: str = "documentos-rag") -> str:
+    def get_vector_store(self, index_name: str) -> VectorStore:
         """
-        Configurar índice no Pinecone
+        Obter o banco vetorial de um índice (Pinecone ou local)
         
         Args:
             index_name: Nome do índice
             
         Returns:
-            Nome do índice criado
+            Implementação de VectorStore para o backend configurado
         """
-        print(f"🌲 Configurando índice Pinecone: {index_name}")
-        
-        # Verificar se índice já existe
-        existing_indexes = [index.name for index in self.pc.list_indexes()]
-        
-        if index_name in existing_indexes:
-            print(f"  ℹ️ Índice '{index_name}' já existe")
-            # Deletar índice existente (opcional - remova se quiser manter dados)
-            print(f"  🗑️ Deletando índice existente...")
-            self.pc.delete_index(index_name)
-            time.sleep(10)  # Aguardar deleção
-        
-        # Criar novo índice
-        print(f"  🔨 Criando novo índice...")
-        self.pc.create_index(
-            name=index_name,
-            dimension=1536,  # Dimensão do text-embedding-3-small
-            metric="cosine",
-            spec=ServerlessSpec(
-                cloud="aws",
-                region="us-east-1"
+        if index_name not in self._vector_stores:
+            self._vector_stores[index_name] = create_vector_store(
+                self.vector_backend, index_name, pc=self.pc,
+                local_store_dir=self.local_store_dir,
+                dimension=1536,  # Dimensão do text-embedding-3-small
+                quantization=self.vector_quantization,
+                pinecone_host=self.pinecone_host,
+                pool_threads=self.upserter.max_in_flight
             )
-        )
+        return self._vector_stores[index_name]
+    
+    def index_exists(self, index_name: str) -> bool:
+        """Verificar se o índice já existe no banco vetorial"""
+        return self.get_vector_store(index_name).exists()
+    
+    def setup_index(self, index_name: str = "documentos-rag", recreate: bool = False) -> str:
+        """
+        Configurar índice no banco vetorial
         
-        # Aguardar índice ficar pronto
-        print("  ⏳ Aguardando índice ficar pronto...")
-        while not self.pc.describe_index(index_name).status['ready']:
-            time.sleep(5)
+        Args:
+            index_name: Nome do índice
+            recreate: Apagar e recriar o índice se ele já existir
             
-        print(f"✅ Índice '{index_name}' criado e pronto!")
+        Returns:
+            Nome do índice criado
+        """
+        store = self.get_vector_store(index_name)
+        print(f"🌲 Configurando índice ({store.name}): {index_name}")
+        store.setup(recreate=recreate)
+        print(f"✅ Índice '{index_name}' pronto!")
         return index_name
     
-    def upload_to_pinecone(self, embeddings_data: List[Dict], index_name: str):
+    def upload_vectors(self, embeddings_data: Union[EmbeddingBatch, List[Dict]], index_name: str,
+                       dead_letters: Optional[DeadLetterQueue] = None) -> List[str]:
         """
-        Fazer upload dos embeddings para Pinecone
+        Fazer upload dos embeddings para o banco vetorial
+        
+        Os lotes são dimensionados pelo tamanho do payload e enviados em
+        paralelo. Lotes que falham são repetidos com backoff e divididos ao
+        meio até isolar os vetores problemáticos, que vão para o dead-letter.
         
         Args:
-            embeddings_data: Lista de embeddings
+            embeddings_data: Lote de embeddings (ou lista de {"id", "values", "metadata"})
             index_name: Nome do índice
+            dead_letters: Fila onde registrar os vetores que falharem
+            
+        Returns:
+            IDs dos vetores enviados com sucesso
         """
-        print(f"📤 Fazendo upload para Pinecone...")
+        if not isinstance(embeddings_data, EmbeddingBatch):
+            embeddings_data = EmbeddingBatch.from_records(embeddings_data, dimension=1536)
+        store = self.get_vector_store(index_name)
+        print(f"📤 Fazendo upload ({store.name}, até {self.upserter.max_in_flight} em paralelo)...")
+        count_before = store.stats()["total_vector_count"]
         
-        # Conectar ao índice
-        index = self.pc.Index(index_name)
+        uploaded_ids = self._upsert_batch(store, embeddings_data, dead_letters, self.chunk_store(index_name))
         
-        # Upload em lotes
-        batch_size = 100
-        for i in range(0, len(embeddings_data), batch_size):
-            batch = embeddings_data[i:i + batch_size]
+        # Sem saber quais IDs já existiam, o mínimo garantido é o maior dos dois totais
+        self._print_index_stats(store, expected=max(count_before, len(set(uploaded_ids))))
+        return uploaded_ids
+    
+    def _upsert_batch(self, store: VectorStore, batch: EmbeddingBatch,
+                      dead_letters: Optional[DeadLetterQueue] = None,
+                      chunk_store: Optional[ChunkStore] = None) -> List[str]:
+        """
+        Enviar um lote de vetores em paralelo, com novas tentativas e divisão do lote
+        
+        Args:
+            store: Banco vetorial de destino
+            batch: Vetores a enviar
+            dead_letters: Fila onde registrar os vetores que falharem
+            chunk_store: Onde guardar texto e metadados completos; com ele, os
+                vetores levam só os campos filtráveis
             
-            try:
-                index.upsert(vectors=batch)
-                print(f"  ✅ Lote {i//batch_size + 1}/{(len(embeddings_data)-1)//batch_size + 1} enviado")
-                time.sleep(1)  # Pequena pausa
-                
-            except Exception as e:
-                print(f"  ❌ Erro no lote {i//batch_size + 1}: {e}")
-                continue
+        Returns:
+            IDs enviados com sucesso
+        """
+        vectors = batch
+        if chunk_store is not None:
+            chunk_store.put_batch(batch)
+            vectors = batch.select_metadata(FILTERABLE_FIELDS)
+        
+        def record_failures(failures):
+            if dead_letters is None:
+                return
+            # O dead-letter guarda o registro completo (com texto), não o enxuto
+            row_of = {vector_id: i for i, vector_id in enumerate(batch.ids)}
+            records = [batch.record(row_of[item["id"]]) for item, _ in failures]
+            dead_letters.add([
+                {"id": record["id"], "text": record["metadata"].get("text", ""),
+                 "metadata": record["metadata"], "values": record["values"]}
+                for record in records
+            ], stage="upsert", error=failures[-1][1])
+        
+        return self.upserter.upsert(store, vectors, on_failure=record_failures)
+    
+    def _print_index_stats(self, store: VectorStore, expected: Optional[int] = None):
+        """
+        Mostrar estatísticas do índice após o upload
         
-        # Verificar estatísticas do índice
-        time.sleep(5)  # Aguardar indexação
-        stats = index.describe_index_stats()
+        Args:
+            store: Banco vetorial
+            expected: Total mínimo de vetores esperado; as estatísticas são
+                consultadas até o índice refletir esse total (o Pinecone
+                indexa de forma assíncrona)
+        """
+        if expected is None:
+            stats = store.stats()
+        else:
+            stats = store.wait_for_count(expected)
+            if stats["total_vector_count"] < expected:
+                print(f"  ⏳ O índice ainda não reflete todos os vetores "
+                      f"({stats['total_vector_count']} de pelo menos {expected})")
         print(f"📊 Estatísticas do índice:")
         print(f"  • Total de vetores: {stats['total_vector_count']}")
         print(f"  • Dimensão: {stats['dimension']}")
-        
-    def process_documents_to_pinecone(self, folder_path: str, index_name: str = "documentos-rag"):
+    
+    def delete_vectors(self, ids: List[str], index_name: str):
         """
-        Processo completo: documentos → chunks → embeddings → Pinecone
+        Remover vetores do banco vetorial
         
         Args:
-            folder_path: Pasta com arquivos TXT
-            index_name: Nome do índice Pinecone
+            ids: IDs dos vetores a remover
+            index_name: Nome do índice
         """
-        print("🚀 Iniciando processo completo RAG...")
-        start_time = time.time()
+        if not ids:
+            return
+        
+        print(f"🗑️ Removendo {len(ids)} vetores obsoletos...")
+        self.get_vector_store(index_name).delete(ids)
+        self.chunk_store(index_name).delete(ids)
+        
+    def process_documents(self, folder_path: str, index_name: str = "documentos-rag",
+                          incremental: bool = True):
+        """
+        Processo completo: documentos → chunks → embeddings → banco vetorial
         
-        # 1. Carregar documentos
-        documents = self.load_documents(folder_path)
+        No modo incremental, apenas arquivos e chunks novos ou alterados
+        (segundo o manifesto local) são enviados, e os vetores de arquivos
+        removidos ou encolhidos são apagados do índice. Se o índice estiver
+        vazio (limpo por fora), o manifesto é ignorado e tudo é reindexado.
         
-        # 2. Criar chunks
-        chunks = self.create_chunks(documents)
+        As etapas rodam em fluxo: os chunks de um arquivo seguem para o
+        embedding e depois para o upsert assim que ficam prontos, com filas
+        limitadas entre as etapas para manter o uso de memória constante.
         
-        # 3. Criar embeddings
-        embeddings_data = self.create_embeddings(chunks)
+        O progresso fica num diário em disco: se a execução cair, a próxima
+        retoma a ingestão interrompida, pulando os lotes já enviados e
+        reaproveitando os embeddings já gravados. Pedir a recriação descarta
+        uma ingestão incremental interrompida; pedir o modo incremental com uma
+        recriação interrompida levanta RuntimeError.
         
-        # 4. Configurar Pinecone
-        index_name = self.setup_pinecone_index(index_name)
+        Args:
+            folder_path: Pasta com arquivos TXT
+            index_name: Nome do índice
+            incremental: Reaproveitar o índice existente em vez de recriá-lo
+        """
+        print("🚀 Iniciando processo completo RAG...")
+        start_time = time.time()
         
-        # 5. Upload para Pinecone
-        self.upload_to_pinecone(embeddings_data, index_name)
+        # 1. Configurar banco vetorial, manifesto, dead-letter e diário da execução
+        journal = self.run_journal(index_name)
+        if journal.in_progress() and journal.started["incremental"] != incremental:
+            if incremental:
+                # Uma recriação interrompida deixou o índice pela metade e o
+                # manifesto antigo em disco: seguir incrementalmente pularia arquivos
+                raise RuntimeError(
+                    f"Há uma recriação do índice '{index_name}' interrompida; "
+                    "rode de novo com incremental=False para concluí-la")
+            print("⚠️ Descartando ingestão incremental interrompida: foi pedida a recriação do índice")
+            journal.finish()
+        if journal.in_progress():
+            print(f"⏯️ Retomando ingestão interrompida: {len(journal.upserted)} lotes já enviados, "
+                  f"{len(journal.embedded) - len(journal.upserted)} com embeddings salvos "
+                  f"(etapas concluídas: {', '.join(journal.phases) or 'nenhuma'})")
+        else:
+            journal.start(incremental=incremental)
+        manifest = IndexManifest(str(Path(self.cache_dir) / f"manifest_{index_name}.json"))
+        dead_letters = self.dead_letter_queue(index_name)
+        lexical = self.lexical_index(index_name)
+        dedup = self.duplicate_index(index_name) if self.dedup_threshold else None
+        fresh = not incremental or not self.index_exists(index_name)
+        if not fresh and manifest.files and self.get_vector_store(index_name).stats()["total_vector_count"] == 0:
+            # Índice esvaziado por fora (ex.: limpar_pinecone.py): o manifesto
+            # diria que tudo já foi enviado e nada seria reindexado
+            print("⚠️ Índice vazio, mas o manifesto lista arquivos: reindexando todos os documentos")
+            fresh = True
+        if fresh:
+            manifest.clear()
+            dead_letters.clear()
+            lexical.clear()
+            if dedup is not None:
+                dedup.clear()
+            if not journal.phase_done("setup"):
+                self.chunk_store(index_name).clear()  # Ao retomar, os textos já enviados ficam
+        # Ao retomar, o índice já recriado não é apagado de novo
+        index_name = self.setup_index(index_name, recreate=not incremental and not journal.phase_done("setup"))
+        journal.complete_phase("setup")
+        
+        # 2. Comparar arquivos atuais com o manifesto
+        file_hashes = {filename: IndexManifest.file_hash(str(txt_file))
+                       for filename, txt_file in self.list_files(folder_path).items()}
+        changed_files, removed_files = manifest.diff_files(file_hashes)
+        print(f"🔍 Arquivos alterados: {len(changed_files)} | removidos: {len(removed_files)} "
+              f"| inalterados: {len(file_hashes) - len(changed_files)}")
+        lexical_pending = {name for name, digest in file_hashes.items() if lexical.needs_update(name, digest)}
+        
+        # 3. Pipeline em fluxo: carregar → chunks → embeddings → upsert
+        #    Cada etapa roda em paralelo com as demais, ligadas por filas limitadas
+        store = self.get_vector_store(index_name)
+        chunk_texts = self.chunk_store(index_name)
+        count_before = store.stats()["total_vector_count"]
+        group_size = self.embedder.batch_size * self.embedder.max_in_flight
+        chunk_hashes = {}
+        pending_indices = {}
+        stale_ids = []
+        uploaded_ids = set()
+        known_ids = set()  # IDs que podiam já ter vetor (registrados no manifesto)
+        resumed_ids = set()  # IDs enviados antes da queda, já contados no índice
+        deduplicated_ids = set()
+        was_duplicate = set()  # IDs que já eram quase duplicados (sem vetor) antes desta execução
+        orphan_ids = set()
+        promoted_ids = set()  # Órfãos enviados com vetor próprio (fora dos pendentes)
+        processed_ids = set()
+        totals = {"documents": 0, "chunks": 0, "pending": 0, "embeddings": 0, "resumed": 0}
+        
+        def pending_chunk_groups() -> Iterator[List[Document]]:
+            """Carregar e dividir um arquivo por vez, emitindo só chunks novos ou alterados"""
+            group = []
+            for filename, file_chunks in self.iter_file_chunks(folder_path, filenames=set(changed_files)):
+                print(f"  📄 {filename}: {len(file_chunks)} chunks")
+                
+                # Hashes vêm da primeira passada: o diff não precisa dos chunks em memória
+                chunk_hashes[filename] = list(file_chunks.hashes)
+                known_ids.update(manifest.stale_ids(filename))
+                changed, stale = manifest.diff_chunks(filename, chunk_hashes[filename])
+                pending_indices[filename] = changed
+                totals["documents"] += 1
+                totals["chunks"] += len(file_chunks)
+                totals["pending"] += len(changed)
+                changed = set(changed)
+                
+                if dedup is not None:
+                    changed_ids = [IndexManifest.chunk_id(filename, i) for i in sorted(changed)]
+                    processed_ids.update(changed_ids + stale)
+                    was_duplicate.update(chunk_id for chunk_id in changed_ids + stale if dedup.is_duplicate(chunk_id))
+                    orphan_ids.update(dedup.remove(changed_ids + stale))
+                stale_ids.extend(chunk_id for chunk_id in stale if chunk_id not in was_duplicate)
+                index_lexical = filename in lexical_pending
+                if index_lexical:
+                    lexical.begin_file(filename, file_hashes[filename])
+                    lexical_pending.discard(filename)
+                
+                # Uma janela de chunks por vez
+                for window in file_chunks.windows():
+                    for chunk in window:
+                        i = chunk.metadata["chunk_index"]
+                        if i not in changed:
+                            continue
+                        # Quase duplicados de chunks já conhecidos não vão para o embedding
+                        chunk_id = chunk.metadata["chunk_id"]
+                        if dedup is not None and dedup.add(chunk_id, chunk.page_content, chunk.metadata) is not None:
+                            deduplicated_ids.add(chunk_id)
+                            if chunk_id in known_ids and chunk_id not in was_duplicate:
+                                stale_ids.append(chunk_id)  # O chunk tinha vetor próprio
+                            continue
+                        group.append(chunk)
+                        if len(group) >= group_size:
+                            yield group
+                            group = []
+                    if index_lexical:
+                        self._index_lexical(lexical, filename, window, dedup)
+            if group:
+                yield group
+        
+        def embed_stage(group: List[Document]) -> Optional[Tuple[str, EmbeddingBatch]]:
+            key = RunJournal.batch_key(group)
+            sent_ids = journal.uploaded_ids(key)
+            if sent_ids is not None:
+                # Lote enviado antes da queda
+                uploaded_ids.update(sent_ids)
+                resumed_ids.update(sent_ids)
+                totals["resumed"] += len(group)
+                return None
+            embeddings_data = journal.load_embeddings(key)
+            if embeddings_data is None:
+                embeddings_data = self.create_embeddings(group, dead_letters)
+                journal.save_embeddings(key, embeddings_data)
+            else:
+                print(f"  ⏯️ {len(embeddings_data)} embeddings lidos do segmento salvo")
+                totals["resumed"] += len(group)
+            totals["embeddings"] += len(embeddings_data)
+            return (key, embeddings_data) if embeddings_data else None
+        
+        def upload_stage(item: Tuple[str, EmbeddingBatch]):
+            key, embeddings_data = item
+            sent_ids = self._upsert_batch(store, embeddings_data, dead_letters, chunk_texts)
+            uploaded_ids.update(sent_ids)
+            journal.record_upsert(key, sent_ids)
+            print(f"  📤 {len(uploaded_ids)} vetores enviados")
+        
+        if changed_files:
+            run_pipeline(pending_chunk_groups(), [embed_stage, upload_stage],
+                         queue_size=self.pipeline_queue_size)
+        journal.complete_phase("pipeline")
+        removed_ids = [chunk_id for filename in removed_files for chunk_id in manifest.stale_ids(filename)]
+        if dedup is not None:
+            was_duplicate.update(chunk_id for chunk_id in removed_ids if dedup.is_duplicate(chunk_id))
+        stale_ids.extend(chunk_id for chunk_id in removed_ids if chunk_id not in was_duplicate)
+        
+        # Duplicados cujo chunk canônico mudou ou foi removido ganham vetor próprio
+        if dedup is not None:
+            orphan_ids.update(dedup.remove(removed_ids))
+            orphan_ids -= processed_ids | set(removed_ids)
+            if orphan_ids:
+                promoted_ids.update(self._index_orphans(folder_path, orphan_ids, dedup, store, dead_letters,
+                                                        chunk_texts))
+                uploaded_ids.update(promoted_ids)
+                lexical_pending.update(chunk_id.rsplit("_", 1)[0] for chunk_id in orphan_ids)
+            dedup.save()
+            print(f"🧬 Quase duplicados: {len(deduplicated_ids)} chunks sem vetor próprio nesta execução "
+                  f"({len(dedup.duplicates)} no total) | promovidos a canônicos: {len(promoted_ids)}")
+        
+        # Índice lexical: arquivos que ainda faltam (ex.: índice lexical novo) e removidos
+        if lexical_pending:
+            for filename, file_chunks in self.iter_file_chunks(folder_path, filenames=lexical_pending):
+                lexical.begin_file(filename, file_hashes[filename])
+                for window in file_chunks.windows():
+                    self._index_lexical(lexical, filename, window, dedup)
+        for filename in lexical.files:
+            if filename not in file_hashes:
+                lexical.remove_file(filename)
+        lexical.commit()
+        print(f"🔤 Índice lexical (BM25): {len(lexical)} chunks")
+        print(f"🧩 Chunks enviados: {len(uploaded_ids - promoted_ids)} de {totals['pending']} pendentes "
+              f"({totals['chunks']} no total) | órfãos promovidos: {len(promoted_ids)} | a remover: {len(stale_ids)}")
+        
+        # 4. Remoção de vetores obsoletos (e dos textos dos arquivos removidos)
+        self.delete_vectors(stale_ids, index_name)
+        chunk_texts.delete_files(removed_files)
+        dead_letters.discard(list(uploaded_ids) + stale_ids)
+        journal.complete_phase("delete")
+        if uploaded_ids:
+            # Total mínimo esperado: vetores novos entram, obsoletos saem
+            inserted = len(uploaded_ids - known_ids - resumed_ids)
+            self._print_index_stats(store, expected=max(count_before + inserted - len(set(stale_ids)), 0))
+        
+        # 5. Preparar o índice para consultas (ex.: índice aproximado no backend local)
+        if uploaded_ids or stale_ids:
+            store.optimize()
+        
+        # 6. Atualizar manifesto (chunks que falharam ficam pendentes para a próxima execução)
+        failed_files = set()
+        for filename, indices in pending_indices.items():
+            for i in indices:
+                chunk_id = IndexManifest.chunk_id(filename, i)
+                if chunk_id not in uploaded_ids and chunk_id not in deduplicated_ids:
+                    chunk_hashes[filename][i] = None
+                    failed_files.add(filename)
+        for filename, hashes in chunk_hashes.items():
+            file_hash = None if filename in failed_files else file_hashes[filename]
+            manifest.update_file(filename, file_hash, hashes)
+        for filename in removed_files:
+            manifest.remove_file(filename)
+        manifest.save()
+        journal.finish()
         
         total_time = time.time() - start_time
         print(f"\n🎉 PROCESSO CONCLUÍDO!")
         print(f"⏱️ Tempo total: {total_time:.2f} segundos")
-        print(f"📁 Documentos processados: {len(documents)}")
-        print(f"🔪 Chunks criados: {len(chunks)}")
-        print(f"🧠 Embeddings gerados: {len(embeddings_data)}")
-        print(f"🌲 Índice Pinecone: {index_name}")
+        print(f"📁 Documentos processados: {totals['documents']}")
+        print(f"🔪 Chunks criados: {totals['chunks']}")
+        print(f"🧠 Embeddings gerados: {totals['embeddings']}")
+        if totals["resumed"]:
+            print(f"⏯️ Chunks retomados da execução interrompida: {totals['resumed']}")
+        print(f"🗑️ Vetores removidos: {len(stale_ids)}")
+        print(f"🌲 Índice ({store.name}): {index_name}")
+        
+        cache = self.embedding_cache
+        print(f"💾 Cache de embeddings: {cache.hits} hits, {cache.misses} misses "
+              f"({cache.hit_rate():.0%} de acerto, {len(cache)} entradas)")
+        
+        pending_failures = len(dead_letters)
+        if pending_failures:
+            print(f"⚠️ {pending_failures} chunks no dead-letter: rode `python rag_system.py --resume` para reprocessá-los")
+    
+    @staticmethod
+    def _index_lexical(lexical: BM25Index, filename: str, chunks: List[Document],
+                       dedup: Optional[NearDuplicateIndex] = None):
+        """Acrescentar ao índice lexical chunks do arquivo aberto com `begin_file` (sem os quase duplicados)"""
+        if dedup is not None:
+            chunks = [chunk for chunk in chunks if not dedup.is_duplicate(chunk.metadata["chunk_id"])]
+        lexical.add_chunks(filename,
+                           [chunk.metadata["chunk_id"] for chunk in chunks],
+                           [chunk.page_content for chunk in chunks])
+    
+    def _index_orphans(self, folder_path: str, orphan_ids: set, dedup: NearDuplicateIndex,
+                       store: VectorStore, dead_letters: DeadLetterQueue,
+                       chunk_store: ChunkStore) -> List[str]:
+        """Gerar e enviar os vetores de duplicados que perderam o chunk canônico"""
+        filenames = {chunk_id.rsplit("_", 1)[0] for chunk_id in orphan_ids}
+        chunks = []
+        for _, file_chunks in self.iter_file_chunks(folder_path, filenames=filenames):
+            for chunk in file_chunks:
+                chunk_id = chunk.metadata["chunk_id"]
+                if chunk_id in orphan_ids and dedup.add(chunk_id, chunk.page_content, chunk.metadata) is None:
+                    chunks.append(chunk)
+        
+        embeddings_data = self.create_embeddings(chunks, dead_letters)
+        return self._upsert_batch(store, embeddings_data, dead_letters, chunk_store)
+    
+    def resume_dead_letters(self, index_name: str = "documentos-rag"):
+        """
+        Reprocessar apenas os chunks registrados no dead-letter
+        
+        Chunks que falharam no embedding são reenviados à API; os que falharam
+        no upsert já têm vetor e vão direto para o banco vetorial.
+        
+        Args:
+            index_name: Nome do índice
+        """
+        dead_letters = self.dead_letter_queue(index_name)
+        entries = dead_letters.load()
+        if not entries:
+            print("✅ Dead-letter vazio: nada para reprocessar")
+            return
+        
+        print(f"♻️ Reprocessando {len(entries)} chunks do dead-letter...")
+        
+        # Entradas que falharam no embedding voltam a ser chunks
+        chunks = [Document(page_content=entry["text"], metadata=entry["metadata"])
+                  for entry in entries if entry["stage"] == "embed"]
+        embeddings_data = EmbeddingBatch.concat([
+            self.create_embeddings(chunks, dead_letters) if chunks else EmbeddingBatch.empty(1536),
+            EmbeddingBatch.from_records(
+                [{"id": entry["id"], "values": entry["values"], "metadata": entry["metadata"]}
+                 for entry in entries if entry["stage"] == "upsert"],
+                dimension=1536
+            )
+        ])
+        
+        uploaded_ids = set()
+        if embeddings_data:
+            uploaded_ids = set(self.upload_vectors(embeddings_data, index_name, dead_letters))
+        dead_letters.discard(list(uploaded_ids))
+        if uploaded_ids:
+            self.get_vector_store(index_name).optimize()
+        
+        # Marcar no manifesto os chunks recuperados
+        manifest = IndexManifest(str(Path(self.cache_dir) / f"manifest_{index_name}.json"))
+        for entry in entries:
+            if entry["id"] in uploaded_ids:
+                metadata = entry["metadata"]
+                manifest.set_chunk_hash(metadata["filename"], metadata["chunk_index"],
+                                        IndexManifest.chunk_hash(entry["text"]))
+        manifest.save()
+        
+        print(f"✅ Recuperados: {len(uploaded_ids)} | ainda pendentes: {len(dead_letters)}")
+    
+    # Nomes antigos, mantidos por compatibilidade
+    setup_pinecone_index = setup_index
+    upload_to_pinecone = upload_vectors
+    delete_from_pinecone = delete_vectors
+    process_documents_to_pinecone = process_documents
 
 def main():
     """Função principal"""
+    parser = argparse.ArgumentParser(description="Indexar documentos TXT no banco vetorial")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reprocessar apenas os chunks que falharam (dead-letter)")
+    args = parser.parse_args()
     
     # CARREGAR CONFIGURAÇÕES DO .env
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
     DOCUMENTS_FOLDER = os.getenv("DOCUMENTS_FOLDER", "output")
+    CACHE_DIR = os.getenv("RAG_CACHE_DIR", ".neurochat")
+    CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+    EMBEDDING_MAX_IN_FLIGHT = int(os.getenv("EMBEDDING_MAX_IN_FLIGHT", "4"))
+    OPENAI_RPM = int(os.getenv("OPENAI_RPM", "3000"))
+    OPENAI_TPM = int(os.getenv("OPENAI_TPM", "1000000"))
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")  # "pinecone" ou "local"
+    LOCAL_VECTOR_DIR = os.getenv("LOCAL_VECTOR_DIR", str(Path(CACHE_DIR) / "vectors"))
+    VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION") or None  # "int8" ou "pq"
+    DOCUMENT_INCLUDE = [p.strip() for p in os.getenv("DOCUMENT_INCLUDE", "**/*.txt").split(",") if p.strip()]
+    DOCUMENT_EXCLUDE = [p.strip() for p in os.getenv("DOCUMENT_EXCLUDE", "").split(",") if p.strip()]
+    LOAD_WINDOW_MB = float(os.getenv("LOAD_WINDOW_MB", "4"))
+    CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
+    CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+    CHUNK_LENGTH_UNIT = os.getenv("CHUNK_LENGTH_UNIT", "chars")  # "chars" ou "tokens"
+    CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", "1"))
+    NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0")) or None  # ex.: 0.9
+    UPSERT_MAX_IN_FLIGHT = int(os.getenv("UPSERT_MAX_IN_FLIGHT", "4"))
+    UPSERT_BATCH_MB = float(os.getenv("UPSERT_BATCH_MB", "2"))
+    PINECONE_HOST = os.getenv("PINECONE_HOST") or None
     
     # Usar PINECONE_INDEX_NAME se disponível, senão INDEX_NAME
     INDEX_NAME = os.getenv("PINECONE_INDEX_NAME") or os.getenv("INDEX_NAME", "documentos-rag")
     
     print("🔧 Configurações carregadas:")
     print(f"  📁 Pasta de documentos: {DOCUMENTS_FOLDER}")
-    print(f"  🌲 Nome do índice: {INDEX_NAME}")
+    print(f"  🌲 Nome do índice: {INDEX_NAME} ({VECTOR_BACKEND})")
+    print(f"  💾 Cache local: {CACHE_DIR}")
     print(f"  🤖 Modelo OpenAI: {os.getenv('OPENAI_MODEL', 'text-embedding-3-small')}")
     
     # Verificar se as chaves foram configuradas
-    if not OPENAI_API_KEY or not PINECONE_API_KEY:
+    if not OPENAI_API_KEY or (VECTOR_BACKEND == "pinecone" and not PINECONE_API_KEY):
         print("\n❌ ERRO: Chaves API não configuradas!")
         print("📝 COMO CONFIGURAR:")
         print("1. Crie um arquivo .env na pasta do projeto")
         print("2. Adicione suas chaves:")
         print("   OPENAI_API_KEY=sk-proj-xxxxxxxx")
-        print("   PINECONE_API_KEY=pcsk_xxxxxxxx")
+        print("   PINECONE_API_KEY=pcsk_xxxxxxxx  (ou VECTOR_BACKEND=local)")
         print("\n🔗 Links para obter as chaves:")
         print("• OpenAI: https://platform.openai.com/api-keys")
         print("• Pinecone: https://app.pinecone.io/")
         return
     
-    # Verificar se a pasta existe
-    if not Path(DOCUMENTS_FOLDER).exists():
-        print(f"❌ ERRO: Pasta '{DOCUMENTS_FOLDER}' não encontrada!")
-        print(f"📁 Verifique se a pasta existe e contém arquivos .txt")
-        return
-    
-    # Verificar se existem arquivos TXT
-    txt_files = list(Path(DOCUMENTS_FOLDER).glob("*.txt"))
-    if not txt_files:
-        print(f"❌ ERRO: Nenhum arquivo .txt encontrado em '{DOCUMENTS_FOLDER}'!")
-        return
-        
-    print(f"📄 Encontrados {len(txt_files)} arquivos TXT:")
-    for txt_file in txt_files:
-        size_kb = txt_file.stat().st_size / 1024
-        print(f"  • {txt_file.name} ({size_kb:.1f} KB)")
+    incremental = True
     
-    # Verificar se o índice já existe
-    try:
-        pc = Pinecone(api_key=PINECONE_API_KEY)
-        existing_indexes = [index.name for index in pc.list_indexes()]
+    # Em modo --resume a pasta não é relida: apenas o dead-letter é reprocessado
+    if not args.resume:
+        # Verificar se a pasta existe
+        if not Path(DOCUMENTS_FOLDER).exists():
+            print(f"❌ ERRO: Pasta '{DOCUMENTS_FOLDER}' não encontrada!")
+            print(f"📁 Verifique se a pasta existe e contém arquivos .txt")
+            return
+        
+        # Verificar se existem arquivos TXT
+        txt_files = discover_files(DOCUMENTS_FOLDER, DOCUMENT_INCLUDE, DOCUMENT_EXCLUDE)
+        if not txt_files:
+            print(f"❌ ERRO: Nenhum arquivo .txt encontrado em '{DOCUMENTS_FOLDER}'!")
+            return
+        
+        print(f"📄 Encontrados {len(txt_files)} arquivos TXT:")
+        for txt_file in txt_files:
+            size_kb = txt_file.stat().st_size / 1024
+            print(f"  • {relative_name(txt_file, DOCUMENTS_FOLDER)} ({size_kb:.1f} KB)")
         
-        if INDEX_NAME in existing_indexes:
-            print(f"\n📋 Índice '{INDEX_NAME}' já existe no Pinecone!")
-            choice = input("Deseja usar o existente (s) ou recriar (n)? [s/n]: ").lower()
-            
-            if choice == 'n':
-                print(f"🗑️ Deletando índice existente...")
-                pc.delete_index(INDEX_NAME)
-                time.sleep(10)
-                print("✅ Índice deletado!")
+        # Verificar se o índice já existe
+        try:
+            if VECTOR_BACKEND == "local":
+                index_exists = LocalVectorStore(str(Path(LOCAL_VECTOR_DIR) / INDEX_NAME)).exists()
             else:
-                print("✅ Usando índice existente!")
+                pc = Pinecone(api_key=PINECONE_API_KEY)
+                index_exists = INDEX_NAME in [index.name for index in pc.list_indexes()]
+            
+            if index_exists:
+                print(f"\n📋 Índice '{INDEX_NAME}' já existe ({VECTOR_BACKEND})!")
+                choice = input("Deseja usar o existente (s) ou recriar (n)? [s/n]: ").lower()
+            
+                if choice == 'n':
+                    print("🗑️ O índice será recriado do zero!")
+                    incremental = False
+                else:
+                    print("✅ Usando índice existente (apenas mudanças serão enviadas)!")
                 
-    except Exception as e:
-        print(f"⚠️ Erro ao verificar índices: {e}")
+        except Exception as e:
+            print(f"⚠️ Erro ao verificar índices: {e}")
     
     try:
         # Criar processador
-        processor = DocumentProcessor(OPENAI_API_KEY, PINECONE_API_KEY)
+        processor = DocumentProcessor(
+            OPENAI_API_KEY, PINECONE_API_KEY,
+            cache_dir=CACHE_DIR,
+            cache_max_entries=CACHE_MAX_ENTRIES,
+            embedding_batch_size=EMBEDDING_BATCH_SIZE,
+            max_in_flight=EMBEDDING_MAX_IN_FLIGHT,
+            requests_per_minute=OPENAI_RPM,
+            tokens_per_minute=OPENAI_TPM,
+            vector_backend=VECTOR_BACKEND,
+            local_store_dir=LOCAL_VECTOR_DIR,
+            vector_quantization=VECTOR_QUANTIZATION,
+            include_patterns=DOCUMENT_INCLUDE,
+            exclude_patterns=DOCUMENT_EXCLUDE,
+            load_window_size=int(LOAD_WINDOW_MB * 1024 * 1024),
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
+            chunk_length_unit=CHUNK_LENGTH_UNIT,
+            chunk_workers=CHUNK_WORKERS,
+            dedup_threshold=NEAR_DUP_THRESHOLD,
+            upsert_max_in_flight=UPSERT_MAX_IN_FLIGHT,
+            upsert_batch_bytes=int(UPSERT_BATCH_MB * 1_000_000),
+            pinecone_host=PINECONE_HOST
+        )
+        
+        if args.resume:
+            processor.resume_dead_letters(INDEX_NAME)
+            return
         
         # Executar processo completo
-        processor.process_documents_to_pinecone(DOCUMENTS_FOLDER, INDEX_NAME)
+        processor.process_documents(DOCUMENTS_FOLDER, INDEX_NAME, incremental=incremental)
         
         print(f"\n🎯 PRÓXIMOS PASSOS:")
-        print("1. ✅ Seus documentos estão no Pinecone!")
+        print(f"1. ✅ Seus documentos estão no banco vetorial ({VECTOR_BACKEND})!")
         print("2. 🤖 Agora você pode criar o chatbot")
         print("3. 💬 Use busca semântica para responder perguntas")
         print(f"4. 📋 Índice criado: {INDEX_NAME}")
-        print(f"5. 🌐 Host Pinecone: {os.getenv('PINECONE_HOST', 'Auto-detectado')}")
+        if VECTOR_BACKEND == "pinecone":
+            print(f"5. 🌐 Host Pinecone: {os.getenv('PINECONE_HOST', 'Auto-detectado')}")
         
     except Exception as e:
         print(f"❌ Erro durante o processo: {e}")
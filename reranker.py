@@ -0,0 +1,160 @@
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from lexical_index import BM25Index, tokenize
+
+
+class LexicalScorer:
+    """
+    Score local e barato de relevância pergunta × trecho
+
+    Combina a cobertura dos termos da pergunta no trecho, ponderada pelo IDF
+    do corpus (nomes, números e termos raros pesam mais), com a cobertura
+    de pares de termos consecutivos, que favorece trechos com a mesma
+    expressão da pergunta.
+    """
+
+    def __init__(self, lexical_index: Optional[BM25Index] = None, bigram_weight: float = 0.5):
+        """
+        Args:
+            lexical_index: Índice BM25 de onde vêm os IDFs (sem ele, pesos iguais)
+            bigram_weight: Peso da cobertura de pares de termos
+        """
+        self.lexical_index = lexical_index
+        self.bigram_weight = bigram_weight
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return np.zeros(len(texts), dtype=np.float32)
+        terms = set(query_tokens)
+        weights = self.lexical_index.idf(list(terms)) if self.lexical_index else dict.fromkeys(terms, 1.0)
+        total_weight = sum(weights.values()) or 1.0
+        bigrams = set(zip(query_tokens, query_tokens[1:]))
+
+        scores = np.empty(len(texts), dtype=np.float32)
+        for i, text in enumerate(texts):
+            tokens = tokenize(text)
+            present = terms.intersection(tokens)
+            coverage = sum(weights[term] for term in present) / total_weight
+            bigram_coverage = len(bigrams.intersection(zip(tokens, tokens[1:]))) / len(bigrams) if bigrams else 0.0
+            scores[i] = coverage + self.bigram_weight * bigram_coverage
+        return scores
+
+    def normalize(self, scores: np.ndarray) -> np.ndarray:
+        """Scores na escala usada pelo corte relativo (já são ≥ 0)"""
+        return scores
+
+
+class CrossEncoderScorer:
+    """
+    Score com um cross-encoder local (CPU), via sentence-transformers
+
+    Mais preciso que o score lexical, porém bem mais caro: use com um
+    orçamento de tempo. A dependência é opcional e só é importada aqui.
+    """
+
+    def __init__(self, model_name: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1", batch_size: int = 16):
+        """
+        Args:
+            model_name: Modelo cross-encoder (o padrão é multilíngue)
+            batch_size: Pares pergunta × trecho por inferência
+        """
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise ImportError("Instale sentence-transformers para usar o re-ranking com cross-encoder") from e
+        self.model = CrossEncoder(model_name, device="cpu")
+        self.batch_size = batch_size
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        pairs = [(query, text) for text in texts]
+        return np.asarray(self.model.predict(pairs, batch_size=self.batch_size), dtype=np.float32)
+
+    def normalize(self, scores: np.ndarray) -> np.ndarray:
+        """Logits (podem ser negativos) → probabilidade de relevância, para o corte relativo"""
+        return 0.5 * (1 + np.tanh(scores / 2))  # Sigmoide sem overflow em logits extremos
+
+
+class Reranker:
+    """
+    Reordenar candidatos recuperados em excesso antes de montar o prompt
+
+    Os candidatos são pontuados em lotes, na ordem da busca, até acabar o
+    orçamento de tempo; os que não couberem no orçamento mantêm a ordem
+    original, depois dos pontuados. No fim ficam os `top_k` melhores.
+
+    O corte relativo (`min_relative_score`) é opcional e separado do
+    re-ranking: descarta, entre os `top_k`, os trechos com score abaixo
+    dessa fração do melhor, para mandar menos trechos ao modelo. A
+    comparação usa os scores normalizados do scorer (`normalize`), já que
+    os logits de um cross-encoder podem ser negativos.
+    """
+
+    def __init__(self, scorer, batch_size: int = 16, time_budget: float = 0.2,
+                 min_relative_score: float = 0.0):
+        """
+        Args:
+            scorer: Objeto com `score(query, texts) -> np.ndarray`
+            batch_size: Candidatos pontuados por lote
+            time_budget: Tempo máximo de re-ranking por pergunta (segundos)
+            min_relative_score: Fração do melhor score (normalizado) abaixo da qual o trecho
+                é descartado (0 = sem corte)
+        """
+        self.scorer = scorer
+        self.batch_size = batch_size
+        self.time_budget = time_budget
+        self.min_relative_score = min_relative_score
+
+    def rerank(self, query: str, matches: List[Dict], top_k: int) -> List[Dict]:
+        """
+        Args:
+            query: Pergunta do usuário
+            matches: Candidatos {"id", "score", "metadata"} na ordem da busca
+            top_k: Quantidade máxima de trechos devolvidos
+
+        Returns:
+            Candidatos reordenados, com o score do re-ranking em "rerank_score"
+        """
+        if not matches:
+            return []
+        start = time.perf_counter()
+        texts = [match["metadata"].get("text", "") for match in matches]
+        scores = np.full(len(matches), -np.inf, dtype=np.float32)
+        for i in range(0, len(matches), self.batch_size):
+            if i and time.perf_counter() - start > self.time_budget:
+                break
+            scores[i:i + self.batch_size] = self.scorer.score(query, texts[i:i + self.batch_size])
+
+        # Ordenação estável: empates e candidatos sem score mantêm a ordem da busca
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        # Candidatos sem score (orçamento estourado) ficam fora da normalização
+        scored = np.isfinite(scores)
+        cut_scores = np.zeros_like(scores)
+        cut_scores[scored] = self.scorer.normalize(scores[scored])
+        best = cut_scores[order[0]]
+        results = []
+        for i in order:
+            if (self.min_relative_score and np.isfinite(scores[i]) and best > 0
+                    and cut_scores[i] < self.min_relative_score * best):
+                continue
+            results.append({**matches[i], "rerank_score": float(scores[i]) if np.isfinite(scores[i]) else None})
+        return results
+
+
+def create_reranker(kind: str, lexical_index: Optional[BM25Index] = None, **kwargs) -> Reranker:
+    """
+    Criar o re-ranker pelo nome
+
+    Args:
+        kind: "lexical" ou "cross-encoder"
+        lexical_index: Índice BM25 usado pelo score lexical
+        **kwargs: Parâmetros do Reranker (batch_size, time_budget, min_relative_score)
+    """
+    if kind == "lexical":
+        return Reranker(LexicalScorer(lexical_index), **kwargs)
+    if kind == "cross-encoder":
+        return Reranker(CrossEncoderScorer(), **kwargs)
+    raise ValueError(f"Re-ranker desconhecido: {kind}")
@@ -0,0 +1,358 @@
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from answer_cache import AnswerCache
+from chunk_store import ChunkStore
+from dedup import NearDuplicateIndex
+from lexical_index import BM25Index
+from query_embedder import QueryEmbedder
+from reranker import Reranker
+from vector_store import VectorStore
+
+SYSTEM_PROMPT = (
+    "Você é o NeuroChat, um assistente que responde perguntas sobre os documentos indexados. "
+    "Use apenas o contexto fornecido; se a resposta não estiver nele, diga que não encontrou "
+    "a informação nos documentos. Responda em português, de forma clara e objetiva, e cite "
+    "os arquivos de origem quando for útil."
+)
+
+
+def format_citation(metadata: Dict) -> str:
+    """Nome do arquivo e, quando conhecidas, as páginas do trecho (e das suas cópias)"""
+    citations = [_single_citation(source) for source in [metadata, *metadata.get("also_in", [])]]
+    return "; ".join(citations)
+
+
+def _single_citation(metadata: Dict) -> str:
+    citation = metadata.get("filename", "desconhecido")
+    first_page, last_page = metadata.get("page_start"), metadata.get("page_end")
+    if first_page is None:
+        return citation
+    if last_page is None or last_page == first_page:
+        return f"{citation}, p. {int(first_page)}"
+    return f"{citation}, pp. {int(first_page)}-{int(last_page)}"
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Combinar rankings pela soma de 1 / (k + posição)
+
+    Returns:
+        Lista de (ID, score) em ordem decrescente de score
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for position, item_id in enumerate(ranking, 1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + position)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class RAGRetriever:
+    """
+    Caminho de consulta do RAG: embedding da pergunta → busca → geração
+
+    Não guarda estado por usuário, então uma única instância (com seus
+    clientes e conexões) pode ser compartilhada por todas as sessões.
+    """
+
+    def __init__(self, openai_client, store: VectorStore,
+                 embedding_model: str = "text-embedding-3-small",
+                 chat_model: str = "gpt-4o-mini", top_k: int = 5,
+                 max_context_chars: int = 8000, temperature: float = 0.2,
+                 answer_cache: Optional[AnswerCache] = None,
+                 query_embedder: Optional[QueryEmbedder] = None,
+                 lexical_index: Optional[BM25Index] = None, hybrid_candidates: int = 4,
+                 rrf_k: int = 60, embedding_timeout: Optional[float] = None,
+                 reranker: Optional[Reranker] = None, rerank_candidates: int = 50,
+                 duplicate_index: Optional[NearDuplicateIndex] = None,
+                 chunk_store: Optional[ChunkStore] = None):
+        """
+        Args:
+            openai_client: Cliente OpenAI
+            store: Banco vetorial com os chunks indexados
+            embedding_model: Modelo de embedding (o mesmo da ingestão)
+            chat_model: Modelo usado para gerar a resposta
+            top_k: Chunks recuperados por pergunta
+            max_context_chars: Limite de caracteres do contexto enviado ao modelo
+            temperature: Temperatura da geração
+            answer_cache: Cache de respostas consultado antes da busca (opcional)
+            query_embedder: Cache e micro-lotes de embeddings de perguntas (opcional)
+            lexical_index: Índice BM25 para a busca híbrida (opcional)
+            hybrid_candidates: Candidatos de cada busca por resultado, antes da fusão
+            rrf_k: Constante da reciprocal rank fusion
+            embedding_timeout: Tempo máximo do embedding da pergunta; com índice
+                lexical, ao estourar a busca segue só pelo BM25
+            reranker: Re-ranking local dos candidatos antes do prompt (opcional)
+            rerank_candidates: Candidatos buscados para o re-ranking
+            duplicate_index: Quase duplicados removidos na ingestão, para citar todas as
+                fontes de cada trecho (opcional)
+            chunk_store: Textos e metadados completos dos chunks, lidos depois da busca
+                (sem ele, vale o texto guardado nos metadados do vetor)
+        """
+        self.openai_client = openai_client
+        self.store = store
+        self.embedding_model = embedding_model
+        self.chat_model = chat_model
+        self.top_k = top_k
+        self.max_context_chars = max_context_chars
+        self.temperature = temperature
+        self.answer_cache = answer_cache
+        self.query_embedder = query_embedder
+        self.lexical_index = lexical_index
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
+        self.embedding_timeout = embedding_timeout
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
+        self.duplicate_index = duplicate_index
+        self.chunk_store = chunk_store
+
+    def embed_query(self, question: str) -> List[float]:
+        """Gerar o embedding da pergunta"""
+        if self.query_embedder is not None:
+            return self.query_embedder.embed(question, timeout=self.embedding_timeout)
+        response = self.openai_client.embeddings.create(model=self.embedding_model, input=[question],
+                                                        timeout=self.embedding_timeout)
+        return response.data[0].embedding
+
+    def _embed_for_search(self, question: str) -> Optional[List[float]]:
+        """Embedding da pergunta, ou None (busca só lexical) se a API falhar"""
+        try:
+            return self.embed_query(question)
+        except Exception as e:
+            if self.lexical_index is None:
+                raise
+            print(f"⚠️ Embedding indisponível ({type(e).__name__}): usando só a busca lexical")
+            return None
+
+    def search(self, question: str, embedding: Optional[List[float]],
+               top_k: Optional[int] = None, filenames: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Buscar os chunks para uma pergunta já convertida em embedding
+
+        Com índice lexical, os rankings vetorial e BM25 são combinados por
+        reciprocal rank fusion (e o score passa a ser o da fusão). Com
+        re-ranker, `rerank_candidates` candidatos são buscados e reordenados.
+        Com `filenames`, a busca fica restrita aos chunks desses arquivos:
+        a vetorial só pontua os vetores deles (pré-filtro no banco) e o BM25
+        só acumula scores dos chunks deles. Trechos desses arquivos removidos
+        como quase duplicados entram pelo chunk canônico que os representa,
+        citado pela cópia do escopo (a fonte do canônico vai para "also_in").
+
+        Returns:
+            Lista de {"id", "score", "metadata"} em ordem decrescente de relevância
+        """
+        top_k = top_k or self.top_k
+        if filenames is not None:
+            filenames = list(filenames)
+        if self.reranker is None:
+            matches = self._with_chunk_texts(self._candidates(question, embedding, top_k, filenames))
+        else:
+            candidates = self._candidates(question, embedding, max(top_k, self.rerank_candidates), filenames)
+            matches = self.reranker.rerank(question, self._with_chunk_texts(candidates), top_k)
+        return self._with_duplicate_sources(matches, filenames)
+    
+    def _with_chunk_texts(self, matches: List[Dict]) -> List[Dict]:
+        """Completar os metadados enxutos dos vetores com texto e metadados do chunk store"""
+        if self.chunk_store is None or not matches:
+            return matches
+        stored = self.chunk_store.get_many([match["id"] for match in matches])
+        return [
+            {**match, "metadata": {**match["metadata"], **stored[match["id"]]}} if match["id"] in stored else match
+            for match in matches
+        ]
+    
+    def _with_duplicate_sources(self, matches: List[Dict],
+                                filenames: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Acrescentar em "also_in" as fontes dos quase duplicados de cada trecho
+
+        Numa busca restrita a `filenames`, um canônico de outro arquivo é
+        citado pela sua cópia dentro do escopo, e a fonte dele vai para "also_in".
+        """
+        if self.duplicate_index is None:
+            return matches
+        self.duplicate_index.refresh()
+        fields = NearDuplicateIndex.CITATION_FIELDS
+        results = []
+        for match in matches:
+            metadata = match["metadata"]
+            citations = self.duplicate_index.citations(match["id"])
+            in_scope = [citation for citation in citations
+                        if filenames is not None and citation.get("filename") in filenames]
+            if in_scope and metadata.get("filename") not in filenames:
+                source = in_scope[0]
+                own = {field: metadata[field] for field in fields if field in metadata}
+                citations = [own] + [citation for citation in citations if citation is not source]
+                metadata = {**{key: value for key, value in metadata.items() if key not in fields}, **source}
+            if citations:
+                metadata = {**metadata, "also_in": citations}
+            results.append({**match, "metadata": metadata})
+        return results
+
+    def _scope_ids(self, filenames: Optional[Sequence[str]]) -> List[str]:
+        """Chunks canônicos dos trechos deduplicados dos arquivos do escopo"""
+        if filenames is None or self.duplicate_index is None:
+            return []
+        self.duplicate_index.refresh()
+        return self.duplicate_index.canonical_ids(filenames)
+
+    def _candidates(self, question: str, embedding: Optional[List[float]], top_k: int,
+                    filenames: Optional[Sequence[str]] = None) -> List[Dict]:
+        """Busca vetorial ou híbrida dos `top_k` primeiros candidatos"""
+        scope_ids = self._scope_ids(filenames)
+        if self.lexical_index is None:
+            return self.store.query(embedding, top_k=top_k, filenames=filenames, ids=scope_ids)
+
+        candidates = top_k * self.hybrid_candidates
+        vector_matches = (self.store.query(embedding, top_k=candidates, filenames=filenames, ids=scope_ids)
+                          if embedding is not None else [])
+        self.lexical_index.refresh()
+        lexical_matches = self.lexical_index.search(question, top_k=candidates, filenames=filenames,
+                                                    ids=scope_ids)
+        fused = reciprocal_rank_fusion(
+            [[match["id"] for match in vector_matches], [chunk_id for chunk_id, _ in lexical_matches]],
+            k=self.rrf_k
+        )
+
+        metadata = {match["id"]: match["metadata"] for match in vector_matches}
+        missing = [chunk_id for chunk_id, _ in fused[:top_k * 2] if chunk_id not in metadata]
+        metadata.update(self.store.fetch_metadata(missing))
+
+        # Chunks que só existem no índice lexical (ex.: falharam no upsert) ficam de fora
+        return [
+            {"id": chunk_id, "score": score, "metadata": metadata[chunk_id]}
+            for chunk_id, score in fused if chunk_id in metadata
+        ][:top_k]
+
+    def retrieve(self, question: str, top_k: Optional[int] = None,
+                 filenames: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Buscar os chunks mais relevantes para a pergunta
+
+        Args:
+            question: Pergunta
+            top_k: Quantidade de trechos (padrão: `top_k` do retriever)
+            filenames: Restringir a busca a estes arquivos (None = todos)
+
+        Returns:
+            Lista de {"id", "score", "metadata"} em ordem decrescente de score
+        """
+        return self.search(question, self._embed_for_search(question), top_k, filenames)
+
+    def _uses_cache(self, top_k: Optional[int], filenames: Optional[Sequence[str]]) -> bool:
+        """O cache de respostas só vale para o top_k padrão e buscas em todos os documentos"""
+        return self.answer_cache is not None and top_k in (None, self.top_k) and filenames is None
+
+    def _lookup_cache(self, question: str, top_k: Optional[int],
+                      filenames: Optional[Sequence[str]] = None) -> Tuple[Optional[Dict], Optional[List[float]]]:
+        """Consultar o cache de respostas"""
+        if not self._uses_cache(top_k, filenames):
+            return None, self._embed_for_search(question)
+        return self.answer_cache.lookup(question, self._embed_for_search)
+
+    def _store_answer(self, question: str, embedding: Optional[List[float]], answer: str,
+                      matches: List[Dict], latency: float, top_k: Optional[int],
+                      filenames: Optional[Sequence[str]] = None):
+        if self._uses_cache(top_k, filenames) and answer and embedding:
+            self.answer_cache.put(question, embedding, answer, matches, latency)
+
+    def build_messages(self, question: str, matches: List[Dict]) -> List[Dict]:
+        """Montar o prompt com os trechos recuperados como contexto"""
+        parts = []
+        used = 0
+        for i, match in enumerate(matches, 1):
+            metadata = match["metadata"]
+            text = metadata.get("text", "")
+            if used + len(text) > self.max_context_chars and parts:
+                break
+            used += len(text)
+            parts.append(f"[{i}] ({format_citation(metadata)})\n{text}")
+
+        context = "\n\n".join(parts) if parts else "(nenhum trecho encontrado)"
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Contexto:\n{context}\n\nPergunta: {question}"},
+        ]
+
+    def generate(self, question: str, matches: List[Dict]) -> str:
+        """Gerar a resposta a partir dos trechos recuperados"""
+        response = self.openai_client.chat.completions.create(
+            model=self.chat_model,
+            messages=self.build_messages(question, matches),
+            temperature=self.temperature
+        )
+        return response.choices[0].message.content or ""
+
+    def generate_stream(self, question: str, matches: List[Dict]) -> Iterator[str]:
+        """Gerar a resposta token a token (streaming da API)"""
+        stream = self.openai_client.chat.completions.create(
+            model=self.chat_model,
+            messages=self.build_messages(question, matches),
+            temperature=self.temperature,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def answer_stream(self, question: str, top_k: Optional[int] = None,
+                      on_sources: Optional[Callable[[List[Dict]], None]] = None,
+                      filenames: Optional[Sequence[str]] = None) -> Iterator[str]:
+        """
+        Responder uma pergunta em streaming
+
+        A busca acontece antes do primeiro token; `on_sources` recebe os
+        trechos recuperados assim que ela termina, antes de a geração começar.
+        Respostas em cache são devolvidas de uma vez, sem busca nem geração.
+        Com `filenames`, a resposta usa só trechos desses arquivos.
+        """
+        start = time.perf_counter()
+        cached, embedding = self._lookup_cache(question, top_k, filenames)
+        if cached is not None:
+            if on_sources is not None:
+                on_sources(cached["sources"])
+            yield cached["answer"]
+            return
+
+        matches = self.search(question, embedding, top_k, filenames)
+        if on_sources is not None:
+            on_sources(matches)
+        tokens = []
+        for token in self.generate_stream(question, matches):
+            tokens.append(token)
+            yield token
+        self._store_answer(question, embedding, "".join(tokens), matches,
+                           time.perf_counter() - start, top_k, filenames)
+
+    def answer(self, question: str, top_k: Optional[int] = None,
+               filenames: Optional[Sequence[str]] = None) -> Dict:
+        """
+        Responder uma pergunta
+
+        Args:
+            question: Pergunta
+            top_k: Quantidade de trechos (padrão: `top_k` do retriever)
+            filenames: Restringir a busca a estes arquivos (None = todos)
+
+        Returns:
+            {"answer", "sources", "timings", "cached"} com os tempos de busca e geração
+        """
+        start = time.perf_counter()
+        cached, embedding = self._lookup_cache(question, top_k, filenames)
+        if cached is not None:
+            elapsed = time.perf_counter() - start
+            return {"answer": cached["answer"], "sources": cached["sources"],
+                    "timings": {"retrieval": elapsed, "generation": 0.0}, "cached": True}
+
+        matches = self.search(question, embedding, top_k, filenames)
+        retrieved = time.perf_counter()
+        answer = self.generate(question, matches)
+        finished = time.perf_counter()
+        self._store_answer(question, embedding, answer, matches, finished - start, top_k, filenames)
+        return {
+            "answer": answer,
+            "sources": matches,
+            "timings": {"retrieval": retrieved - start, "generation": finished - retrieved},
+            "cached": False,
+        }
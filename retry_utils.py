@@ -0,0 +1,86 @@
+import random
+import time
+from typing import Any, Callable, List, Sequence, Tuple
+
+
+def backoff_delay(attempt: int, base_delay: float = 1.0, max_delay: float = 30.0) -> float:
+    """Atraso exponencial com jitter completo para a tentativa `attempt` (0, 1, 2...)"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Verificar se vale a pena repetir a chamada
+
+    Erros de conexão/timeout (sem status HTTP), 408, 429 e 5xx são transitórios.
+    Outros 4xx (ex.: entrada grande demais) só se resolvem dividindo o lote.
+    """
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    if not isinstance(status, int):
+        return True
+    return status in (408, 429) or status >= 500
+
+
+def is_splittable_error(error: Exception) -> bool:
+    """
+    Verificar se vale a pena dividir o lote depois de esgotar as tentativas
+
+    Um 429 (rate limit) não depende do tamanho do lote: dividir só
+    multiplicaria as requisições contra o mesmo limite.
+    """
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    return status != 429
+
+
+def retry_with_split(items: Sequence, send: Callable[[List], Any], max_attempts: int = 3,
+                     base_delay: float = 1.0, retryable: Callable[[Exception], bool] = is_retryable_error
+                     ) -> Tuple[List[Tuple[List, Any]], List[Tuple[Any, Exception]]]:
+    """
+    Enviar um lote com novas tentativas e divisão em metades quando falhar
+
+    Cada lote é tentado até `max_attempts` vezes com backoff exponencial.
+    Se continuar falhando, é dividido ao meio e cada metade é reenviada,
+    até isolar os itens que falham sozinhos. Erros que não dependem do
+    tamanho do lote (rate limit, ver `is_splittable_error`) fazem o lote
+    inteiro falhar, sem divisão.
+
+    Args:
+        items: Itens do lote (qualquer sequência fatiável)
+        send: Função que envia um sublote e devolve o resultado
+        max_attempts: Tentativas por sublote
+        base_delay: Atraso base do backoff (segundos)
+        retryable: Decide se um erro merece nova tentativa (ex.: sem os 429 que
+            `send` já repete por conta própria)
+
+    Returns:
+        (lista de (sublote, resultado) enviados, lista de (item, erro) que falharam)
+    """
+    successes = []
+    failures = []
+    # Sublotes são fatias de `items` (listas ou lotes colunares, sem virar lista de dicts)
+    pending = [items] if len(items) else []
+
+    while pending:
+        batch = pending.pop()
+        error = None
+
+        for attempt in range(max_attempts):
+            try:
+                successes.append((batch, send(batch)))
+                error = None
+                break
+            except Exception as e:
+                error = e
+                if not retryable(e) or attempt == max_attempts - 1:
+                    break
+                time.sleep(backoff_delay(attempt, base_delay))
+
+        if error is None:
+            continue
+        if len(batch) > 1 and is_splittable_error(error):
+            middle = len(batch) // 2
+            pending.extend([batch[middle:], batch[:middle]])
+        else:
+            failures.extend((item, error) for item in batch)
+
+    return successes, failures
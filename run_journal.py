@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from langchain.schema import Document
+
+from embedding_batch import EmbeddingBatch
+
+
+class RunJournal:
+    """
+    Diário de uma ingestão em andamento, para retomá-la após uma queda
+
+    Cada lote de chunks é identificado pelo hash dos seus IDs e conteúdos.
+    Quando os embeddings de um lote ficam prontos, eles são gravados num
+    segmento (`segments/<lote>.npz`) e o diário (`journal.jsonl`, só
+    acréscimos, com fsync a cada linha) registra o lote; quando o upsert
+    termina, o diário registra os IDs enviados e o segmento é apagado.
+
+    Uma execução reiniciada recalcula os mesmos lotes: os já enviados são
+    pulados, os que só tinham embeddings são lidos do segmento, e apenas
+    os demais voltam para a API. Ao fim da ingestão, a pasta é apagada.
+    """
+
+    def __init__(self, run_dir: str):
+        """
+        Args:
+            run_dir: Pasta do diário e dos segmentos (uma por índice)
+        """
+        self.run_dir = Path(run_dir)
+        self.path = self.run_dir / "journal.jsonl"
+        self.segments_dir = self.run_dir / "segments"
+        self._lock = threading.Lock()
+        self._reset()
+        if self.path.exists():
+            self._load()
+
+    def _reset(self):
+        self.started: Optional[Dict] = None
+        self.phases: List[str] = []
+        self.embedded: Dict[str, str] = {}  # Lote → segmento
+        self.upserted: Dict[str, List[str]] = {}  # Lote → IDs enviados
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # Última linha cortada pela queda
+                self._apply(event)
+
+    def _apply(self, event: Dict):
+        kind = event["event"]
+        if kind == "start":
+            self._reset()
+            self.started = event
+        elif kind == "phase":
+            self.phases.append(event["phase"])
+        elif kind == "embedded":
+            self.embedded[event["batch"]] = event["segment"]
+        elif kind == "upserted":
+            self.upserted[event["batch"]] = event["ids"]
+
+    def _append(self, event: Dict):
+        with self._lock:
+            self.run_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(event)
+
+    @staticmethod
+    def batch_key(chunks: List[Document]) -> str:
+        """Identificador de um lote: hash dos IDs e conteúdos dos chunks"""
+        digest = hashlib.sha256()
+        for chunk in chunks:
+            digest.update(chunk.metadata["chunk_id"].encode("utf-8") + b"\0")
+            digest.update(chunk.page_content.encode("utf-8") + b"\0")
+        return digest.hexdigest()
+
+    def in_progress(self) -> bool:
+        """Há uma ingestão interrompida para retomar?"""
+        return self.started is not None
+
+    def start(self, **info):
+        """Iniciar um diário novo (descartando o anterior, se houver)"""
+        if self.run_dir.exists():
+            shutil.rmtree(self.run_dir)
+        self._append({"event": "start", "started_at": time.time(), **info})
+
+    def complete_phase(self, phase: str):
+        if phase not in self.phases:
+            self._append({"event": "phase", "phase": phase})
+
+    def phase_done(self, phase: str) -> bool:
+        return phase in self.phases
+
+    def save_embeddings(self, key: str, batch: EmbeddingBatch):
+        """Gravar os embeddings de um lote antes de registrá-lo no diário"""
+        segment = f"{key[:32]}.npz"
+        batch.save(str(self.segments_dir / segment))
+        self._append({"event": "embedded", "batch": key, "segment": segment})
+
+    def load_embeddings(self, key: str) -> Optional[EmbeddingBatch]:
+        """Embeddings já gravados de um lote (ou None)"""
+        segment = self.embedded.get(key)
+        if segment is None or not (self.segments_dir / segment).exists():
+            return None
+        return EmbeddingBatch.load(str(self.segments_dir / segment))
+
+    def record_upsert(self, key: str, ids: List[str]):
+        """Registrar o upsert de um lote; o segmento deixa de ser necessário"""
+        self._append({"event": "upserted", "batch": key, "ids": ids})
+        segment = self.embedded.get(key)
+        if segment is not None:
+            (self.segments_dir / segment).unlink(missing_ok=True)
+
+    def uploaded_ids(self, key: str) -> Optional[List[str]]:
+        """IDs enviados de um lote já concluído (ou None)"""
+        return self.upserted.get(key)
+
+    def finish(self):
+        """Encerrar a ingestão: diário e segmentos são apagados"""
+        with self._lock:
+            if self.run_dir.exists():
+                shutil.rmtree(self.run_dir)
+            self._reset()
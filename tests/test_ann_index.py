@@ -0,0 +1,62 @@
+import numpy as np
+
+from ann_index import IVFIndex
+
+DIMENSION = 16
+
+
+def normalized(count, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((count, DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def brute_force(matrix, rows, query, top_k):
+    scores = matrix[rows] @ query
+    return rows[np.argsort(-scores)[:top_k]]
+
+
+def make_index(tmp_path, matrix, alive_rows):
+    index = IVFIndex(tmp_path, DIMENSION, nprobe=2)
+    index.train(matrix, alive_rows, capacity=len(matrix), nlist=8)
+    return index
+
+
+def test_full_nprobe_matches_brute_force(tmp_path):
+    matrix = normalized(400)
+    alive_rows = np.arange(0, 400, 3)  # Linhas livres entre as ocupadas
+    index = make_index(tmp_path, matrix, alive_rows)
+
+    for query in normalized(10, seed=1):
+        rows, scores = index.search(lambda rows: matrix[rows] @ query, query, top_k=10, nprobe=index.nlist)
+
+        assert rows.tolist() == brute_force(matrix, alive_rows, query, 10).tolist()
+        assert np.all(np.diff(scores) <= 0)
+
+
+def test_add_and_remove_update_postings(tmp_path):
+    matrix = normalized(200)
+    index = make_index(tmp_path, matrix, np.arange(100))
+    query = matrix[150]
+
+    index.add(np.array([150]), matrix[[150]])
+    index.remove(np.array([0, 1]))
+
+    candidates = index.probe(query, nprobe=index.nlist)
+    assert 150 in candidates and 0 not in candidates and 1 not in candidates
+    assert index.unassigned(np.arange(100, 200)).tolist() == [row for row in range(100, 200) if row != 150]
+
+
+def test_load_restores_lists_and_grows(tmp_path):
+    matrix = normalized(120)
+    index = make_index(tmp_path, matrix, np.arange(120))
+    query = normalized(1, seed=2)[0]
+
+    reopened = IVFIndex(tmp_path, DIMENSION)
+    assert reopened.load(capacity=200)
+    assert reopened.trained_count == 120 and reopened.nlist == index.nlist
+    assert reopened.probe(query, nprobe=3).tolist() == index.probe(query, nprobe=3).tolist()
+    # As linhas novas do arquivo maior começam sem lista
+    assert reopened.unassigned(np.arange(120, 200)).tolist() == list(range(120, 200))
+
+    reopened.drop()
+    assert not IVFIndex(tmp_path, DIMENSION).load(capacity=200)
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+import answer_cache
+from answer_cache import AnswerCache
+
+SOURCES = [{"filename": "a.txt", "page_start": 1}]
+
+
+def no_embedding(question):
+    raise AssertionError("acerto exato não deveria chamar a API de embedding")
+
+
+@pytest.fixture
+def now(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: clock[0])
+    return clock
+
+
+def test_exact_hit_ignores_case_accents_and_punctuation():
+    cache = AnswerCache()
+    cache.put("O que é um hábito?", [1.0, 0.0], "resposta", SOURCES, latency=2.0)
+
+    entry, embedding = cache.lookup("  o que E um HABITO ", no_embedding)
+
+    assert entry["answer"] == "resposta" and entry["sources"] == SOURCES
+    assert embedding == []
+    assert (cache.exact_hits, cache.semantic_hits, cache.lookups) == (1, 0, 1)
+    assert cache.saved_seconds > 1.9
+
+
+def test_semantic_hit_respects_threshold():
+    cache = AnswerCache(similarity_threshold=0.9)
+    cache.put("O que é um hábito?", [1.0, 0.0], "resposta", SOURCES, latency=1.0)
+
+    # cos = 0.95 e cos ≈ 0.71 (os embeddings são normalizados pelo cache)
+    entry, embedding = cache.lookup("Defina hábito", lambda question: [0.95, 0.3122499])
+    assert entry["answer"] == "resposta" and embedding == [0.95, 0.3122499]
+
+    entry, embedding = cache.lookup("Fale de metas", lambda question: [2.0, 2.0])
+    assert entry is None and embedding == [2.0, 2.0]
+
+    assert cache.lookup("Outra pergunta", lambda question: None) == (None, None)
+    assert (cache.exact_hits, cache.semantic_hits, cache.lookups) == (0, 1, 3)
+    assert cache.hit_rate() == pytest.approx(1 / 3)
+
+
+def test_entries_expire_after_ttl(now):
+    cache = AnswerCache(ttl_seconds=60)
+    cache.put("pergunta", [1.0, 0.0], "resposta", SOURCES, latency=1.0)
+
+    now[0] += 59
+    assert cache.lookup("pergunta", no_embedding)[0] is not None
+    now[0] += 2
+    assert cache.lookup("pergunta", lambda question: [1.0, 0.0]) == (None, [1.0, 0.0])
+    assert len(cache) == 0
+
+
+def test_evicts_least_recently_used():
+    cache = AnswerCache(max_entries=2)
+    cache.put("um", [1.0, 0.0], "1", SOURCES, latency=1.0)
+    cache.put("dois", [0.0, 1.0], "2", SOURCES, latency=1.0)
+    cache.lookup("um", no_embedding)
+
+    cache.put("tres", [-1.0, 0.0], "3", SOURCES, latency=1.0)
+
+    assert len(cache) == 2
+    assert cache.lookup("dois", lambda question: [0.0, -1.0])[0] is None
+    assert cache.lookup("um", no_embedding)[0]["answer"] == "1"
+    # A entrada descartada também sai da busca semântica
+    assert cache.lookup("segundo", lambda question: [0.0, 1.0])[0] is None
+
+
+def test_manifest_change_invalidates(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text("{}", encoding="utf-8")
+    cache = AnswerCache(manifest_path=str(manifest))
+    cache.put("pergunta", [1.0, 0.0], "resposta", SOURCES, latency=1.0)
+    assert cache.lookup("pergunta", no_embedding)[0] is not None
+
+    stat = manifest.stat()
+    os.utime(manifest, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cache.lookup("pergunta", lambda question: [1.0, 0.0]) == (None, [1.0, 0.0])
+    assert len(cache) == 0
+    # Depois de esvaziado, o cache volta a guardar respostas para o manifesto novo
+    cache.put("pergunta", [1.0, 0.0], "nova", SOURCES, latency=1.0)
+    assert cache.lookup("pergunta", no_embedding)[0]["answer"] == "nova"
@@ -0,0 +1,93 @@
+import json
+import sqlite3
+import zlib
+
+import numpy as np
+
+from chunk_store import ChunkStore, FILTERABLE_FIELDS
+from embedding_batch import EmbeddingBatch
+
+TEXT = "Pequenas melhorias diárias rendem juros compostos. " * 60  # Bem acima de 1000 caracteres
+
+
+def metadata(filename, i):
+    return {"filename": filename, "chunk_index": i, "page_start": i + 1, "page_end": i + 2,
+            "source": f"docs/{filename}", "total_chunks": 3}
+
+
+def make_store(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.sqlite"))
+    store.put_many([(f"{name}_{i}", f"{TEXT}{name} {i}", metadata(name, i))
+                    for name in ("a.txt", "sub/b.txt") for i in range(3)])
+    return store
+
+
+def test_round_trip_keeps_whole_text_compressed(tmp_path):
+    store = make_store(tmp_path)
+
+    chunk = store.get_many(["sub/b.txt_1"])["sub/b.txt_1"]
+
+    assert chunk == {**metadata("sub/b.txt", 1), "text": f"{TEXT}sub/b.txt 1"}
+    data = sqlite3.connect(store.path).execute("SELECT data FROM chunks WHERE id = 'sub/b.txt_1'").fetchone()[0]
+    assert json.loads(zlib.decompress(data))["text"] == chunk["text"]
+    assert len(data) < len(chunk["text"].encode("utf-8")) / 5
+
+
+def test_filterable_fields_are_columns(tmp_path):
+    store = make_store(tmp_path)
+    conn = sqlite3.connect(store.path)
+
+    row = conn.execute(f"SELECT {', '.join(FILTERABLE_FIELDS)}, data FROM chunks WHERE id = 'a.txt_2'").fetchone()
+
+    assert row[:-1] == ("a.txt", 2, 3, 4)
+    # Fora das colunas, o registro comprimido guarda só o resto dos metadados
+    assert json.loads(zlib.decompress(row[-1]))["metadata"] == {"source": "docs/a.txt", "total_chunks": 3}
+
+
+def test_missing_fields_stay_missing(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.sqlite"))
+
+    store.put_many([("c.txt_0", "texto", {"filename": "c.txt", "chunk_index": 0})])
+
+    assert store.get_many(["c.txt_0"])["c.txt_0"] == {"filename": "c.txt", "chunk_index": 0, "text": "texto"}
+
+
+def test_delete_by_id_and_by_file(tmp_path):
+    store = make_store(tmp_path)
+
+    store.delete(["a.txt_0", "inexistente"])
+    store.delete_files(["sub/b.txt", "ausente.txt"])
+
+    assert len(store) == 2
+    assert set(store.get_many([f"{name}_{i}" for name in ("a.txt", "sub/b.txt") for i in range(3)])) == \
+        {"a.txt_1", "a.txt_2"}
+
+
+def test_put_batch_and_lookups_beyond_parameter_limit(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.sqlite"))
+    count = 1200
+    batch = EmbeddingBatch.from_rows([f"a.txt_{i}" for i in range(count)], np.zeros((count, 2), dtype=np.float32),
+                                     [f"trecho {i}" for i in range(count)],
+                                     [{"filename": "a.txt", "chunk_index": i} for i in range(count)])
+
+    store.put_batch(batch)
+    chunks = store.get_many(batch.ids)
+
+    assert len(chunks) == count
+    assert chunks["a.txt_700"]["text"] == "trecho 700" and chunks["a.txt_700"]["chunk_index"] == 700
+
+
+def test_old_database_gains_columns(tmp_path):
+    path = tmp_path / "chunks.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE chunks (id TEXT PRIMARY KEY, data BLOB NOT NULL)")
+    payload = json.dumps({"text": "antigo", "metadata": metadata("a.txt", 0)}).encode("utf-8")
+    conn.execute("INSERT INTO chunks VALUES (?, ?)", ("a.txt_0", zlib.compress(payload)))
+    conn.commit()
+    conn.close()
+
+    store = ChunkStore(str(path))
+
+    assert store.get_many(["a.txt_0"])["a.txt_0"] == {**metadata("a.txt", 0), "text": "antigo"}
+    store.delete_files(["a.txt"])
+    assert len(store) == 0
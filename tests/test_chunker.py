@@ -0,0 +1,60 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from chunker import DEFAULT_SEPARATORS, TextChunker
+
+text_splitter = pytest.importorskip("langchain.text_splitter")
+
+BOOK = Path(__file__).resolve().parent.parent / "output" / "habitos-atomicos-by-james-clear-z-liborg.txt"
+
+
+def langchain_chunks(text, chunk_size, chunk_overlap):
+    splitter = text_splitter.RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+        length_function=len, separators=list(DEFAULT_SEPARATORS))
+    return splitter.split_text(text)
+
+
+def random_text(seed, length=20_000):
+    # Mistura de parágrafos, linhas, frases, espaços repetidos e palavras longas
+    rng = random.Random(seed)
+    pieces = ["\n\n", "\n", ". ", " ", "  ", "ação", "hábito", "x" * 150, "fim.", "\t", "é"]
+    weights = [2, 4, 6, 30, 2, 15, 15, 1, 5, 1, 10]
+    return "".join(rng.choices(pieces, weights, k=length // 4))
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(1000, 200), (300, 0), (120, 119), (50, 10)])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_matches_langchain_splitter(seed, chunk_size, chunk_overlap):
+    text = random_text(seed)
+
+    assert TextChunker(chunk_size, chunk_overlap).split_text(text) == \
+        langchain_chunks(text, chunk_size, chunk_overlap)
+
+
+@pytest.mark.parametrize("text", ["", "   \n\n  ", "curto", "a" * 2500, "\n\n".join(["parágrafo"] * 300)])
+def test_matches_langchain_splitter_edge_cases(text):
+    assert TextChunker(1000, 200).split_text(text) == langchain_chunks(text, 1000, 200)
+
+
+@pytest.mark.skipif(not BOOK.exists(), reason="livro de exemplo ausente")
+def test_matches_langchain_splitter_on_book():
+    text = BOOK.read_text(encoding="utf-8")[:200_000]
+
+    assert TextChunker(1000, 200).split_text(text) == langchain_chunks(text, 1000, 200)
+
+
+def test_ranges_point_into_original_text():
+    text = random_text(4)
+
+    ranges = TextChunker(400, 50).split(text)
+
+    assert ranges == sorted(ranges)
+    assert [text[start:end] for start, end in ranges] == TextChunker(400, 50).split_text(text)
+
+
+def test_rejects_overlap_larger_than_chunk():
+    with pytest.raises(ValueError):
+        TextChunker(100, 200)
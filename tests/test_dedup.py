@@ -0,0 +1,69 @@
+from dedup import NearDuplicateIndex
+
+PARAGRAPH = ("O hábito é o investimento em você mesmo que rende juros compostos ao longo do tempo, "
+             "e pequenas melhorias diárias acabam produzindo resultados notáveis.")
+OTHER = "Um texto completamente diferente, sobre sistemas de recuperação e bancos vetoriais locais."
+
+
+def citation(filename, page):
+    return {"filename": filename, "page_start": page, "page_end": page}
+
+
+def make_index(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "dedup.npz"), threshold=0.8)
+    assert index.add("a.txt_0", PARAGRAPH, citation("a.txt", 1)) is None
+    assert index.add("a.txt_1", OTHER, citation("a.txt", 2)) is None
+    assert index.add("b.txt_0", PARAGRAPH, citation("b.txt", 5)) == "a.txt_0"
+    assert index.add("c.txt_0", PARAGRAPH + " ", citation("c.txt", 7)) == "a.txt_0"
+    return index
+
+
+def test_duplicates_cite_their_sources(tmp_path):
+    index = make_index(tmp_path)
+
+    assert index.is_duplicate("b.txt_0") and not index.is_duplicate("a.txt_0")
+    assert index.citations("a.txt_0") == [citation("b.txt", 5), citation("c.txt", 7)]
+    assert index.canonical_ids(["b.txt"]) == ["a.txt_0"]
+    assert index.canonical_ids(["a.txt"]) == []
+
+
+def test_remove_canonical_returns_orphans(tmp_path):
+    index = make_index(tmp_path)
+
+    orphans = index.remove(["a.txt_0"])
+
+    assert orphans == ["b.txt_0", "c.txt_0"]
+    assert not index.is_duplicate("b.txt_0") and not index.is_duplicate("c.txt_0")
+    assert index.citations("a.txt_0") == []
+    # O canônico saiu dos buckets: o texto volta a ser novo
+    assert index.add("b.txt_0", PARAGRAPH, citation("b.txt", 5)) is None
+    assert index.add("c.txt_0", PARAGRAPH + " ", citation("c.txt", 7)) == "b.txt_0"
+
+
+def test_remove_skips_orphans_removed_together(tmp_path):
+    index = make_index(tmp_path)
+
+    assert index.remove(["a.txt_0", "b.txt_0"]) == ["c.txt_0"]
+
+
+def test_remove_duplicate_keeps_canonical(tmp_path):
+    index = make_index(tmp_path)
+
+    assert index.remove(["b.txt_0"]) == []
+    assert index.citations("a.txt_0") == [citation("c.txt", 7)]
+    assert index.remove(["inexistente"]) == []
+
+
+def test_save_and_refresh(tmp_path):
+    index = make_index(tmp_path)
+    index.save()
+
+    reader = NearDuplicateIndex(str(tmp_path / "dedup.npz"), threshold=0.8)
+    assert len(reader) == 2
+    assert reader.citations("a.txt_0") == index.citations("a.txt_0")
+
+    index.remove(["a.txt_0"])
+    index.save()
+    reader.refresh()
+    assert reader.citations("a.txt_0") == []
+    assert len(reader) == 1
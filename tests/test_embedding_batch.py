@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from embedding_batch import EmbeddingBatch
+
+
+def make_batch(n=5, dimension=4):
+    ids = [f"livro.txt_{i}" for i in range(n)]
+    vectors = np.arange(n * dimension, dtype=np.float32).reshape(n, dimension)
+    texts = [f"trecho {i} com acentuação" for i in range(n)]
+    metadatas = [{"filename": "livro.txt", "source": "docs/livro.txt", "total_chunks": n,
+                  "chunk_index": i, "page_start": i // 2 + 1} for i in range(n)]
+    return EmbeddingBatch.from_rows(ids, vectors, texts, metadatas)
+
+
+def test_records_round_trip_metadata():
+    batch = make_batch()
+
+    record = batch[2]
+    assert record["id"] == "livro.txt_2"
+    assert record["values"] == [8.0, 9.0, 10.0, 11.0]
+    assert record["metadata"] == {"filename": "livro.txt", "source": "docs/livro.txt", "total_chunks": 5,
+                                  "chunk_id": "livro.txt_2", "chunk_index": 2, "page_start": 2,
+                                  "text": "trecho 2 com acentuação"}
+    # Metadados comuns ficam internados uma única vez
+    assert len(batch.metadata_pool) == 1
+
+
+def test_slice_shares_buffers():
+    batch = make_batch()
+
+    part = batch[1:4]
+    assert len(part) == 3
+    assert part.ids == ["livro.txt_1", "livro.txt_2", "livro.txt_3"]
+    assert part.text_buffer is batch.text_buffer
+    assert np.shares_memory(part.vectors, batch.vectors)
+    assert [part.text(i) for i in range(3)] == [batch.text(i) for i in range(1, 4)]
+    assert part.records() == batch.records()[1:4]
+    assert len(batch[4:2]) == 0
+
+
+def test_slice_rejects_step():
+    with pytest.raises(ValueError):
+        make_batch()[::2]
+
+
+def test_save_load_round_trip(tmp_path):
+    batch = make_batch()
+    path = tmp_path / "lote.npz"
+
+    batch.save(str(path))
+    loaded = EmbeddingBatch.load(str(path))
+
+    assert loaded.ids == batch.ids
+    assert loaded.vectors.dtype == np.float32
+    np.testing.assert_array_equal(loaded.vectors, batch.vectors)
+    assert loaded.records() == batch.records()
+    assert not list(tmp_path.glob(".*.tmp.npz"))
+
+
+def test_save_slice_keeps_only_its_rows(tmp_path):
+    part = make_batch()[2:4].select_metadata(["filename", "chunk_index"])
+    path = tmp_path / "fatia.npz"
+
+    part.save(str(path))
+    loaded = EmbeddingBatch.load(str(path))
+
+    assert loaded.ids == ["livro.txt_2", "livro.txt_3"]
+    assert len(loaded.text_buffer) == loaded.text_offsets[-1]
+    assert loaded.text(0) == "trecho 2 com acentuação"
+    assert loaded.fields == ("filename", "chunk_index")
+    assert loaded.records() == part.records()
+
+
+def test_concat_matches_original():
+    batch = make_batch()
+
+    joined = EmbeddingBatch.concat([batch[:2], batch[2:2], batch[2:]])
+
+    assert joined.records() == batch.records()
@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from embedding_cache import EmbeddingCache
+
+MODEL = "text-embedding-3-small"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_entries=3)
+    yield cache
+    cache.close()
+
+
+def test_round_trip_and_counters(cache):
+    cache.put_many(MODEL, ["a", "b"], [[0.5, 1.0], [2.0, -1.0]])
+
+    assert cache.get_many(MODEL, ["a", "x", "b"]) == [[0.5, 1.0], None, [2.0, -1.0]]
+    assert cache.get_many("outro-modelo", ["a"]) == [None]
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert cache.hit_rate() == 0.5
+
+
+def test_evicts_least_recently_used(cache):
+    cache.put_many(MODEL, ["a", "b", "c"], [[1.0], [2.0], [3.0]])
+    cache.get_many(MODEL, ["a"])
+
+    cache.put_many(MODEL, ["d"], [[4.0]])
+
+    assert len(cache) == 3
+    assert cache.get_many(MODEL, ["a", "b", "c", "d"]) == [[1.0], None, [3.0], [4.0]]
+
+
+def test_counters_are_exact_under_concurrency(cache):
+    cache.put_many(MODEL, ["a"], [[1.0]])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: cache.get_many(MODEL, ["a", "x"] * 50), range(200)))
+
+    assert (cache.hits, cache.misses) == (200 * 50, 200 * 50)
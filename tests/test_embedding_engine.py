@@ -0,0 +1,147 @@
+import random
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import embedding_engine
+from embedding_engine import ConcurrentEmbedder, TokenBucket
+
+
+class FakeClock:
+    """Relógio controlado pelo teste: `sleep` só avança o tempo"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+        self._lock = threading.Lock()
+
+    def monotonic(self):
+        with self._lock:
+            return self.now
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("429 Too Many Requests")
+        self.response = SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+
+class FakeEmbeddings:
+    """Embedding = [posição do texto]; devolve os itens embaralhados como a API pode fazer"""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def create(self, model, input):
+        with self._lock:
+            self.calls.append(list(input))
+            if self.failures:
+                raise self.failures.pop(0)
+        data = [SimpleNamespace(index=i, embedding=[float(text)]) for i, text in enumerate(input)]
+        random.shuffle(data)
+        return SimpleNamespace(data=data)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(embedding_engine.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(embedding_engine.time, "sleep", clock.sleep)
+    return clock
+
+
+def make_embedder(embeddings, **options):
+    return ConcurrentEmbedder(SimpleNamespace(embeddings=embeddings), "modelo", verbose=False, **options)
+
+
+def test_results_keep_input_order(clock):
+    embeddings = FakeEmbeddings()
+    texts = [str(i) for i in range(103)]
+    finished = []
+
+    results = make_embedder(embeddings, batch_size=10, max_in_flight=4).embed(
+        texts, on_batch=lambda positions, vectors: finished.extend(zip(positions, vectors)))
+
+    assert results == [[float(i)] for i in range(103)]
+    assert sorted(finished) == [(i, [float(i)]) for i in range(103)]
+    assert len(embeddings.calls) == 11
+
+
+def test_rate_limit_backs_off_and_retries(clock):
+    embeddings = FakeEmbeddings([RateLimitError(retry_after="7"), RateLimitError()])
+    embedder = make_embedder(embeddings, batch_size=10)
+
+    results = embedder.embed(["1", "2"])
+
+    assert results == [[1.0], [2.0]]
+    assert embedder.rate_limited == 2
+    assert len(embeddings.calls) == 3
+    # Retry-After de 7 s, depois backoff de 2 s (segunda tentativa) a taxa reduzida
+    assert clock.now >= 7 + 2
+    assert embedder.limiter.rate_factor < 1.0
+
+
+def test_exhausted_rate_limit_fails_whole_batch(clock):
+    embeddings = FakeEmbeddings([RateLimitError()] * 3)
+    failed = []
+
+    results = make_embedder(embeddings, batch_size=10, max_rate_limit_retries=2).embed(
+        ["1", "2"], on_failure=lambda positions, error: failed.append((positions, error.status_code)))
+
+    assert results == [None, None]
+    assert failed == [([0, 1], 429)]
+    assert len(embeddings.calls) == 3  # Sem dividir o lote
+
+
+def admitted_per_window(times, window):
+    return max(sum(1 for t in times if start <= t < start + window) for start in times)
+
+
+def test_bucket_respects_request_budget(clock):
+    bucket = TokenBucket(requests_per_minute=60, tokens_per_minute=10**9, burst_seconds=5)
+    times = []
+
+    for _ in range(50):
+        bucket.acquire(1)
+        times.append(clock.now)
+
+    # 1 requisição/s mais a rajada de 5 s
+    assert admitted_per_window(times, 10) <= 10 + 5
+    assert times[-1] >= 50 - 5 - 1e-9
+
+
+def test_bucket_respects_token_budget(clock):
+    bucket = TokenBucket(requests_per_minute=10**6, tokens_per_minute=6000, burst_seconds=1)
+    spent = []
+
+    for _ in range(40):
+        bucket.acquire(50)
+        spent.append((clock.now, 50))
+
+    # 100 tokens/s com rajada de 100 tokens
+    assert clock.now >= (40 * 50 - 100) / 100 - 1e-9
+    for start, _ in spent:
+        assert sum(tokens for t, tokens in spent if start <= t < start + 5) <= 5 * 100 + 100
+
+
+def test_penalize_pauses_and_reward_recovers(clock):
+    bucket = TokenBucket(requests_per_minute=6000, tokens_per_minute=10**9)
+
+    bucket.penalize(3)
+    bucket.acquire(1)
+
+    assert clock.now >= 3
+    assert bucket.rate_factor == 0.5
+    for _ in range(20):
+        bucket.reward()
+    assert bucket.rate_factor == 1.0
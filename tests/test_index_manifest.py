@@ -0,0 +1,54 @@
+from index_manifest import IndexManifest
+
+
+def hashes(*texts):
+    return [IndexManifest.chunk_hash(text) for text in texts]
+
+
+def test_diff_chunks_new_file_is_all_changed(tmp_path):
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+
+    assert manifest.diff_chunks("livro.txt", hashes("a", "b", "c")) == ([0, 1, 2], [])
+
+
+def test_diff_chunks_reports_edits_and_growth(tmp_path):
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+    manifest.update_file("livro.txt", "h1", hashes("a", "b", "c"))
+
+    assert manifest.diff_chunks("livro.txt", hashes("a", "b", "c")) == ([], [])
+    assert manifest.diff_chunks("livro.txt", hashes("a", "B", "c", "d")) == ([1, 3], [])
+
+
+def test_diff_chunks_shrunk_file_has_stale_ids(tmp_path):
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+    manifest.update_file("livro.txt", "h1", hashes("a", "b", "c", "d"))
+
+    changed, stale = manifest.diff_chunks("livro.txt", hashes("a", "x"))
+
+    assert changed == [1]
+    assert stale == ["livro.txt_2", "livro.txt_3"]
+
+
+def test_diff_chunks_retries_failed_chunks(tmp_path):
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+    # Chunks que falharam ficam sem hash e voltam a ser enviados
+    manifest.update_file("livro.txt", None, [hashes("a")[0], None])
+
+    assert manifest.diff_chunks("livro.txt", hashes("a", "b")) == ([1], [])
+
+    manifest.set_chunk_hash("livro.txt", 1, hashes("b")[0])
+    assert manifest.diff_chunks("livro.txt", hashes("a", "b")) == ([], [])
+
+
+def test_save_and_reload(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    manifest = IndexManifest(path)
+    manifest.update_file("livro.txt", "h1", hashes("a", "b"))
+    manifest.update_file("apagado.txt", "h2", hashes("c"))
+    manifest.save()
+
+    reloaded = IndexManifest(path)
+
+    assert reloaded.diff_files({"livro.txt": "h1", "novo.txt": "h3"}) == (["novo.txt"], ["apagado.txt"])
+    assert reloaded.diff_chunks("livro.txt", hashes("a", "b")) == ([], [])
+    assert reloaded.stale_ids("apagado.txt") == ["apagado.txt_0"]
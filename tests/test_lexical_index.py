@@ -0,0 +1,98 @@
+import numpy as np
+
+from lexical_index import BM25Index, tokenize
+
+A_TEXTS = ["Hábitos atômicos rendem juros compostos", "Pequenas melhorias diárias"]
+B_TEXTS = ["Sistemas vencem metas", "Juros compostos do conhecimento", "Identidade antes de resultados"]
+
+
+def make_index(tmp_path):
+    index = BM25Index(str(tmp_path / "lexical.npz"))
+    index.set_file("a.txt", "h1", ["a.txt_0", "a.txt_1"], A_TEXTS)
+    index.set_file("b.txt", "h2", ["b.txt_0", "b.txt_1", "b.txt_2"], B_TEXTS)
+    index.commit()
+    return index
+
+
+def postings(index):
+    """Listas invertidas como {termo: {documento: frequência}}"""
+    return {
+        term: {index.doc_ids[doc]: int(tf) for doc, tf in zip(
+            index._post_docs[index._offsets[i]:index._offsets[i + 1]],
+            index._post_tfs[index._offsets[i]:index._offsets[i + 1]])}
+        for i, term in enumerate(index.terms)
+    }
+
+
+def expected_postings(files):
+    expected = {}
+    for ids, texts in files:
+        for doc_id, text in zip(ids, texts):
+            for token in tokenize(text):
+                expected.setdefault(token, {}).setdefault(doc_id, 0)
+                expected[token][doc_id] += 1
+    return expected
+
+
+def test_remove_file_rebuilds_postings_and_prunes_terms(tmp_path):
+    index = make_index(tmp_path)
+    assert {doc_id for doc_id, _ in index.search("juros compostos")} == {"a.txt_0", "b.txt_1"}
+
+    index.remove_file("a.txt")
+    index.commit()
+
+    assert index.doc_ids == ["b.txt_0", "b.txt_1", "b.txt_2"]
+    assert index.files == ["b.txt"] and not index.needs_update("b.txt", "h2")
+    assert postings(index) == expected_postings([(index.doc_ids, B_TEXTS)])
+    assert sorted(index.terms) == sorted(index._term_index) and "atomic" not in index._term_index
+    assert [doc_id for doc_id, _ in index.search("juros hábitos")] == ["b.txt_1"]
+    assert index.search("atômicos") == []
+
+
+def test_replace_file_keeps_other_files(tmp_path):
+    index = make_index(tmp_path)
+
+    index.set_file("a.txt", "h3", ["a.txt_0"], ["Metas diárias"])
+    index.commit()
+
+    assert index.doc_ids == ["b.txt_0", "b.txt_1", "b.txt_2", "a.txt_0"]
+    assert postings(index) == expected_postings([(index.doc_ids[:3], B_TEXTS), (["a.txt_0"], ["Metas diárias"])])
+    assert index.needs_update("a.txt", "h1") and not index.needs_update("a.txt", "h3")
+
+
+def test_filenames_mask_scores_only_scoped_chunks(tmp_path):
+    index = make_index(tmp_path)
+
+    assert [doc_id for doc_id, _ in index.search("juros", filenames=["b.txt"])] == ["b.txt_1"]
+    assert index.search("melhorias", filenames=["b.txt"]) == []
+    assert [doc_id for doc_id, _ in index.search("melhorias juros", filenames=["b.txt"], ids=["a.txt_1"])] == \
+        ["a.txt_1", "b.txt_1"]
+    assert index.search("juros", filenames=[]) == []
+    # O IDF continua sendo o do corpus inteiro
+    scoped = dict(index.search("juros", filenames=["b.txt"]))
+    assert np.isclose(scoped["b.txt_1"], dict(index.search("juros"))["b.txt_1"])
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = make_index(tmp_path)
+
+    reopened = BM25Index(str(tmp_path / "lexical.npz"))
+
+    assert reopened.doc_ids == index.doc_ids and reopened.terms == index.terms
+    assert reopened.file_hashes == {"a.txt": "h1", "b.txt": "h2"}
+    assert postings(reopened) == postings(index)
+    assert reopened.search("juros compostos", top_k=5) == index.search("juros compostos", top_k=5)
+
+    index.remove_file("b.txt")
+    index.commit()
+    reopened.refresh()
+    assert reopened.doc_ids == ["a.txt_0", "a.txt_1"]
+
+
+def test_staged_terms_are_not_searchable_before_commit(tmp_path):
+    index = make_index(tmp_path)
+
+    index.set_file("c.txt", "h4", ["c.txt_0"], ["Vocabulário inédito"])
+
+    assert index.search("inédito") == []
+    assert index.idf(["inedit"])["inedit"] == index.idf(["ausente"])["ausente"]
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from quantization import ProductQuantizer, QuantizedVectors, ScalarQuantizer
+
+DIMENSION = 16
+
+
+def normalized(count, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((count, DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_int8_error_within_half_step():
+    vectors = normalized(500)
+    quantizer = ScalarQuantizer(DIMENSION)
+    quantizer.train(vectors)
+
+    error = np.abs(quantizer.decode(quantizer.encode(vectors)) - vectors)
+
+    assert np.all(error <= quantizer.scale / 2 + 1e-6)
+    query = normalized(1, seed=1)[0]
+    assert np.allclose(quantizer.scorer(query)(quantizer.encode(vectors)),
+                       quantizer.decode(quantizer.encode(vectors)) @ query, atol=1e-5)
+
+
+def test_pq_reconstruction_error_is_bounded():
+    vectors = normalized(2000)
+    quantizer = ProductQuantizer(DIMENSION, m=4, ksub=64)
+    quantizer.train(vectors)
+
+    codes = quantizer.encode(vectors)
+    error = np.linalg.norm(quantizer.decode(codes) - vectors, axis=1)
+
+    assert codes.shape == (2000, 4) and codes.dtype == np.uint8
+    # Vetores unitários: erro médio bem abaixo da norma e cada código é o centróide mais próximo
+    assert error.mean() < 0.5
+    shifted = (codes.astype(np.int64) + 1) % quantizer.ksub
+    assert np.all(np.linalg.norm(quantizer.decode(shifted.astype(np.uint8)) - vectors, axis=1) >= error - 1e-6)
+    query = normalized(1, seed=1)[0]
+    assert np.allclose(quantizer.scorer(query)(codes), quantizer.decode(codes) @ query, atol=1e-5)
+
+
+def test_pq_small_sample_is_exact():
+    # Menos vetores que centróides: cada pedaço vira o próprio centróide
+    vectors = normalized(10)
+    quantizer = ProductQuantizer(DIMENSION, m=4, ksub=256)
+    quantizer.train(vectors)
+
+    assert np.allclose(quantizer.decode(quantizer.encode(vectors)), vectors, atol=1e-6)
+
+
+@pytest.mark.parametrize("kind", ["int8", "pq"])
+def test_save_and_load_round_trip(tmp_path, kind):
+    matrix = normalized(300)
+    alive_rows = np.arange(250)
+    vectors = QuantizedVectors(tmp_path, kind, DIMENSION, pq_subspaces=4)
+    vectors.train(matrix, alive_rows, capacity=300)
+    query = normalized(1, seed=1)[0]
+
+    reopened = QuantizedVectors(tmp_path, kind, DIMENSION, pq_subspaces=4)
+    assert reopened.load(capacity=400)
+    assert reopened.trained_count == 250
+    assert np.array_equal(reopened.scorer(query)(alive_rows), vectors.scorer(query)(alive_rows))
+    assert np.array_equal(reopened.prefix_scorer(query, 250, block=64)(), vectors.scorer(query)(alive_rows))
+
+
+def test_load_rejects_other_pq_parameters(tmp_path):
+    QuantizedVectors(tmp_path, "pq", DIMENSION, pq_subspaces=4).train(normalized(300), np.arange(300), capacity=300)
+
+    with pytest.raises(ValueError, match="m=4"):
+        ProductQuantizer(DIMENSION, m=8).restore(dict(np.load(tmp_path / "quantizer_pq.npz")))
+
+    reopened = QuantizedVectors(tmp_path, "pq", DIMENSION, pq_subspaces=8)
+    assert not reopened.load(capacity=300)
+    assert not reopened.is_trained
+    # Códigos incompatíveis saem do disco para o próximo treino
+    assert not (tmp_path / "codes_pq.bin").exists()
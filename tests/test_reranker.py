@@ -0,0 +1,57 @@
+import time
+import warnings
+
+import numpy as np
+
+from reranker import CrossEncoderScorer, LexicalScorer, Reranker
+
+
+class FakeLogitScorer:
+    """Logits fixos por texto, normalizados como os do cross-encoder"""
+
+    normalize = CrossEncoderScorer.normalize
+
+    def __init__(self, logits, delay=0.0):
+        self.logits = logits
+        self.delay = delay
+        self.calls = 0
+
+    def score(self, query, texts):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return np.array([self.logits[text] for text in texts], dtype=np.float32)
+
+
+def matches(*texts):
+    return [{"id": text, "score": 1.0, "metadata": {"text": text}} for text in texts]
+
+
+def test_lexical_rerank_prefers_covering_passage():
+    reranker = Reranker(LexicalScorer())
+
+    results = reranker.rerank("juros compostos", matches("sem relação", "juros compostos do hábito"), top_k=2)
+
+    assert [result["id"] for result in results] == ["juros compostos do hábito", "sem relação"]
+
+
+def test_relative_cut_uses_normalized_logits():
+    scorer = FakeLogitScorer({"a": 4.0, "b": 3.0, "c": -3.0})
+
+    results = Reranker(scorer, min_relative_score=0.5).rerank("q", matches("c", "b", "a"), top_k=3)
+
+    assert [result["id"] for result in results] == ["a", "b"]
+
+
+def test_unscored_candidates_skip_normalization():
+    # Orçamento estourado depois do primeiro lote: os demais ficam com -inf
+    scorer = FakeLogitScorer({"a": -200.0, "b": 1.0, "c": 2.0}, delay=0.01)
+    reranker = Reranker(scorer, batch_size=1, time_budget=0.0, min_relative_score=0.5)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        results = reranker.rerank("q", matches("a", "b", "c"), top_k=3)
+
+    assert scorer.calls == 1
+    assert [result["id"] for result in results] == ["a", "b", "c"]
+    assert [result["rerank_score"] for result in results] == [-200.0, None, None]
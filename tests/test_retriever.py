@@ -0,0 +1,45 @@
+import numpy as np
+
+from dedup import NearDuplicateIndex
+from retriever import RAGRetriever, format_citation
+from vector_store import LocalVectorStore
+
+DIMENSION = 8
+TEXT = ("O hábito é o investimento em você mesmo que rende juros compostos ao longo do tempo, "
+        "e pequenas melhorias diárias acabam produzindo resultados notáveis.")
+
+
+def make_retriever(tmp_path):
+    """a.txt_0 é canônico; sub/b.txt_0 é quase duplicado dele e não tem vetor"""
+    store = LocalVectorStore(str(tmp_path / "indice"), dimension=DIMENSION)
+    store.setup()
+    vectors = np.eye(DIMENSION, dtype=np.float32)
+    store.upsert([
+        {"id": "a.txt_0", "values": vectors[0].tolist(), "metadata": {"filename": "a.txt", "page_start": 1}},
+        {"id": "a.txt_1", "values": vectors[1].tolist(), "metadata": {"filename": "a.txt", "page_start": 2}},
+        {"id": "sub/b.txt_1", "values": vectors[2].tolist(), "metadata": {"filename": "sub/b.txt"}},
+    ])
+    dedup = NearDuplicateIndex(str(tmp_path / "dedup.npz"), threshold=0.8)
+    dedup.add("a.txt_0", TEXT, {"filename": "a.txt"})
+    dedup.add("sub/b.txt_0", TEXT, {"filename": "sub/b.txt", "page_start": 9, "page_end": 9})
+    return RAGRetriever(None, store, top_k=3, duplicate_index=dedup), vectors[0].tolist()
+
+
+def test_unscoped_search_cites_duplicates(tmp_path):
+    retriever, embedding = make_retriever(tmp_path)
+
+    best = retriever.search("hábito", embedding)[0]
+
+    assert best["id"] == "a.txt_0"
+    assert best["metadata"]["filename"] == "a.txt"
+    assert format_citation(best["metadata"]) == "a.txt, p. 1; sub/b.txt, p. 9"
+
+
+def test_scoped_search_cites_in_scope_copy(tmp_path):
+    retriever, embedding = make_retriever(tmp_path)
+
+    matches = retriever.search("hábito", embedding, filenames=["sub/b.txt"])
+
+    assert [match["id"] for match in matches] == ["a.txt_0", "sub/b.txt_1"]
+    assert {match["metadata"]["filename"] for match in matches} == {"sub/b.txt"}
+    assert format_citation(matches[0]["metadata"]) == "sub/b.txt, p. 9; a.txt, p. 1"
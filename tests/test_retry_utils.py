@@ -0,0 +1,82 @@
+import pytest
+
+import retry_utils
+from dead_letter import DeadLetterQueue
+from retry_utils import retry_with_split
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(retry_utils.time, "sleep", lambda seconds: None)
+
+
+def test_split_isolates_poisoned_item():
+    calls = []
+
+    def send(batch):
+        calls.append(list(batch))
+        if "veneno" in batch:
+            raise HTTPError(400)
+        return len(batch)
+
+    items = ["a", "b", "c", "veneno", "d", "e", "f", "g"]
+    successes, failures = retry_with_split(items, send, max_attempts=2)
+
+    assert sorted(item for batch, _ in successes for item in batch) == sorted(set(items) - {"veneno"})
+    assert [(item, error.status_code) for item, error in failures] == [("veneno", 400)]
+    # 400 não é transitório: uma tentativa por sublote, dividindo até sobrar o item
+    assert calls.count(["veneno"]) == 1
+    assert len(calls) == 7
+
+
+def test_transient_errors_are_retried_before_splitting():
+    errors = [HTTPError(503), HTTPError(503)]
+
+    def send(batch):
+        if errors:
+            raise errors.pop(0)
+        return list(batch)
+
+    successes, failures = retry_with_split([1, 2, 3], send, max_attempts=3)
+
+    assert successes == [([1, 2, 3], [1, 2, 3])] and failures == []
+
+
+def test_rate_limit_fails_batch_without_splitting():
+    calls = []
+
+    def send(batch):
+        calls.append(batch)
+        raise HTTPError(429)
+
+    successes, failures = retry_with_split([1, 2, 3, 4], send, max_attempts=2)
+
+    assert successes == [] and [item for item, _ in failures] == [1, 2, 3, 4]
+    assert len(calls) == 2
+
+
+def test_dead_letter_round_trip(tmp_path):
+    queue = DeadLetterQueue(str(tmp_path / "filas" / "dead_letter.jsonl"))
+    chunk = {"id": "a.txt_0", "text": "olá, mundo", "metadata": {"filename": "a.txt"}}
+
+    queue.add([chunk, {"id": "a.txt_1", "text": "x", "metadata": {}}], "embed", HTTPError(400))
+    queue.add([{**chunk, "values": [0.5, 0.25]}], "upsert", HTTPError(503))
+
+    # Uma linha por registro; na leitura o mais recente vence para cada ID
+    assert len((tmp_path / "filas" / "dead_letter.jsonl").read_text(encoding="utf-8").splitlines()) == 3
+    records = {record["id"]: record for record in DeadLetterQueue(queue.path).load()}
+    assert len(queue) == 2
+    assert records["a.txt_0"]["stage"] == "upsert" and records["a.txt_0"]["values"] == [0.5, 0.25]
+    assert records["a.txt_0"]["text"] == "olá, mundo" and records["a.txt_0"]["error"] == "HTTP 503"
+    assert records["a.txt_1"]["stage"] == "embed"
+
+    queue.discard(["a.txt_0"])
+    assert [record["id"] for record in queue.load()] == ["a.txt_1"]
+    queue.clear()
+    assert queue.load() == [] and not (tmp_path / "filas" / "dead_letter.jsonl").exists()
@@ -0,0 +1,72 @@
+import numpy as np
+from langchain.schema import Document
+
+from embedding_batch import EmbeddingBatch
+from run_journal import RunJournal
+
+
+def make_batch(ids):
+    return EmbeddingBatch.from_rows(ids, np.ones((len(ids), 3), dtype=np.float32),
+                                    [f"texto {chunk_id}" for chunk_id in ids],
+                                    [{"filename": "livro.txt"} for _ in ids])
+
+
+def test_batch_key_depends_on_ids_and_content():
+    chunks = [Document(page_content="a", metadata={"chunk_id": "livro.txt_0"}),
+              Document(page_content="b", metadata={"chunk_id": "livro.txt_1"})]
+
+    key = RunJournal.batch_key(chunks)
+
+    assert key == RunJournal.batch_key([Document(page_content=c.page_content, metadata=dict(c.metadata))
+                                        for c in chunks])
+    assert key != RunJournal.batch_key(chunks[:1])
+    assert key != RunJournal.batch_key([chunks[0], Document(page_content="c", metadata=chunks[1].metadata)])
+
+
+def test_resume_restores_progress(tmp_path):
+    journal = RunJournal(str(tmp_path / "run"))
+    journal.start(incremental=False)
+    journal.complete_phase("setup")
+    journal.save_embeddings("lote1", make_batch(["livro.txt_0", "livro.txt_1"]))
+    journal.record_upsert("lote1", ["livro.txt_0", "livro.txt_1"])
+    journal.save_embeddings("lote2", make_batch(["livro.txt_2"]))
+
+    resumed = RunJournal(str(tmp_path / "run"))
+
+    assert resumed.in_progress()
+    assert resumed.started["incremental"] is False
+    assert resumed.phase_done("setup")
+    assert resumed.uploaded_ids("lote1") == ["livro.txt_0", "livro.txt_1"]
+    assert resumed.uploaded_ids("lote2") is None
+    # O segmento de um lote já enviado é apagado; o pendente é relido
+    assert resumed.load_embeddings("lote1") is None
+    assert resumed.load_embeddings("lote2").records() == make_batch(["livro.txt_2"]).records()
+
+
+def test_resume_ignores_truncated_last_line(tmp_path):
+    journal = RunJournal(str(tmp_path / "run"))
+    journal.start(incremental=True)
+    journal.record_upsert("lote1", ["livro.txt_0"])
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"event": "upserted", "batch": "lote2", "ids": ["livro.t')
+
+    resumed = RunJournal(str(tmp_path / "run"))
+
+    assert resumed.in_progress()
+    assert resumed.uploaded_ids("lote1") == ["livro.txt_0"]
+    assert resumed.uploaded_ids("lote2") is None
+
+
+def test_start_and_finish_discard_previous_run(tmp_path):
+    journal = RunJournal(str(tmp_path / "run"))
+    journal.start(incremental=True)
+    journal.save_embeddings("lote1", make_batch(["livro.txt_0"]))
+
+    journal.start(incremental=False)
+    assert journal.load_embeddings("lote1") is None
+    assert RunJournal(str(tmp_path / "run")).started["incremental"] is False
+
+    journal.finish()
+    assert not journal.in_progress()
+    assert not (tmp_path / "run").exists()
+    assert not RunJournal(str(tmp_path / "run")).in_progress()
@@ -0,0 +1,107 @@
+import threading
+
+import numpy as np
+import pytest
+
+import retry_utils
+from chunk_store import ChunkStore
+from dead_letter import DeadLetterQueue
+from embedding_batch import EmbeddingBatch
+from rag_system import DocumentProcessor
+from upsert_engine import ConcurrentUpserter
+
+DIMENSION = 8
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+class FakeStore:
+    """Banco vetorial em memória que recusa os lotes com IDs envenenados"""
+
+    payload_bytes_per_value = 22
+
+    def __init__(self, poisoned=()):
+        self.poisoned = set(poisoned)
+        self.vectors = {}
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors):
+        with self._lock:
+            self.requests.append(list(vectors.ids))
+        if self.poisoned & set(vectors.ids):
+            raise BadRequest("vetor inválido")
+        with self._lock:
+            self.vectors.update((record["id"], record) for record in vectors)
+
+
+def make_batch(count=40, seed=0):
+    rng = np.random.default_rng(seed)
+    texts = ["x" * int(size) for size in rng.integers(10, 3000, size=count)]
+    return EmbeddingBatch.from_rows(
+        [f"a.txt_{i}" for i in range(count)], rng.standard_normal((count, DIMENSION)).astype(np.float32), texts,
+        [{"filename": "a.txt", "chunk_index": i} for i in range(count)])
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(retry_utils.time, "sleep", lambda seconds: None)
+
+
+@pytest.mark.parametrize("max_batch_bytes, max_batch_size", [(10_000, 1000), (4_000, 1000), (10**9, 7), (100, 5)])
+def test_plan_respects_payload_and_count_limits(max_batch_bytes, max_batch_size):
+    batch = make_batch()
+    sizes = batch.payload_sizes(FakeStore.payload_bytes_per_value)
+    upserter = ConcurrentUpserter(max_batch_bytes=max_batch_bytes, max_batch_size=max_batch_size, verbose=False)
+
+    ranges = upserter.plan(batch, FakeStore.payload_bytes_per_value)
+
+    # Intervalos contíguos cobrindo o lote inteiro
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(batch)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+    for start, end in ranges:
+        assert end - start <= max_batch_size
+        # Um vetor maior que o limite vai sozinho
+        assert sizes[start:end].sum() <= max_batch_bytes or end - start == 1
+    # Cada sublote está cheio: o próximo vetor estouraria um dos limites
+    for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+        assert sizes[start:end + 1].sum() > max_batch_bytes or end - start == max_batch_size
+
+
+def test_plan_empty_batch():
+    assert ConcurrentUpserter(verbose=False).plan(EmbeddingBatch.empty(DIMENSION), 22) == []
+
+
+def test_upsert_sends_everything_in_parallel():
+    batch = make_batch()
+    store = FakeStore()
+
+    sent_ids = ConcurrentUpserter(max_batch_bytes=10_000, verbose=False).upsert(store, batch)
+
+    assert sorted(sent_ids) == sorted(batch.ids) and set(store.vectors) == set(batch.ids)
+    assert len(store.requests) > 1
+
+
+def test_upsert_failures_reach_dead_letter_queue(tmp_path):
+    batch = make_batch()
+    store = FakeStore(poisoned=["a.txt_3", "a.txt_17"])
+    processor = DocumentProcessor("sk-teste", cache_dir=str(tmp_path), vector_backend="local",
+                                  upsert_batch_bytes=10_000)
+    processor.upserter.verbose = False
+    dead_letters = DeadLetterQueue(str(tmp_path / "dead_letter.jsonl"))
+    chunk_store = ChunkStore(str(tmp_path / "chunks.sqlite"))
+
+    sent_ids = processor._upsert_batch(store, batch, dead_letters, chunk_store)
+
+    assert sorted(sent_ids) == sorted(set(batch.ids) - {"a.txt_3", "a.txt_17"})
+    records = {record["id"]: record for record in dead_letters.load()}
+    assert set(records) == {"a.txt_3", "a.txt_17"}
+    # O dead-letter guarda o registro completo (texto e vetor), pronto para o resume
+    record = records["a.txt_3"]
+    assert record["stage"] == "upsert" and record["error"] == "vetor inválido"
+    assert record["text"] == batch.text(3)
+    assert np.allclose(record["values"], batch.vectors[3])
+    # O banco recebeu só os campos filtráveis; o texto ficou no ChunkStore
+    assert "text" not in store.vectors["a.txt_0"]["metadata"]
@@ -0,0 +1,130 @@
+import threading
+
+import numpy as np
+import pytest
+
+from vector_store import LocalVectorStore
+
+DIMENSION = 16
+FILES = ("a.txt", "b.txt", "c.txt")
+
+
+def records(count=300, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, DIMENSION)).astype(np.float32)
+    return [{"id": f"{FILES[i % len(FILES)]}_{i}", "values": vectors[i].tolist(),
+             "metadata": {"filename": FILES[i % len(FILES)], "chunk_index": i}}
+            for i in range(count)]
+
+
+def expected_ids(items, query, top_k, filenames=(), ids=()):
+    """Top-k por força bruta entre os vetores do escopo"""
+    scoped = [item for item in items if item["metadata"]["filename"] in filenames or item["id"] in ids]
+    matrix = np.array([item["values"] for item in scoped], dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    order = np.argsort(-(matrix @ (query / np.linalg.norm(query))))[:top_k]
+    return [scoped[i]["id"] for i in order]
+
+
+def make_store(tmp_path, items, **options):
+    store = LocalVectorStore(str(tmp_path / "indice"), dimension=DIMENSION, initial_capacity=16, **options)
+    store.setup()
+    store.upsert(items)
+    return store
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"ann_min_vectors": 50, "ann_nprobe": 1},
+    {"quantization": "int8", "rerank_factor": 8},
+    {"quantization": "pq", "ann_min_vectors": 50, "ann_nprobe": 1, "rerank_factor": 8},
+], ids=["exata", "ivf", "int8", "pq+ivf"])
+def test_query_filenames_scores_only_scoped_rows(tmp_path, options):
+    items = records()
+    store = make_store(tmp_path, items, **options)
+    store.optimize()
+    query = np.random.default_rng(1).standard_normal(DIMENSION).astype(np.float32)
+
+    results = store.query(query.tolist(), top_k=5, filenames=["b.txt"])
+
+    assert {result["metadata"]["filename"] for result in results} == {"b.txt"}
+    if not options.get("quantization"):
+        assert [result["id"] for result in results] == expected_ids(items, query, 5, filenames=["b.txt"])
+
+
+def test_query_filenames_includes_extra_ids(tmp_path):
+    items = records()
+    store = make_store(tmp_path, items)
+    query = np.asarray(items[0]["values"], dtype=np.float32)  # a.txt_0
+
+    results = store.query(query.tolist(), top_k=4, filenames=["b.txt"], ids=["a.txt_0", "inexistente"])
+
+    assert results[0]["id"] == "a.txt_0"
+    assert [result["id"] for result in results] == expected_ids(items, query, 4, ["b.txt"], ["a.txt_0"])
+
+
+def test_query_filenames_after_delete_and_reuse(tmp_path):
+    items = records(30)
+    store = make_store(tmp_path, items)
+    b_ids = [item["id"] for item in items if item["metadata"]["filename"] == "b.txt"]
+
+    store.delete(b_ids)
+    assert store.query(items[1]["values"], top_k=5, filenames=["b.txt"]) == []
+
+    # As linhas liberadas voltam a ser usadas por outro arquivo
+    store.upsert([{"id": "d.txt_0", "values": items[1]["values"], "metadata": {"filename": "d.txt"}}])
+    assert [result["id"] for result in store.query(items[1]["values"], top_k=5, filenames=["d.txt"])] == ["d.txt_0"]
+    assert store.query(items[1]["values"], top_k=5, filenames=["b.txt"]) == []
+
+
+def test_query_filenames_empty_scope(tmp_path):
+    store = make_store(tmp_path, records(30))
+
+    assert store.query(records(1)[0]["values"], top_k=5, filenames=[]) == []
+    assert store.query(records(1)[0]["values"], top_k=5, filenames=["ausente.txt"]) == []
+    assert len(store.query(records(1)[0]["values"], top_k=5)) == 5
+
+
+def test_query_filenames_survives_reopen(tmp_path):
+    items = records(60)
+    make_store(tmp_path, items)._close()
+    store = LocalVectorStore(str(tmp_path / "indice"), dimension=DIMENSION)
+    query = np.asarray(items[2]["values"], dtype=np.float32)
+
+    results = store.query(query.tolist(), top_k=3, filenames=["c.txt", "a.txt"])
+
+    assert [result["id"] for result in results] == expected_ids(items, query, 3, ["c.txt", "a.txt"])
+
+
+def test_query_scans_outside_the_lock(tmp_path):
+    items = records(30)
+    store = make_store(tmp_path, items)
+    scanning, release = threading.Event(), threading.Event()
+
+    class SlowMatrix:
+        """Memmap que para na primeira leitura até o teste liberar"""
+
+        def __init__(self, matrix):
+            self.matrix = matrix
+
+        def __len__(self):
+            return len(self.matrix)
+
+        def __getitem__(self, index):
+            scanning.set()
+            release.wait(5)
+            return self.matrix[index]
+
+    store._matrix = SlowMatrix(store._matrix)
+    results = []
+    worker = threading.Thread(target=lambda: results.extend(store.query(items[0]["values"], top_k=3)))
+    worker.start()
+    try:
+        assert scanning.wait(5)
+        # Com uma consulta parada na varredura, o lock continua livre para as demais
+        assert store._lock.acquire(timeout=1)
+        store._lock.release()
+    finally:
+        release.set()
+        worker.join(5)
+    assert results[0]["id"] == items[0]["id"]
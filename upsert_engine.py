@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from embedding_batch import EmbeddingBatch
+from retry_utils import retry_with_split
+
+
+class ConcurrentUpserter:
+    """
+    Upserts em paralelo, com lotes dimensionados pelo tamanho do payload
+
+    O lote de embeddings é dividido em sublotes que cabem em `max_batch_bytes`
+    (estimado a partir da dimensão, do texto e dos metadados de cada vetor)
+    e em `max_batch_size` vetores. Até `max_in_flight` sublotes são enviados
+    ao mesmo tempo, cada um com novas tentativas e divisão ao meio quando
+    falha, como no embedding.
+    """
+
+    def __init__(self, max_in_flight: int = 4, max_batch_bytes: int = 2_000_000,
+                 max_batch_size: int = 1000, verbose: bool = True):
+        """
+        Args:
+            max_in_flight: Upserts simultâneos
+            max_batch_bytes: Tamanho máximo (estimado) de cada requisição
+            max_batch_size: Vetores por requisição
+            verbose: Mostrar o progresso de cada sublote
+        """
+        self.max_in_flight = max_in_flight
+        self.max_batch_bytes = max_batch_bytes
+        self.max_batch_size = max_batch_size
+        self.verbose = verbose
+
+    def plan(self, batch: EmbeddingBatch, bytes_per_value: int) -> List[Tuple[int, int]]:
+        """
+        Dividir o lote em intervalos de linhas que respeitam os limites
+
+        Args:
+            batch: Lote de embeddings
+            bytes_per_value: Bytes de cada valor do vetor no payload do banco
+
+        Returns:
+            Intervalos (início, fim) de cada sublote
+        """
+        ranges = []
+        start = 0
+        total = 0
+        for i, size in enumerate(batch.payload_sizes(bytes_per_value)):
+            if i > start and (total + size > self.max_batch_bytes or i - start >= self.max_batch_size):
+                ranges.append((start, i))
+                start, total = i, 0
+            total += int(size)
+        if start < len(batch):
+            ranges.append((start, len(batch)))
+        return ranges
+
+    def upsert(self, store, batch: EmbeddingBatch,
+               on_failure: Optional[Callable[[List[Tuple[dict, Exception]]], None]] = None) -> List[str]:
+        """
+        Enviar o lote ao banco vetorial
+
+        Args:
+            store: Banco vetorial de destino (VectorStore)
+            batch: Lote de embeddings
+            on_failure: Chamado com os (registro, último erro) que falharam após
+                todas as tentativas
+
+        Returns:
+            IDs enviados com sucesso
+        """
+        ranges = self.plan(batch, store.payload_bytes_per_value)
+        if not ranges:
+            return []
+
+        sent_ids = []
+        failures = []
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            futures = [executor.submit(retry_with_split, batch[start:end], store.upsert) for start, end in ranges]
+            for done, future in enumerate(futures, 1):
+                successes, batch_failures = future.result()
+                sent_ids.extend(vector_id for sent, _ in successes for vector_id in sent.ids)
+                failures.extend(batch_failures)
+                if self.verbose and not batch_failures:
+                    print(f"  ✅ Lote {done}/{len(ranges)} enviado ({ranges[done - 1][1] - ranges[done - 1][0]} vetores)")
+
+        if failures:
+            print(f"  ❌ {len(failures)} vetores falharam no upsert: {failures[-1][1]}")
+            if on_failure is not None:
+                on_failure(failures)
+        return sent_ids
@@ -0,0 +1,633 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from ann_index import IVFIndex
+from embedding_batch import EmbeddingBatch
+from quantization import QuantizedVectors
+
+
+class VectorStore:
+    """Interface comum dos bancos vetoriais usados pela ingestão e pelo chatbot"""
+
+    name = "base"
+    payload_bytes_per_value = 4  # Bytes de cada valor do vetor no payload de um upsert
+
+    def exists(self) -> bool:
+        """Verificar se o índice já existe"""
+        raise NotImplementedError
+
+    def setup(self, recreate: bool = False):
+        """Criar o índice (ou recriá-lo do zero se `recreate`)"""
+        raise NotImplementedError
+
+    def upsert(self, vectors: Union[EmbeddingBatch, List[Dict]]):
+        """Inserir ou substituir vetores (lote colunar ou lista de {"id", "values", "metadata"})"""
+        raise NotImplementedError
+
+    def delete(self, ids: List[str]):
+        """Remover vetores pelo ID"""
+        raise NotImplementedError
+
+    def delete_all(self):
+        """Remover todos os vetores do índice"""
+        raise NotImplementedError
+
+    def query(self, vector: List[float], top_k: int = 5, filenames: Optional[Sequence[str]] = None,
+              ids: Sequence[str] = ()) -> List[Dict]:
+        """
+        Buscar os vetores mais próximos
+
+        Args:
+            vector: Vetor de consulta
+            top_k: Quantidade de resultados
+            filenames: Restringir a busca aos chunks destes arquivos (None = todos)
+            ids: Vetores que também entram na busca restrita, além dos de `filenames`
+                (ex.: chunks canônicos de trechos desses arquivos removidos como duplicados)
+
+        Returns:
+            Lista de {"id", "score", "metadata"} em ordem decrescente de score
+        """
+        raise NotImplementedError
+
+    def fetch_metadata(self, ids: List[str]) -> Dict[str, Dict]:
+        """Buscar os metadados de vários IDs (IDs inexistentes ficam de fora)"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        """Estatísticas no formato {"total_vector_count", "dimension"}"""
+        raise NotImplementedError
+
+    def optimize(self):
+        """Preparar o índice para consultas ao fim da ingestão (opcional)"""
+
+    def wait_for_count(self, expected: int, timeout: float = 30.0, interval: float = 0.25) -> Dict:
+        """
+        Consultar as estatísticas até o índice refletir ao menos `expected` vetores
+
+        Args:
+            expected: Total de vetores esperado
+            timeout: Tempo máximo de espera (segundos)
+            interval: Intervalo inicial entre consultas (dobra a cada tentativa, até 5s)
+
+        Returns:
+            Últimas estatísticas lidas (o total pode ficar abaixo do esperado no timeout)
+        """
+        deadline = time.monotonic() + timeout
+        stats = self.stats()
+        while stats["total_vector_count"] < expected and time.monotonic() < deadline:
+            time.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+            interval = min(interval * 2, 5.0)
+            stats = self.stats()
+        return stats
+
+
+class PineconeVectorStore(VectorStore):
+    """Índice serverless no Pinecone"""
+
+    name = "pinecone"
+    payload_bytes_per_value = 22  # Floats em JSON (float32 → repr de float64, ~20 dígitos e vírgula)
+
+    def __init__(self, pc, index_name: str, dimension: int = 1536,
+                 cloud: str = "aws", region: str = "us-east-1", host: Optional[str] = None,
+                 pool_threads: int = 4):
+        """
+        Args:
+            pc: Cliente Pinecone
+            index_name: Nome do índice
+            dimension: Dimensão dos vetores
+            cloud: Nuvem do índice serverless
+            region: Região do índice serverless
+            host: Host do índice (evita consultar o plano de controle a cada conexão)
+            pool_threads: Conexões HTTP do índice (uma por upsert simultâneo)
+        """
+        self.pc = pc
+        self.index_name = index_name
+        self.dimension = dimension
+        self.cloud = cloud
+        self.region = region
+        self.host = host
+        self.pool_threads = pool_threads
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            if self.host:
+                self._index = self.pc.Index(host=self.host, pool_threads=self.pool_threads)
+            else:
+                self._index = self.pc.Index(self.index_name, pool_threads=self.pool_threads)
+        return self._index
+
+    def exists(self) -> bool:
+        return self.index_name in [index.name for index in self.pc.list_indexes()]
+
+    def setup(self, recreate: bool = False):
+        from pinecone import ServerlessSpec
+
+        if self.exists():
+            print(f"  ℹ️ Índice '{self.index_name}' já existe")
+            if not recreate:
+                print(f"  ♻️ Reutilizando índice existente (modo incremental)")
+                return
+
+            print(f"  🗑️ Deletando índice existente...")
+            self.pc.delete_index(self.index_name)
+            self._index = None
+            while self.exists():  # Aguardar deleção
+                time.sleep(1)
+
+        # Criar novo índice
+        print(f"  🔨 Criando novo índice...")
+        self.pc.create_index(
+            name=self.index_name,
+            dimension=self.dimension,
+            metric="cosine",
+            spec=ServerlessSpec(cloud=self.cloud, region=self.region)
+        )
+
+        # Aguardar índice ficar pronto
+        print("  ⏳ Aguardando índice ficar pronto...")
+        while not self.pc.describe_index(self.index_name).status['ready']:
+            time.sleep(5)
+
+    def upsert(self, vectors: Union[EmbeddingBatch, List[Dict]]):
+        if isinstance(vectors, EmbeddingBatch):
+            vectors = vectors.records()  # O cliente do Pinecone espera listas de floats
+        self.index.upsert(vectors=vectors)
+
+    def delete(self, ids: List[str]):
+        batch_size = 1000  # Limite de IDs por chamada de delete
+        for i in range(0, len(ids), batch_size):
+            self.index.delete(ids=ids[i:i + batch_size])
+
+    def delete_all(self):
+        self.index.delete(delete_all=True)
+
+    def query(self, vector: List[float], top_k: int = 5, filenames: Optional[Sequence[str]] = None,
+              ids: Sequence[str] = ()) -> List[Dict]:
+        # O filtro por arquivo é aplicado pelo Pinecone antes da busca (`filename` fica no vetor)
+        query_filter = {"filename": {"$in": list(filenames)}} if filenames is not None else None
+        response = self.index.query(vector=vector, top_k=top_k, include_metadata=True, filter=query_filter)
+        matches = [
+            {"id": match["id"], "score": match["score"], "metadata": match.get("metadata") or {}}
+            for match in response["matches"]
+        ]
+        if filenames is None or not ids:
+            return matches
+
+        # IDs avulsos do escopo (sem filtro de metadados possível): buscar os vetores e pontuar aqui
+        seen = {match["id"] for match in matches}
+        extra = [vector_id for vector_id in dict.fromkeys(ids) if vector_id not in seen]
+        query = np.asarray(vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        batch_size = 1000  # Limite de IDs por chamada de fetch
+        for i in range(0, len(extra), batch_size):
+            response = self.index.fetch(ids=extra[i:i + batch_size])
+            for vector_id, fetched in response.vectors.items():
+                values = np.asarray(fetched.values, dtype=np.float32)
+                score = float(values @ query) / max(float(np.linalg.norm(values)), 1e-12)
+                matches.append({"id": vector_id, "score": score,
+                                "metadata": getattr(fetched, "metadata", None) or {}})
+        return sorted(matches, key=lambda match: -match["score"])[:top_k]
+
+    def fetch_metadata(self, ids: List[str]) -> Dict[str, Dict]:
+        metadata = {}
+        batch_size = 1000  # Limite de IDs por chamada de fetch
+        for i in range(0, len(ids), batch_size):
+            response = self.index.fetch(ids=ids[i:i + batch_size])
+            for vector_id, vector in response.vectors.items():
+                metadata[vector_id] = getattr(vector, "metadata", None) or {}
+        return metadata
+
+    def stats(self) -> Dict:
+        stats = self.index.describe_index_stats()
+        return {"total_vector_count": stats["total_vector_count"], "dimension": stats["dimension"]}
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Banco vetorial local, sem rede
+
+    Os vetores ficam normalizados em float32 num arquivo mapeado em memória
+    (`vectors.f32`), de modo que a similaridade de cosseno vira um único
+    produto matriz-vetor. IDs e metadados ficam num SQLite ao lado
+    (`metadata.sqlite`), consultado só para os resultados do top-k.
+    
+    A partir de `ann_min_vectors` vetores, `optimize()` constrói um índice
+    aproximado IVF (ver `ann_index.py`) persistido na mesma pasta e mantido
+    a cada upsert; `query(..., exact=True)` continua fazendo a busca exata.
+
+    Com `quantization="int8"` (códigos 4x menores) ou `"pq"` (até 32x) a
+    busca lê só os códigos quantizados, comparando-os com a consulta em
+    float32 (distância assimétrica). Os `top_k × rerank_factor` melhores
+    candidatos são reordenados com os vetores float32 do disco, recuperando
+    o recall. A redução vale para os bytes varridos por consulta: o
+    `vectors.f32` continua inteiro no disco (os códigos somam 25% ou ~3%),
+    mas só as páginas dos candidatos do re-rank são lidas. Os códigos são
+    retreinados quando o índice passa de 4x o tamanho do último treino,
+    como o IVF.
+    """
+
+    name = "local"
+
+    def __init__(self, path: str, dimension: int = 1536, initial_capacity: int = 1024,
+                 ann_nprobe: int = 16, ann_min_vectors: int = 20_000,
+                 quantization: Optional[str] = None, pq_subspaces: Optional[int] = None,
+                 rerank_factor: int = 4):
+        """
+        Args:
+            path: Pasta do índice
+            dimension: Dimensão dos vetores
+            initial_capacity: Linhas reservadas ao criar o arquivo de vetores
+            ann_nprobe: Listas IVF visitadas por consulta (recall × latência)
+            ann_min_vectors: Tamanho mínimo do índice para usar busca aproximada
+            quantization: None (float32), "int8" ou "pq"
+            pq_subspaces: Subespaços da PQ (padrão: dimensão / 8, 32x menor)
+            rerank_factor: Candidatos reordenados em float32 por resultado (0 = sem re-rank)
+        """
+        self.path = Path(path)
+        self.dimension = dimension
+        self.initial_capacity = initial_capacity
+        self.ann_min_vectors = ann_min_vectors
+        self.ann = IVFIndex(self.path, dimension, nprobe=ann_nprobe)
+        self.quantized = QuantizedVectors(self.path, quantization, dimension, pq_subspaces) if quantization else None
+        self.rerank_factor = rerank_factor
+        self._lock = threading.RLock()
+        self._conn = None
+        self._matrix = None
+
+    # ----------------------------------------------------------- arquivos
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.path / "vectors.f32"
+
+    @property
+    def _metadata_path(self) -> Path:
+        return self.path / "metadata.sqlite"
+
+    def exists(self) -> bool:
+        return self._metadata_path.exists() and self._vectors_path.exists()
+
+    def setup(self, recreate: bool = False):
+        with self._lock:
+            if self.exists():
+                print(f"  ℹ️ Índice local '{self.path}' já existe")
+                if not recreate:
+                    print(f"  ♻️ Reutilizando índice existente (modo incremental)")
+                    self._open()
+                    return
+                print(f"  🗑️ Apagando índice local existente...")
+                self._close()
+                self.ann.drop()
+                if self.quantized:
+                    self.quantized.drop()
+                for file in self.path.iterdir():
+                    if file.is_file():
+                        file.unlink()
+
+            print(f"  🔨 Criando índice local em {self.path}...")
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._create_vectors_file(self.initial_capacity)
+            self._open()
+
+    def _create_vectors_file(self, capacity: int):
+        with open(self._vectors_path, "wb") as f:
+            f.truncate(capacity * self.dimension * 4)
+
+    def _open(self):
+        """Abrir o SQLite e mapear o arquivo de vetores (preguiçoso)"""
+        if self._conn is not None:
+            return
+        if not self._vectors_path.exists():
+            raise FileNotFoundError(f"Índice local não encontrado em {self.path}")
+
+        self._conn = sqlite3.connect(str(self._metadata_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            " id TEXT PRIMARY KEY,"
+            " row INTEGER UNIQUE NOT NULL,"
+            " metadata TEXT NOT NULL)"
+        )
+        # Coluna indexada com o arquivo de origem, para a busca filtrada por documento
+        columns = [column[1] for column in self._conn.execute("PRAGMA table_info(vectors)")]
+        if "filename" not in columns:
+            self._conn.execute("ALTER TABLE vectors ADD COLUMN filename TEXT")
+            self._conn.execute("UPDATE vectors SET filename = json_extract(metadata, '$.filename')")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS vectors_filename ON vectors (filename)")
+        self._conn.commit()
+        self._map_vectors()
+        self._load_rows()
+        self.ann.load(len(self._matrix))
+        if self.quantized:
+            self.quantized.load(len(self._matrix))
+
+    def _map_vectors(self):
+        capacity = self._vectors_path.stat().st_size // (self.dimension * 4)
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+",
+                                 shape=(capacity, self.dimension))
+
+    def _load_rows(self):
+        """Reconstruir em memória o mapa linha → ID e a máscara de linhas ocupadas"""
+        rows = self._conn.execute("SELECT id, row FROM vectors").fetchall()
+        self._row_of = {vector_id: row for vector_id, row in rows}
+        self._id_of_row = {row: vector_id for vector_id, row in rows}
+        self._alive = np.zeros(len(self._matrix), dtype=bool)
+        if rows:
+            self._alive[[row for _, row in rows]] = True
+        # Linhas já usadas (marca d'água): calculada uma vez aqui e avançada no upsert
+        self._used_rows = max(self._id_of_row, default=-1) + 1
+        self._free_rows = [row for row in range(self._used_rows) if not self._alive[row]]
+
+    def _next_row(self) -> int:
+        return self._used_rows
+
+    def _ensure_capacity(self, rows: int):
+        """Dobrar o arquivo de vetores até caber `rows` linhas"""
+        capacity = len(self._matrix)
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        self._matrix.flush()
+        self._matrix = None
+        with open(self._vectors_path, "r+b") as f:
+            f.truncate(capacity * self.dimension * 4)
+        self._map_vectors()
+        self.ann.resize(capacity)
+        if self.quantized:
+            self.quantized.resize(capacity)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive
+        self._alive = alive
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+
+    # ----------------------------------------------------------- escrita
+
+    def upsert(self, vectors: Union[EmbeddingBatch, List[Dict]]):
+        if not len(vectors):
+            return
+        if isinstance(vectors, EmbeddingBatch):
+            # Lote colunar: a matriz float32 vai direto para o índice, sem listas intermediárias
+            ids = vectors.ids
+            values = np.array(vectors.vectors, dtype=np.float32)
+            metadata = [vectors.metadata(i) for i in range(len(vectors))]
+        else:
+            ids = [item["id"] for item in vectors]
+            values = np.asarray([item["values"] for item in vectors], dtype=np.float32)
+            metadata = [item.get("metadata") or {} for item in vectors]
+        with self._lock:
+            self._open()
+            if values.shape[1] != self.dimension:
+                raise ValueError(f"Dimensão {values.shape[1]} diferente da do índice ({self.dimension})")
+            norms = np.linalg.norm(values, axis=1, keepdims=True)
+            values /= np.maximum(norms, 1e-12)
+
+            next_row = self._next_row()
+            rows = []
+            for vector_id in ids:
+                row = self._row_of.get(vector_id)
+                if row is None:
+                    if self._free_rows:
+                        row = self._free_rows.pop()
+                    else:
+                        row = next_row
+                        next_row += 1
+                    self._row_of[vector_id] = row
+                    self._id_of_row[row] = vector_id
+                rows.append(row)
+
+            self._ensure_capacity(next_row)
+            self._used_rows = next_row
+            self._matrix[rows] = values
+            self._alive[rows] = True
+            self._matrix.flush()
+            self.ann.add(rows, values)
+            if self.quantized:
+                self.quantized.add(rows, values)
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (id, row, metadata, filename) VALUES (?, ?, ?, ?)",
+                [(vector_id, row, json.dumps(item_metadata, ensure_ascii=False), item_metadata.get("filename"))
+                 for vector_id, row, item_metadata in zip(ids, rows, metadata)]
+            )
+            self._conn.commit()
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            self._open()
+            rows = [self._row_of.pop(vector_id) for vector_id in ids if vector_id in self._row_of]
+            for row in rows:
+                del self._id_of_row[row]
+                self._alive[row] = False
+                self._free_rows.append(row)
+            self.ann.remove(rows)
+            self._conn.executemany("DELETE FROM vectors WHERE id = ?", [(vector_id,) for vector_id in ids])
+            self._conn.commit()
+
+    def delete_all(self):
+        with self._lock:
+            self._open()
+            self._conn.execute("DELETE FROM vectors")
+            self._conn.commit()
+            self._load_rows()
+            self.ann.drop()
+            if self.quantized:
+                self.quantized.drop()
+
+    # ----------------------------------------------------------- leitura
+
+    def fetch_metadata(self, ids: List[str]) -> Dict[str, Dict]:
+        """Buscar os metadados de vários IDs numa única consulta"""
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            self._open()
+            rows = self._conn.execute(
+                f"SELECT id, metadata FROM vectors WHERE id IN ({placeholders})", ids
+            ).fetchall()
+        return {vector_id: json.loads(metadata) for vector_id, metadata in rows}
+
+    def _scope_rows(self, filenames: Sequence[str], ids: Sequence[str]) -> np.ndarray:
+        """Linhas dos vetores destes arquivos (pelo índice da coluna `filename`) e IDs, em ordem crescente"""
+        filenames = list(filenames)
+        rows = []
+        if filenames:
+            placeholders = ",".join("?" * len(filenames))
+            rows = [row for row, in self._conn.execute(
+                f"SELECT row FROM vectors WHERE filename IN ({placeholders})", filenames
+            )]
+        rows.extend(self._row_of[vector_id] for vector_id in ids if vector_id in self._row_of)
+        return np.unique(np.asarray(rows, dtype=np.int64))
+
+    def query(self, vector: List[float], top_k: int = 5, exact: bool = False,
+              nprobe: Optional[int] = None, filenames: Optional[Sequence[str]] = None,
+              ids: Sequence[str] = ()) -> List[Dict]:
+        """
+        Buscar os vetores mais próximos por similaridade de cosseno
+        
+        Args:
+            vector: Vetor de consulta
+            top_k: Quantidade de resultados
+            exact: Ignorar o índice aproximado e a quantização e varrer todos os vetores
+            nprobe: Listas IVF visitadas (padrão: `ann_nprobe`)
+            filenames: Restringir a busca aos chunks destes arquivos (None = todos). O
+                filtro vem antes da busca: só as linhas desses arquivos são pontuadas,
+                sem passar pelo índice aproximado
+            ids: Vetores que também entram na busca restrita, além dos de `filenames`
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+
+        # Sob o lock só se lê o estado mutável (linhas, listas IVF, referências aos
+        # memmaps); a varredura roda fora dele, em paralelo com outras consultas
+        with self._lock:
+            self._open()
+            used = self._next_row()
+            if used == 0:
+                return []
+            matrix = self._matrix
+
+            quantized = self.quantized is not None and self.quantized.is_trained and not exact
+            # Com quantização, busca-se mais candidatos para o re-rank em float32
+            fetch_k = top_k * self.rerank_factor if quantized and self.rerank_factor else top_k
+
+            if quantized:
+                score_rows = self.quantized.scorer(query)
+            else:
+                score_rows = lambda rows: np.asarray(matrix[rows]) @ query
+
+            if filenames is not None:
+                # Pré-filtro: varredura só das linhas dos arquivos escolhidos
+                candidates = self._scope_rows(filenames, ids)
+            elif self.ann.is_trained and not exact:
+                candidates = self.ann.probe(query, nprobe)
+            else:
+                # Similaridade de cosseno de todos os vetores de uma vez
+                candidates = None
+                alive = self._alive[:used].copy()
+                score_all = (self.quantized.prefix_scorer(query, used) if quantized
+                             else lambda: matrix[:used] @ query)
+
+        if candidates is not None:
+            k = min(fetch_k, len(candidates))
+            if k == 0:
+                return []
+            scores = score_rows(candidates)
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            top, top_scores = candidates[best], scores[best]
+        else:
+            scores = score_all()
+            scores[~alive] = -np.inf
+            k = min(fetch_k, int(alive.sum()))
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            top_scores = scores[top]
+
+        if quantized and self.rerank_factor:
+            # Re-rank dos candidatos com os vetores float32 originais
+            rows = np.sort(top)
+            exact_scores = np.asarray(matrix[rows]) @ query
+            best = np.argsort(-exact_scores)[:top_k]
+            top, top_scores = rows[best], exact_scores[best]
+
+        with self._lock:
+            # Linhas apagadas durante a varredura ficam de fora
+            found = [(self._id_of_row[int(row)], float(score))
+                     for row, score in zip(top, top_scores) if int(row) in self._id_of_row]
+
+        metadata = self.fetch_metadata([vector_id for vector_id, _ in found])
+        return [
+            {"id": vector_id, "score": score, "metadata": metadata.get(vector_id, {})}
+            for vector_id, score in found
+        ]
+
+    def optimize(self, nlist: Optional[int] = None, retrain: bool = False):
+        """
+        Construir ou atualizar o índice aproximado IVF e os códigos quantizados
+        
+        O treino (k-means) só roda na primeira vez, quando `retrain` é pedido
+        ou quando o índice cresceu 4x desde o último treino; nos demais casos
+        apenas linhas ainda sem lista são atribuídas.
+        
+        Args:
+            nlist: Número de listas IVF (padrão: 4·√n)
+            retrain: Forçar novo treino dos centróides
+        """
+        with self._lock:
+            self._open()
+            alive_rows = np.flatnonzero(self._alive)
+            # Retreinar quando o índice cresce muito além da amostra do treino (mesma regra do IVF)
+            if self.quantized and len(alive_rows) and (retrain or not self.quantized.is_trained
+                                                       or len(alive_rows) > 4 * self.quantized.trained_count):
+                print(f"  🗜️ Treinando quantização {self.quantized.kind} com {len(alive_rows)} vetores...")
+                self.quantized.train(self._matrix, alive_rows, len(self._matrix))
+                print(f"  ✅ Quantização pronta: {self.quantized.bytes_per_vector} bytes/vetor "
+                      f"(float32: {self.dimension * 4})")
+
+            if len(alive_rows) < self.ann_min_vectors and not retrain:
+                if self.ann.is_trained:
+                    self.ann.drop()
+                print(f"  🔎 Índice aproximado desnecessário ({len(alive_rows)} vetores): busca exata")
+                return
+
+            if retrain or not self.ann.is_trained or len(alive_rows) > 4 * self.ann.trained_count:
+                print(f"  🧭 Treinando índice IVF com {len(alive_rows)} vetores...")
+                self.ann.train(self._matrix, alive_rows, len(self._matrix), nlist=nlist)
+                print(f"  ✅ Índice IVF pronto: {self.ann.nlist} listas, nprobe={self.ann.nprobe}")
+            else:
+                pending = self.ann.unassigned(alive_rows)
+                self.ann.add(pending, self._matrix[pending])
+                print(f"  ✅ Índice IVF atualizado ({len(pending)} vetores atribuídos)")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._open()
+            return {"total_vector_count": len(self._row_of), "dimension": self.dimension}
+
+    def wait_for_count(self, expected: int, timeout: float = 30.0, interval: float = 0.25) -> Dict:
+        return self.stats()  # Escritas locais ficam visíveis na hora
+
+
+def create_vector_store(backend: str, index_name: str, pc=None, local_store_dir: str = ".neurochat/vectors",
+                        dimension: int = 1536, quantization: Optional[str] = None,
+                        pinecone_host: Optional[str] = None, pool_threads: int = 4) -> VectorStore:
+    """
+    Criar o banco vetorial de um índice para o backend configurado
+
+    Args:
+        backend: "pinecone" ou "local"
+        index_name: Nome do índice
+        pc: Cliente Pinecone (obrigatório no backend "pinecone")
+        local_store_dir: Pasta dos índices locais
+        dimension: Dimensão dos vetores
+        quantization: Quantização do índice local (None, "int8" ou "pq")
+        pinecone_host: Host do índice no Pinecone (opcional)
+        pool_threads: Conexões HTTP com o Pinecone
+    """
+    if backend == "local":
+        return LocalVectorStore(str(Path(local_store_dir) / index_name), dimension=dimension,
+                                quantization=quantization)
+    if backend == "pinecone":
+        if pc is None:
+            raise ValueError("PINECONE_API_KEY é obrigatória no backend 'pinecone'")
+        return PineconeVectorStore(pc, index_name, dimension=dimension, host=pinecone_host,
+                                   pool_threads=pool_threads)
+    raise ValueError(f"Backend vetorial desconhecido: {backend}")